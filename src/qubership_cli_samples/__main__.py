@@ -1,148 +1,76 @@
 import time
 start_time = time.perf_counter()
-import os, sys, click, logging
+import os, sys
+
+if (worker_socket := os.getenv('QUBERSHIP_CLI_WORKER_SOCKET')) and sys.argv[1:2] != ["serve"]:
+    # Forward invocation to warm worker before importing anything heavy, fall back to local execution if it's not available
+    from qubership_cli_samples.worker.worker_client import forward_to_worker
+    if (worker_exit_code := forward_to_worker(worker_socket, sys.argv[1:], os.path.basename(sys.argv[0]))) is not None:
+        sys.exit(worker_exit_code)
+
+import click, logging
 from qubership_pipelines_common_library.v1.utils.utils_cli import utils_cli
 from qubership_pipelines_common_library.v1.utils.utils_string import UtilsString
 
 ENABLE_PROFILER_STATS = UtilsString.convert_to_bool(os.getenv('PIPELINES_DECLARATIVE_EXECUTOR_ENABLE_PROFILER_STATS', False))
 
 
-@click.group(chain=True)
-def cli():
-    current_path = os.path.dirname(os.path.abspath(__file__))
-    sys.path.insert(0, current_path)
-
+class RegistryCommandGroup(click.Group):
+    """Resolves commands declared in `command_registry` lazily - their modules are imported only when command is selected"""
 
-@cli.command("run-sample")
-@utils_cli
-def __run_sample(**kwargs):
-    from qubership_cli_samples.sample_command import SampleStandaloneExecutionCommand
-    command = SampleStandaloneExecutionCommand(**kwargs)
-    command.run()
+    def list_commands(self, ctx):
+        from qubership_cli_samples.command_registry import get_all_command_specs
+        return sorted(set(super().list_commands(ctx)) | set(get_all_command_specs().keys()))
 
-
-@cli.command("calc")
-@utils_cli
-def __calc(**kwargs):
-    from qubership_cli_samples.sample_command import CalcCommand
-    command = CalcCommand(**kwargs)
-    command.run()
-
-
-@cli.command("spam")
-@utils_cli
-def __spam(**kwargs):
-    if ENABLE_PROFILER_STATS:
-        logging.info(f"Common imports: {(time.perf_counter() - start_time) * 1_000} ms")
-        start_cmd_import = time.perf_counter()
-        from qubership_cli_samples.sample_command import GenerateTestOutputParamsCommand
-        logging.info(f"Cmd import: {(time.perf_counter() - start_cmd_import) * 1_000} ms")
-        start_cmd = time.perf_counter()
-        try:
-            command = GenerateTestOutputParamsCommand(**kwargs)
-            command.run()
-        finally:
-            logging.info(f"Cmd run time: {(time.perf_counter() - start_cmd) * 1_000} ms")
-    else:
-        from qubership_cli_samples.sample_command import GenerateTestOutputParamsCommand
-        command = GenerateTestOutputParamsCommand(**kwargs)
-        command.run()
-        return
+    def get_command(self, ctx, cmd_name):
+        if command := super().get_command(ctx, cmd_name):
+            return command
+        from qubership_cli_samples.command_registry import get_command_spec
+        if spec := get_command_spec(cmd_name):
+            return _create_registry_command(cmd_name, spec)
+        return None
 
 
-@cli.command("spam-files")
-@utils_cli
-def __spam_files(**kwargs):
-    if ENABLE_PROFILER_STATS:
-        logging.info(f"Common imports: {(time.perf_counter() - start_time) * 1_000} ms")
-        start_cmd_import = time.perf_counter()
-        from qubership_cli_samples.sample_command import GenerateTestOutputFilesCommand
-        logging.info(f"Cmd import: {(time.perf_counter() - start_cmd_import) * 1_000} ms")
-        start_cmd = time.perf_counter()
-        try:
-            command = GenerateTestOutputFilesCommand(**kwargs)
-            command.run()
-        finally:
-            logging.info(f"Cmd run time: {(time.perf_counter() - start_cmd) * 1_000} ms")
-    else:
-        from qubership_cli_samples.sample_command import GenerateTestOutputFilesCommand
-        command = GenerateTestOutputFilesCommand(**kwargs)
-        command.run()
-        return
+def _create_registry_command(cmd_name, spec):
+    @click.command(cmd_name, help=spec.help_text)
+    @utils_cli
+    def __registry_command(**kwargs):
+        _run_command(lambda: spec.create_command(**kwargs), spec.load_class)
+    return __registry_command
 
 
-@cli.command("spam-module-report")
-@utils_cli
-def __spam_module_report(**kwargs):
-    if ENABLE_PROFILER_STATS:
-        logging.info(f"Common imports: {(time.perf_counter() - start_time) * 1_000} ms")
-        start_cmd_import = time.perf_counter()
-        from qubership_cli_samples.sample_command import GenerateTestModuleReportCommand
-        logging.info(f"Cmd import: {(time.perf_counter() - start_cmd_import) * 1_000} ms")
-        start_cmd = time.perf_counter()
-        try:
-            command = GenerateTestModuleReportCommand(**kwargs)
-            command.run()
-        finally:
-            logging.info(f"Cmd run time: {(time.perf_counter() - start_cmd) * 1_000} ms")
-    else:
-        from qubership_cli_samples.sample_command import GenerateTestModuleReportCommand
-        command = GenerateTestModuleReportCommand(**kwargs)
-        command.run()
+def _run_command(create_command, load_class=None):
+    if not ENABLE_PROFILER_STATS:
+        create_command().run()
         return
+    from qubership_cli_samples.profiling import CommandProfiler
+    profiler = CommandProfiler(click.get_current_context().info_name, start_time)
+    profiler.run(create_command, load_class)
 
 
-@cli.command("system-load-test")
-@utils_cli
-def __system_load_test(**kwargs):
-    if ENABLE_PROFILER_STATS:
-        logging.info(f"Common imports: {(time.perf_counter() - start_time) * 1_000} ms")
-        start_cmd_import = time.perf_counter()
-        from qubership_cli_samples.debug.system_load_commands import SystemLoadTestCommand
-        logging.info(f"Cmd import: {(time.perf_counter() - start_cmd_import) * 1_000} ms")
-        start_cmd = time.perf_counter()
-        try:
-            command = SystemLoadTestCommand(**kwargs)
-            command.run()
-        finally:
-            logging.info(f"Cmd run time: {(time.perf_counter() - start_cmd) * 1_000} ms")
-    else:
-        from qubership_cli_samples.debug.system_load_commands import SystemLoadTestCommand
-        command = SystemLoadTestCommand(**kwargs)
-        command.run()
-        return
+@click.group(chain=True, cls=RegistryCommandGroup)
+def cli():
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, current_path)
 
 
-@cli.command("list-minio-files")
-@utils_cli
-def __list_minio_files(**kwargs):
-    from qubership_cli_samples.minio_commands import ListMinioBucketObjectsCommand
-    command = ListMinioBucketObjectsCommand(**kwargs)
-    command.run()
+@cli.command("serve")
+@click.option('--socket_path', required=True, type=str, help="Path to Unix socket worker will listen on")
+@click.option('--idle_timeout', default=0, show_default=True, type=float, help="Shut down after this many seconds without requests (0 - never)")
+@click.option('--max_children', default=40, show_default=True, type=int, help="Maximum number of concurrently executed requests")
+@click.pass_context
+def __serve(ctx, socket_path, idle_timeout, max_children):
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO,
+                        format=u'[%(asctime)s] [%(levelname)-s] [%(filename)s]: %(message)s')
+    from qubership_cli_samples.worker.worker_server import serve
+    serve(ctx.find_root().command, socket_path, idle_timeout, max_children)
 
 
 @cli.command("umbrella-test")
 @utils_cli
 def __umbrella_test(**kwargs):
     from qubership_cli_samples.umbrella_test.umbrella_command import UmbrellaCommand
-    command = UmbrellaCommand(folder_path="./RESULTS_FOLDER", input_params={"systems": {"gitlab": {"url": "https://gitlab.com"}}})
-    command.run()
-
-
-@cli.command("download-file")
-@utils_cli
-def __download_file(**kwargs):
-    from qubership_cli_samples.file_processing.file_commands import DownloadFileExecutionCommand
-    command = DownloadFileExecutionCommand(**kwargs)
-    command.run()
-
-
-@cli.command("analyze-file")
-@utils_cli
-def __analyze_file(**kwargs):
-    from qubership_cli_samples.file_processing.file_commands import AnalyzeFileExecutionCommand
-    command = AnalyzeFileExecutionCommand(**kwargs)
-    command.run()
+    _run_command(lambda: UmbrellaCommand(folder_path="./RESULTS_FOLDER", input_params={"systems": {"gitlab": {"url": "https://gitlab.com"}}}))
 
 
 @cli.command("generate-context-from-env")
@@ -150,70 +78,4 @@ def __analyze_file(**kwargs):
 @utils_cli
 def __generate_context_from_env(context_folder, **kwargs):
     from qubership_cli_samples.file_processing.file_commands import GenerateContextFromEnv
-    command = GenerateContextFromEnv(input_params={"params": {"context_folder": context_folder}})
-    command.run()
-
-
-@cli.command("generate-html-report")
-@utils_cli
-def __generate_html_report(**kwargs):
-    from qubership_cli_samples.report.report_command import BuildReport
-    command = BuildReport(**kwargs)
-    command.run()
-
-
-@cli.command("github-run-pipeline")
-@utils_cli
-def __github_run_pipeline(**kwargs):
-    from qubership_pipelines_common_library.v2.github.github_run_pipeline_command import GithubRunPipeline
-    command = GithubRunPipeline(**kwargs)
-    command.run()
-
-
-@cli.command("gitlab-run-pipeline")
-@utils_cli
-def __gitlab_run_pipeline(**kwargs):
-    from qubership_pipelines_common_library.v2.gitlab.gitlab_run_pipeline_command import GitlabRunPipeline
-    from qubership_pipelines_common_library.v2.gitlab.custom_extensions import GitlabModulesOpsPipelineDataImporter, GitlabDOBPParamsPreExt
-    command = GitlabRunPipeline(**kwargs, pipeline_data_importer=GitlabModulesOpsPipelineDataImporter(), pre_execute_actions=[GitlabDOBPParamsPreExt()])
-    command.run()
-
-
-@cli.command("jenkins-run-pipeline")
-@utils_cli
-def __jenkins_run_pipeline(**kwargs):
-    from qubership_pipelines_common_library.v2.jenkins.jenkins_run_pipeline_command import JenkinsRunPipeline
-    command = JenkinsRunPipeline(**kwargs)
-    command.run()
-
-
-@cli.command("podman-run-image")
-@utils_cli
-def __podman_run_image(**kwargs):
-    from qubership_pipelines_common_library.v2.podman.podman_command import PodmanRunImage
-    command = PodmanRunImage(**kwargs)
-    command.run()
-
-
-@cli.command("download-artifact")
-@utils_cli
-def __download_artifact(**kwargs):
-    from qubership_pipelines_common_library.v2.pipelines.download_artifact_command import DownloadArtifact
-    command = DownloadArtifact(**kwargs)
-    command.run()
-
-
-@cli.command("validate-dependencies")
-@utils_cli
-def __validate_dependencies(**kwargs):
-    from qubership_cli_samples.debug.validate_dependencies_command import ValidateDependenciesCommand
-    command = ValidateDependenciesCommand(**kwargs)
-    command.run()
-
-
-@cli.command("debug")
-@utils_cli
-def __debug(**kwargs):
-    from qubership_cli_samples.debug.debug_command import DebugCommand
-    command = DebugCommand(**kwargs)
-    command.run()
+    _run_command(lambda: GenerateContextFromEnv(input_params={"params": {"context_folder": context_folder}}))
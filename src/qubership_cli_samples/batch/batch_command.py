@@ -0,0 +1,170 @@
+import json, logging, os, time
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from pathlib import Path
+from qubership_pipelines_common_library.v1.execution.exec_command import ExecutionCommand
+from qubership_pipelines_common_library.v1.utils.utils_dictionary import UtilsDictionary
+from qubership_pipelines_common_library.v1.utils.utils_file import UtilsFile
+from qubership_pipelines_common_library.v1.utils.utils_string import UtilsString
+from qubership_cli_samples.command_registry import get_command_spec
+
+
+class RunBatchCommand(ExecutionCommand):
+    """
+    Executes many ExecutionCommands inside one interpreter, using thread or process pool.
+
+    Input Parameters Structure (this structure is expected inside "input_params.params" block):
+    {
+        "manifest": "./batch_manifest.yaml",  # Path to YAML/JSON file with list of items (or with "items" key), relative paths inside it are resolved relative to manifest
+        "items": [  # Alternative to "manifest" - inline list of items
+            {
+                "command": "calc",  # REQUIRED: CLI command name, as declared in command_registry
+                "context_path": "./contexts/1/context.yaml",  # Existing context for this item, relative paths are resolved relative to manifest (or to folder of batch's own context for inline "items")
+                "input_params": ["params.param_1=9", "params.operation=add"],  # Or params to create context from, either as "-p"-style list or as dict
+                "input_params_secure": {"params": {"param_2": 10}},
+            }
+        ],
+        "workers": 4,  # OPTIONAL: Pool size, default is 4
+        "executor": "process",  # OPTIONAL: "process" or "thread", default is "process"
+        "fail_on_item_failure": True,  # OPTIONAL: Whether batch should fail if any of its items failed
+    }
+
+    Output Parameters:
+    - params.batch.total / succeeded / failed: Item counters
+    - params.batch.execution_time: Total execution time in seconds
+    - params.batch.summary_file: Path to "batch_summary.json" with per-item results (exit code, time, output params path)
+
+    Notes:
+    - Each item gets its own context; items created from input params get it in "paths.output.files/batch_items/item_<index>"
+    - In "thread" mode concurrently running items share global loggers, so their log files might contain each other's lines
+    """
+
+    SUMMARY_FILE_NAME = "batch_summary.json"
+
+    def _validate(self):
+        names = ["paths.input.params",
+                 "paths.output.params",
+                 "paths.output.files"]
+        if not self.context.validate(names):
+            return False
+
+        self.items = self.context.input_param_get("params.items", [])
+        self.base_path = Path(self.context.context_path).parent
+        if manifest_path := self.context.input_param_get("params.manifest"):
+            manifest = UtilsFile.read_yaml(manifest_path)  # JSON is subset of YAML
+            self.items = manifest.get("items", []) if isinstance(manifest, dict) else manifest
+            self.base_path = Path(manifest_path).resolve().parent
+        if not self.items or not isinstance(self.items, list):
+            self.context.logger.error("Either 'params.manifest' or 'params.items' with non-empty list of items is required")
+            return False
+        for index, item in enumerate(self.items):
+            if not isinstance(item, dict):
+                self.context.logger.error(f"Item {index} must be a mapping")
+                return False
+            if not get_command_spec(item.get("command")):
+                self.context.logger.error(f"Item {index} has unknown command '{item.get('command')}'")
+                return False
+
+        self.workers = max(1, int(self.context.input_param_get("params.workers", 4)))
+        self.executor = self.context.input_param_get("params.executor", "process").lower()
+        if self.executor not in ["process", "thread"]:
+            self.context.logger.error(f"Unknown executor '{self.executor}', expected 'process' or 'thread'")
+            return False
+        self.fail_on_item_failure = UtilsString.convert_to_bool(self.context.input_param_get("params.fail_on_item_failure", True))
+        self.output_files_path = Path(self.context.input_param_get("paths.output.files"))
+        return True
+
+    def _execute(self):
+        self.context.logger.info(f"Running RunBatchCommand - executing {len(self.items)} item(s) using {self.executor} pool of {self.workers} worker(s)...")
+        start = time.perf_counter()
+        pool_class = ProcessPoolExecutor if self.executor == "process" else ThreadPoolExecutor
+        with pool_class(max_workers=self.workers) as pool:
+            futures = [pool.submit(run_batch_item, index, self._prepare_item(index, item))
+                       for index, item in enumerate(self.items)]
+            results = [future.result() for future in futures]
+        execution_time = time.perf_counter() - start
+
+        succeeded = sum(1 for result in results if result["exit_code"] == 0)
+        failed = len(results) - succeeded
+        for result in results:
+            if result["exit_code"] != 0:
+                self.context.logger.warning(f"Item {result['index']} ({result['command']}) failed with exit code {result['exit_code']}")
+
+        summary_path = self.output_files_path.joinpath(RunBatchCommand.SUMMARY_FILE_NAME)
+        summary_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(summary_path, 'w', encoding='utf-8') as fs:
+            json.dump({"total": len(results), "succeeded": succeeded, "failed": failed,
+                       "execution_time": round(execution_time, 3), "items": results}, fs, indent=2)
+
+        self.context.output_param_set("params.batch.total", len(results))
+        self.context.output_param_set("params.batch.succeeded", succeeded)
+        self.context.output_param_set("params.batch.failed", failed)
+        self.context.output_param_set("params.batch.execution_time", f"{execution_time:0.3f}s")
+        self.context.output_param_set("params.batch.summary_file", str(summary_path))
+        self.context.output_params_save()
+        self.context.logger.info(f"Batch finished in {execution_time:0.3f}s: {succeeded} succeeded, {failed} failed")
+
+        if failed and self.fail_on_item_failure:
+            self._exit(False, f"{failed} batch item(s) failed")
+
+    def _prepare_item(self, index: int, item: dict) -> dict:
+        """Relative "context_path" is resolved against manifest folder, or against batch's own context folder for inline items"""
+        prepared = {"command": item["command"]}
+        if input_params := item.get("input_params"):
+            prepared["input_params"] = _params_to_dict(input_params)
+        if input_params_secure := item.get("input_params_secure"):
+            prepared["input_params_secure"] = _params_to_dict(input_params_secure)
+        if "input_params" in prepared or "input_params_secure" in prepared:
+            # same precedence as in CLI: explicit params win over context_path
+            prepared["folder_path"] = str(self.output_files_path.joinpath("batch_items", f"item_{index}"))
+        elif context_path := item.get("context_path"):
+            prepared["context_path"] = str(self.base_path.joinpath(context_path))
+        return prepared
+
+
+def run_batch_item(index: int, item: dict) -> dict:
+    """Runs single batch item, catching SystemExit forced by ExecutionCommand.run(). Module-level to be usable in process pool"""
+    result = {"index": index, "command": item["command"], "exit_code": 1}
+    start = time.perf_counter()
+    command = None
+    try:
+        command = get_command_spec(item["command"]).create_command(context_path=item.get("context_path"),
+                                                                  input_params=item.get("input_params"),
+                                                                  input_params_secure=item.get("input_params_secure"),
+                                                                  folder_path=item.get("folder_path"))
+        result["context_path"] = command.context.context_path
+        result["output_params"] = command.context.context.get("paths.output.params")
+        command.run()
+        result["exit_code"] = 0
+    except SystemExit as e:
+        # we need this because we forced exit codes into ExecutionCommand.run(), and they would end the whole batch
+        result["exit_code"] = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except Exception as e:
+        logging.error(f"Batch item {index} ({item['command']}) failed before execution: {e}")
+        result["error"] = str(e)
+    finally:
+        if command:
+            _detach_log_handlers(command.context.path_logs)
+    result["status"] = "SUCCESS" if result["exit_code"] == 0 else "FAILURE"
+    result["execution_time"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def _detach_log_handlers(path_logs):
+    """ExecutionLogger never removes its file handlers, so they have to be dropped before next item reuses same loggers"""
+    path_logs = os.path.abspath(path_logs)
+    for logger in [logging.getLogger("execution_logger"), logging.getLogger()]:
+        for handler in list(logger.handlers):
+            if isinstance(handler, logging.FileHandler) and os.path.dirname(handler.baseFilename) == path_logs:
+                logger.removeHandler(handler)
+                handler.close()
+
+
+def _params_to_dict(params) -> dict:
+    if isinstance(params, dict):
+        return params
+    result = {}
+    for kvp in params:
+        key, value = [part.strip() for part in kvp.split("=", 1)]
+        UtilsDictionary.set_by_path(result, key.replace("__", "."), value)
+    return result
@@ -0,0 +1,140 @@
+import importlib, json, os, re, sys
+
+ENTRY_POINTS_GROUP = "qubership_cli_samples.commands"
+ENTRY_POINTS_CACHE_ENV = "QUBERSHIP_CLI_ENTRY_POINTS_CACHE"
+
+
+class CommandSpec:
+
+    def __init__(self, target: str, extras: dict = None, help_text: str = None):
+        """
+        Declarative description of CLI command, resolved only when command is selected
+
+        Arguments:
+            target (str): ExecutionCommand implementation in "module:Class" format
+            extras (dict): Additional constructor kwargs. String values in "module:Class" format (and lists of them) are instantiated without args
+            help_text (str): Short help shown in CLI
+        """
+        self.target = target
+        self.extras = extras or {}
+        self.help_text = help_text
+
+    def load_class(self):
+        return _import_target(self.target)
+
+    def create_command(self, **kwargs):
+        extras = {key: _instantiate(value) for key, value in self.extras.items()}
+        return self.load_class()(**kwargs, **extras)
+
+    def module_names(self) -> list[str]:
+        names = [self.target.split(":")[0]]
+        for value in self.extras.values():
+            for item in value if isinstance(value, list) else [value]:
+                if _is_target(item):
+                    names.append(item.split(":")[0])
+        return names
+
+
+COMMANDS = {
+    "run-sample": CommandSpec("qubership_cli_samples.sample_command:SampleStandaloneExecutionCommand"),
+    "calc": CommandSpec("qubership_cli_samples.sample_command:CalcCommand"),
+    "spam": CommandSpec("qubership_cli_samples.sample_command:GenerateTestOutputParamsCommand"),
+    "spam-files": CommandSpec("qubership_cli_samples.sample_command:GenerateTestOutputFilesCommand"),
+    "spam-module-report": CommandSpec("qubership_cli_samples.sample_command:GenerateTestModuleReportCommand"),
+    "system-load-test": CommandSpec("qubership_cli_samples.debug.system_load_commands:SystemLoadTestCommand"),
+    "run-batch": CommandSpec("qubership_cli_samples.batch.batch_command:RunBatchCommand"),
+    "list-minio-files": CommandSpec("qubership_cli_samples.minio_commands:ListMinioBucketObjectsCommand"),
+    "download-file": CommandSpec("qubership_cli_samples.file_processing.file_commands:DownloadFileExecutionCommand"),
+    "analyze-file": CommandSpec("qubership_cli_samples.file_processing.file_commands:AnalyzeFileExecutionCommand"),
+    "generate-html-report": CommandSpec("qubership_cli_samples.report.report_command:BuildReport"),
+    "aggregate-reports": CommandSpec("qubership_cli_samples.report.report_command:AggregateReports"),
+    "github-run-pipeline": CommandSpec("qubership_pipelines_common_library.v2.github.github_run_pipeline_command:GithubRunPipeline"),
+    "gitlab-run-pipeline": CommandSpec("qubership_pipelines_common_library.v2.gitlab.gitlab_run_pipeline_command:GitlabRunPipeline", extras={
+        "pipeline_data_importer": "qubership_pipelines_common_library.v2.gitlab.custom_extensions:GitlabModulesOpsPipelineDataImporter",
+        "pre_execute_actions": ["qubership_pipelines_common_library.v2.gitlab.custom_extensions:GitlabDOBPParamsPreExt"],
+    }),
+    "jenkins-run-pipeline": CommandSpec("qubership_pipelines_common_library.v2.jenkins.jenkins_run_pipeline_command:JenkinsRunPipeline"),
+    "podman-run-image": CommandSpec("qubership_cli_samples.podman.podman_command:PodmanRunImage"),
+    "podman-pool-cleanup": CommandSpec("qubership_cli_samples.podman.podman_command:PodmanPoolCleanup"),
+    "download-artifact": CommandSpec("qubership_pipelines_common_library.v2.pipelines.download_artifact_command:DownloadArtifact"),
+    "validate-dependencies": CommandSpec("qubership_cli_samples.debug.validate_dependencies_command:ValidateDependenciesCommand"),
+    "debug": CommandSpec("qubership_cli_samples.debug.debug_command:DebugCommand"),
+}
+
+_entry_point_commands = None
+
+
+def get_command_spec(name: str) -> CommandSpec | None:
+    """Looks up command among built-in ones first, so entry points are only scanned for unknown names"""
+    if spec := COMMANDS.get(name):
+        return spec
+    return get_entry_point_commands().get(name)
+
+
+def get_all_command_specs() -> dict[str, CommandSpec]:
+    return {**get_entry_point_commands(), **COMMANDS}
+
+
+def get_entry_point_commands() -> dict[str, CommandSpec]:
+    """
+    Commands registered by third-party packages, e.g. in their pyproject.toml:
+
+    [tool.poetry.plugins."qubership_cli_samples.commands"]
+    "my-command" = "my_package.my_module:MyExecutionCommand"
+    """
+    global _entry_point_commands
+    if _entry_point_commands is None:
+        _entry_point_commands = {name: CommandSpec(target) for name, target in _scan_entry_points().items()}
+    return _entry_point_commands
+
+
+def _scan_entry_points() -> dict[str, str]:
+    """
+    Scanning all installed distributions takes tens of milliseconds, so its result is cached on disk (`--help` lists these commands).
+    Cache is keyed by `sys.path` entries and their modification times, which change when distributions are installed or removed.
+    """
+    cache_path = os.getenv(ENTRY_POINTS_CACHE_ENV) or os.path.join(os.path.expanduser("~"), ".cache", "qubership_cli_samples", "entry_points.json")
+    cache_key = []
+    for path in sys.path:
+        try:
+            cache_key.append([path, os.stat(path or ".").st_mtime_ns])
+        except OSError:
+            cache_key.append([path, None])
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get("key") == cache_key:
+            return cached["commands"]
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    from importlib.metadata import entry_points
+    commands = {ep.name: ep.value for ep in entry_points(group=ENTRY_POINTS_GROUP)}
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"key": cache_key, "commands": commands}, f)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+    return commands
+
+
+_TARGET_PATTERN = re.compile(r'^[\w.]+:\w+$')
+def _is_target(value) -> bool:
+    return isinstance(value, str) and bool(_TARGET_PATTERN.match(value))
+
+
+def _import_target(target: str):
+    module_name, attr_name = target.split(":", 1)
+    return getattr(importlib.import_module(module_name), attr_name)
+
+
+def _instantiate(value):
+    if isinstance(value, list):
+        return [_instantiate(item) for item in value]
+    if _is_target(value):
+        return _import_target(value)()
+    return value
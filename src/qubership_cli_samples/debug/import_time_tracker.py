@@ -0,0 +1,111 @@
+import sys, time
+
+
+class ImportNode:
+
+    def __init__(self, name: str):
+        self.name = name
+        self.self_us = 0
+        self.cumulative_us = 0
+        self.children = []
+
+    def to_dict(self) -> dict:
+        return {
+            "module": self.name,
+            "self_ms": round(self.self_us / 1_000, 3),
+            "cumulative_ms": round(self.cumulative_us / 1_000, 3),
+            "children": [child.to_dict() for child in sorted(self.children, key=lambda c: -c.cumulative_us)],
+        }
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+class _TimedLoader:
+    """Wraps original loader to measure module execution, and gives original loader back to module right away"""
+
+    def __init__(self, loader, tracker: 'ImportTimeTracker'):
+        self._loader = loader
+        self._tracker = tracker
+
+    def __getattr__(self, item):
+        return getattr(self._loader, item)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        self._tracker._enter(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._tracker._exit()
+
+
+class ImportTimeTracker:
+    """
+    Collects `-X importtime`-style tree of modules imported while it's active, including their self and cumulative time.
+
+    Only modules that are not yet loaded are tracked - modules already present in `sys.modules` cost nothing to import.
+    """
+
+    def __init__(self):
+        self.roots = []
+        self._stack = []
+
+    def __enter__(self):
+        sys.meta_path.insert(0, self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    def _enter(self, name: str):
+        node = ImportNode(name)
+        (self._stack[-1][0].children if self._stack else self.roots).append(node)
+        self._stack.append((node, time.perf_counter()))
+
+    def _exit(self):
+        node, start = self._stack.pop()
+        node.cumulative_us = (time.perf_counter() - start) * 1_000_000
+        node.self_us = node.cumulative_us - sum(child.cumulative_us for child in node.children)
+
+    def all_nodes(self):
+        for root in self.roots:
+            yield from root.walk()
+
+    def package_totals_ms(self) -> dict[str, float]:
+        """Sum of self time of all tracked modules, grouped by top-level package, slowest first"""
+        totals = {}
+        for node in self.all_nodes():
+            package = node.name.split(".")[0]
+            totals[package] = totals.get(package, 0) + node.self_us / 1_000
+        return {package: round(total, 3) for package, total in sorted(totals.items(), key=lambda item: -item[1])}
+
+    def format_tree(self, roots: list[ImportNode] = None) -> str:
+        lines = ["import time: self [us] | cumulative | imported package"]
+
+        def _format(node: ImportNode, depth: int):
+            lines.append(f"import time: {node.self_us:>9.0f} | {node.cumulative_us:>10.0f} | {'  ' * depth}{node.name}")
+            for child in sorted(node.children, key=lambda c: -c.cumulative_us):
+                _format(child, depth + 1)
+
+        for root in sorted(roots if roots is not None else self.roots, key=lambda r: -r.cumulative_us):
+            _format(root, 0)
+        return "\n".join(lines)
@@ -1,13 +1,89 @@
 import time
-import random
 import urllib.request
+import errno
+import mmap
 import os
+import random
+import threading
 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
 from qubership_pipelines_common_library.v1.execution.exec_command import ExecutionCommand
 from qubership_pipelines_common_library.v1.utils.utils_string import UtilsString
 
+from qubership_cli_samples.stats_utils import PERCENTILES, percentile
+
+
+CPU_DUTY_CYCLE_PERIOD = 0.1
+CPU_ITERATIONS_BATCH = 2000
+RAM_PAGE_SIZE = 4096
+RAM_BANDWIDTH_BLOCK = 1024 * 1024
+RAM_BANDWIDTH_PASSES = 3
+DISK_RANDOM_BLOCK = 4096
+NETWORK_READ_BUFFER = 256 * 1024
+LOOPBACK_PAYLOAD_BLOCK = 1024 * 1024
+
+
+def cpu_load_worker(duration: float, load: float) -> dict:
+    """
+    Keeps one core busy for `load` share of each 100ms period (busy-looping, then sleeping until period ends), for `duration` seconds.
+    Periods follow each other on fixed schedule, so oversleeping in one period doesn't shift the following ones.
+    """
+    start_time = time.perf_counter()
+    start_cpu = time.process_time()
+    end_time = start_time + duration
+    iterations = 0
+    period_start = start_time
+    while period_start < end_time:
+        busy_end = min(period_start + CPU_DUTY_CYCLE_PERIOD * load, end_time)
+        while time.perf_counter() < busy_end:
+            for _ in range(CPU_ITERATIONS_BATCH):
+                iterations += 1
+                _ = (iterations * 3.14159) ** 0.5
+        period_start += CPU_DUTY_CYCLE_PERIOD
+        now = time.perf_counter()
+        if now < period_start:
+            time.sleep(max(0.0, min(period_start, end_time) - now))
+        else:
+            period_start = now  # period overran (e.g. process was descheduled), so missed load isn't caught up in a burst
+    elapsed = time.perf_counter() - start_time
+    return {"elapsed": elapsed, "cpu_time": time.process_time() - start_cpu, "iterations": iterations}
+
+
+def touch_pages(chunk: memoryview) -> int:
+    """Writes one random byte into each page of `chunk` (so OS backs lazily allocated memory with RAM), returns number of pages"""
+    pages = len(range(0, len(chunk), RAM_PAGE_SIZE))
+    chunk[::RAM_PAGE_SIZE] = os.urandom(pages)
+    return pages
+
+
+class LoopbackPayloadHandler(BaseHTTPRequestHandler):
+    """Serves `server.payload_size` bytes of generated payload on any GET, so network test doesn't depend on external hosts"""
+
+    protocol_version = "HTTP/1.1"
+    payload_block = None
+
+    def do_GET(self):
+        if LoopbackPayloadHandler.payload_block is None:
+            LoopbackPayloadHandler.payload_block = memoryview(os.urandom(LOOPBACK_PAYLOAD_BLOCK))
+        remaining = self.server.payload_size
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(remaining))
+        self.end_headers()
+        try:
+            while remaining > 0:
+                block = LoopbackPayloadHandler.payload_block[:min(remaining, LOOPBACK_PAYLOAD_BLOCK)]
+                self.wfile.write(block)
+                remaining -= len(block)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
 
 class SystemLoadTestCommand(ExecutionCommand):
     """Command to create system resource load for performance testing/debugging."""
@@ -20,16 +96,29 @@ class SystemLoadTestCommand(ExecutionCommand):
         self.run_cpu_test = UtilsString.convert_to_bool(self.context.input_param_get("params.cpu.run_test", False))
         self.cpu_duration = float(self.context.input_param_get("params.cpu.duration", 10))
         self.cpu_load = min(max(0.1, float(self.context.input_param_get("params.cpu.load", 0.8))), 1.0)
+        self.cpu_workers = max(1, int(self.context.input_param_get("params.cpu.workers", 1)))
 
         self.run_ram_test = UtilsString.convert_to_bool(self.context.input_param_get("params.ram.run_test", False))
         self.ram_size_mb = float(self.context.input_param_get("params.ram.size_mb", 100))
         self.ram_duration = float(self.context.input_param_get("params.ram.duration", 10))
         self.ram_chunks = int(self.context.input_param_get("params.ram.chunks", 1))
         self.ram_catch_memory_error = UtilsString.convert_to_bool(self.context.input_param_get("params.ram.catch_memory_error", True))
+        self.ram_bandwidth_mb = float(self.context.input_param_get("params.ram.bandwidth_mb", 256))
+
+        self.run_disk_test = UtilsString.convert_to_bool(self.context.input_param_get("params.disk.run_test", False))
+        self.disk_size_mb = max(1, int(self.context.input_param_get("params.disk.size_mb", 256)))
+        self.disk_block_size_kb = max(4, int(self.context.input_param_get("params.disk.block_size_kb", 1024))) // 4 * 4
+        self.disk_random_ops = max(1, int(self.context.input_param_get("params.disk.random_ops", 1000)))
+        self.disk_fsync_ops = max(1, int(self.context.input_param_get("params.disk.fsync_ops", 50)))
+        self.disk_direct = UtilsString.convert_to_bool(self.context.input_param_get("params.disk.direct", False))
 
         self.run_network_test = UtilsString.convert_to_bool(self.context.input_param_get("params.network.run_test", False))
         self.network_url = self.context.input_param_get("params.network.url", "http://speedtest.ftp.otenet.gr/files/test100Mb.db")
         self.network_download_times = int(self.context.input_param_get("params.network.download_times", 1))
+        self.network_streams = max(1, int(self.context.input_param_get("params.network.streams", 1)))
+        self.network_timeout = float(self.context.input_param_get("params.network.timeout", 60))
+        self.network_local_server = UtilsString.convert_to_bool(self.context.input_param_get("params.network.local_server", False))
+        self.network_local_size_mb = float(self.context.input_param_get("params.network.local_size_mb", 100))
 
         self.sleep_between_tests = float(self.context.input_param_get("params.sleep_between_tests", 1))
         return True
@@ -37,14 +126,14 @@ class SystemLoadTestCommand(ExecutionCommand):
     def _execute(self):
         self.context.logger.info("Running SystemLoadTestCommand")
 
-        if not self.run_cpu_test and not self.run_ram_test and not self.run_network_test:
+        if not self.run_cpu_test and not self.run_ram_test and not self.run_disk_test and not self.run_network_test:
             self.context.logger.info("No tests enabled")
             return
 
         self.results = {}
 
         if self.run_cpu_test:
-            self.context.logger.info(f"Starting CPU test: {self.cpu_duration}s, {self.cpu_load * 100:.0f}% target load")
+            self.context.logger.info(f"Starting CPU test: {self.cpu_duration}s, {self.cpu_load * 100:.0f}% target load on {self.cpu_workers} core(s)")
             cpu_result = self._cpu_load_test()
             self.results.update(cpu_result)
 
@@ -61,8 +150,19 @@ class SystemLoadTestCommand(ExecutionCommand):
                 self.context.logger.info(f"Sleeping {self.sleep_between_tests}s between tests")
                 time.sleep(self.sleep_between_tests)
 
+        if self.run_disk_test:
+            self.context.logger.info(f"Starting Disk test: {self.disk_size_mb}MB file, {self.disk_block_size_kb}KB blocks"
+                                     f"{', O_DIRECT' if self.disk_direct else ''}")
+            disk_result = self._disk_load_test()
+            self.results.update(disk_result)
+
+            if self.sleep_between_tests > 0:
+                self.context.logger.info(f"Sleeping {self.sleep_between_tests}s between tests")
+                time.sleep(self.sleep_between_tests)
+
         if self.run_network_test:
-            self.context.logger.info(f"Starting Network test: {self.network_download_times} download(s) of {self.network_url}")
+            self.context.logger.info(f"Starting Network test: {self.network_download_times} download(s) in each of {self.network_streams} stream(s) "
+                                     f"of {'local loopback server' if self.network_local_server else self.network_url}")
             network_result = self._network_load_test()
             self.results.update(network_result)
 
@@ -76,26 +176,25 @@ class SystemLoadTestCommand(ExecutionCommand):
         results = {}
         try:
             start_time = time.time()
-            end_time = start_time + self.cpu_duration
-            iteration = 0
-            while time.time() < end_time:
-                busy_end = time.time() + 0.01
-                while time.time() < busy_end:
-                    iteration += 1
-                    _ = (iteration * 3.14159) ** 0.5
-                if self.cpu_load < 1.0:
-                    elapsed = time.time() - start_time
-                    target_busy_time = elapsed * self.cpu_load
-                    actual_busy_time = elapsed - (elapsed * (1 - self.cpu_load))
-                    sleep_needed = max(0, (target_busy_time - actual_busy_time) / self.cpu_load)
-                    if sleep_needed > 0:
-                        time.sleep(min(sleep_needed, 0.05))
-
+            if self.cpu_workers == 1:
+                workers = [cpu_load_worker(self.cpu_duration, self.cpu_load)]
+            else:
+                with ProcessPoolExecutor(max_workers=self.cpu_workers) as pool:
+                    workers = list(pool.map(cpu_load_worker, [self.cpu_duration] * self.cpu_workers, [self.cpu_load] * self.cpu_workers))
             elapsed = time.time() - start_time
+
+            iterations = sum(worker["iterations"] for worker in workers)
+            per_worker = [{"load_percent": f"{worker['cpu_time'] / worker['elapsed'] * 100:.1f}",
+                           "iterations_per_sec": round(worker["iterations"] / worker["elapsed"])} for worker in workers]
             results["cpu.elapsed_seconds"] = f"{elapsed:.2f}"
-            results["cpu.iterations"] = iteration
+            results["cpu.iterations"] = iterations
+            results["cpu.iterations_per_sec"] = round(sum(worker["iterations"] / worker["elapsed"] for worker in workers))
             results["cpu.target_load_percent"] = f"{self.cpu_load * 100:.1f}"
-            self.context.logger.info(f"CPU test completed: {elapsed:.2f}s, {iteration} iterations")
+            results["cpu.achieved_load_percent"] = f"{sum(worker['cpu_time'] / worker['elapsed'] for worker in workers) / len(workers) * 100:.1f}"
+            results["cpu.workers"] = self.cpu_workers
+            results["cpu.per_worker"] = per_worker
+            self.context.logger.info(f"CPU test completed: {elapsed:.2f}s, {iterations} iterations, "
+                                     f"{results['cpu.achieved_load_percent']}% average load on {self.cpu_workers} core(s)")
         except Exception as e:
             self.context.logger.error(f"CPU test failed: {e}")
             results["cpu.error"] = str(e)
@@ -108,14 +207,29 @@ class SystemLoadTestCommand(ExecutionCommand):
             chunk_size = int((self.ram_size_mb * 1024 * 1024) / self.ram_chunks)
             self.context.logger.info(f"Allocating {self.ram_size_mb}MB RAM in {self.ram_chunks} chunk(s)")
 
+            # Anonymous mappings are allocated lazily by OS, so pages are actually backed by RAM only once they're touched -
+            # allocation time of chunk includes first touch of its pages
+            allocation_times, touch_time, pages_count = [], 0.0, 0
             for i in range(self.ram_chunks):
-                chunk = bytearray(chunk_size)
-                for j in range(0, len(chunk), 4096):
-                    chunk[j] = random.randint(0, 255)
+                start_time = time.perf_counter()
+                chunk = self._allocate_ram_chunk(chunk_size)
                 allocated_memory.append(chunk)
+                touch_start = time.perf_counter()
+                pages_count += touch_pages(chunk)
+                end_time = time.perf_counter()
+                touch_time += end_time - touch_start
+                allocation_times.append(end_time - start_time)
                 current_mb = (i + 1) * chunk_size / (1024 * 1024)
                 self.context.logger.debug(f"Allocated {current_mb:.1f}MB so far")
 
+            results["ram.allocation_ms"] = {
+                "avg": f"{sum(allocation_times) / len(allocation_times) * 1000:.3f}",
+                "max": f"{max(allocation_times) * 1000:.3f}",
+            }
+            results["ram.page_touch_rate"] = f"{pages_count / touch_time:.0f}" if touch_time else None
+            if allocated_memory:
+                results["ram.bandwidth_mb_s"] = self._ram_bandwidth_test(allocated_memory[0])
+
             start_time = time.time()
             time.sleep(self.ram_duration)
             elapsed = time.time() - start_time
@@ -123,7 +237,8 @@ class SystemLoadTestCommand(ExecutionCommand):
             results["ram.elapsed_seconds"] = f"{elapsed:.2f}"
             results["ram.requested_mb"] = f"{self.ram_size_mb:.1f}"
             results["ram.chunks"] = self.ram_chunks
-            self.context.logger.info(f"RAM test completed: {self.ram_size_mb}MB held for {elapsed:.2f}s")
+            self.context.logger.info(f"RAM test completed: {self.ram_size_mb}MB held for {elapsed:.2f}s, "
+                                     f"{results['ram.page_touch_rate']} pages/s touched, bandwidth (MB/s): {results.get('ram.bandwidth_mb_s')}")
 
         except MemoryError:
             self.context.logger.error(f"MemoryError: Could not allocate {self.ram_size_mb}MB")
@@ -134,54 +249,241 @@ class SystemLoadTestCommand(ExecutionCommand):
             self.context.logger.error(f"RAM test failed: {e}")
             results["ram.error"] = str(e)
         finally:
+            for chunk in allocated_memory:
+                mapping = chunk.obj
+                chunk.release()
+                mapping.close()
             allocated_memory.clear()
             import gc
             gc.collect()
 
         return results
 
-    def _network_load_test(self):
+    @staticmethod
+    def _allocate_ram_chunk(size: int) -> memoryview:
+        try:
+            return memoryview(mmap.mmap(-1, size))
+        except OSError as e:
+            if e.errno == errno.ENOMEM:
+                raise MemoryError(str(e)) from e
+            raise
+
+    def _ram_bandwidth_test(self, chunk: memoryview) -> dict:
+        """Best of several passes of sequential write, read and copy over (up to `ram.bandwidth_mb`) part of already touched chunk"""
+        size = min(len(chunk), int(self.ram_bandwidth_mb * 1024 * 1024)) // RAM_BANDWIDTH_BLOCK * RAM_BANDWIDTH_BLOCK
+        if size < 2 * RAM_BANDWIDTH_BLOCK:
+            return None
+        buffer, block = chunk[:size], b"\x55" * RAM_BANDWIDTH_BLOCK
+        half = size // 2
+        write_time = read_time = copy_time = float("inf")
+        for _ in range(RAM_BANDWIDTH_PASSES):
+            start_time = time.perf_counter()
+            for offset in range(0, size, RAM_BANDWIDTH_BLOCK):
+                buffer[offset:offset + RAM_BANDWIDTH_BLOCK] = block
+            write_time = min(write_time, time.perf_counter() - start_time)
+
+            # Searching for byte that isn't there scans whole buffer with memchr
+            start_time = time.perf_counter()
+            chunk.obj.find(b"\x00", 0, size)
+            read_time = min(read_time, time.perf_counter() - start_time)
+
+            start_time = time.perf_counter()
+            buffer[half:] = buffer[:half]
+            copy_time = min(copy_time, time.perf_counter() - start_time)
+        buffer.release()
+        return {
+            "size_mb": f"{size / 1024 / 1024:.1f}",
+            "write": f"{size / write_time / 1_000_000:.0f}",
+            "read": f"{size / read_time / 1_000_000:.0f}",
+            "copy": f"{half / copy_time / 1_000_000:.0f}",
+        }
+
+    def _disk_load_test(self):
+        """
+        Sequential write and read of whole file in large blocks, then random 4K reads and writes, then 4K writes each followed by fsync.
+        Unless O_DIRECT is used, file is evicted from page cache (where supported) before reading, so reads hit the disk.
+        """
         results = {}
-        download_times = []
-        files_to_cleanup = []
+        buffer, file = None, None
+        filepath = None
 
         try:
             output_dir = Path(self.context.input_param_get("paths.output.files", "."))
             output_dir.mkdir(parents=True, exist_ok=True)
-            total_bytes = 0
+            filepath = output_dir / f"disk_test_{int(time.time())}.tmp"
+            block_size = self.disk_block_size_kb * 1024
+            blocks = max(1, self.disk_size_mb * 1024 * 1024 // block_size)
+            file_size = blocks * block_size
+
+            # O_DIRECT needs buffers aligned to block size of device, anonymous mapping is always page-aligned
+            buffer = memoryview(mmap.mmap(-1, block_size))
+            buffer[:] = os.urandom(block_size)
+            file, direct = self._open_disk_test_file(filepath)
+            results["disk.direct"] = direct
+            results["disk.size_mb"] = f"{file_size / 1024 / 1024:.1f}"
+
+            start_time = time.perf_counter()
+            for _ in range(blocks):
+                file.write(buffer)
+            os.fsync(file.fileno())
+            results["disk.sequential_write_mb_s"] = f"{file_size / (time.perf_counter() - start_time) / 1_000_000:.1f}"
+
+            self._drop_disk_test_cache(file, direct)
+            file.seek(0)
+            start_time = time.perf_counter()
+            while file.readinto(buffer):
+                pass
+            results["disk.sequential_read_mb_s"] = f"{file_size / (time.perf_counter() - start_time) / 1_000_000:.1f}"
+
+            offsets = [random.randrange(file_size // DISK_RANDOM_BLOCK) * DISK_RANDOM_BLOCK for _ in range(self.disk_random_ops)]
+            self._drop_disk_test_cache(file, direct)
+            # Slice is released even on errors, otherwise mapping can't be closed
+            with buffer[:DISK_RANDOM_BLOCK] as small_buffer:
+                results["disk.random_read"] = self._disk_random_ops(file, offsets, lambda: file.readinto(small_buffer))
+                results["disk.random_write"] = self._disk_random_ops(file, offsets, lambda: file.write(small_buffer),
+                                                                     finish=lambda: os.fsync(file.fileno()))
+
+                fsync_latencies = []
+                for offset in offsets[:self.disk_fsync_ops]:
+                    file.seek(offset)
+                    file.write(small_buffer)
+                    start_time = time.perf_counter()
+                    os.fsync(file.fileno())
+                    fsync_latencies.append(time.perf_counter() - start_time)
+            results["disk.fsync_latency_ms"] = self._latency_percentiles(fsync_latencies)
+
+            self.context.logger.info(f"Disk test completed: write {results['disk.sequential_write_mb_s']} MB/s, "
+                                     f"read {results['disk.sequential_read_mb_s']} MB/s, "
+                                     f"random read {results['disk.random_read']['iops']} IOPS, "
+                                     f"random write {results['disk.random_write']['iops']} IOPS, "
+                                     f"fsync p50 {results['disk.fsync_latency_ms']['p50']}ms")
 
-            for i in range(self.network_download_times):
-                filename = f"download_{i}_{int(time.time())}.tmp"
-                filepath = output_dir / filename
-                files_to_cleanup.append(filepath)
+        except Exception as e:
+            results["disk.error"] = str(e)
+            self.context.logger.error(f"Disk test failed: {e}")
 
-                self.context.logger.info(f"Downloading {self.network_url} to {filename}")
+        finally:
+            # Each step is guarded separately, so temp file is deleted even if closing something else fails
+            try:
+                if file:
+                    file.close()
+            except Exception as e:
+                self.context.logger.warning(f"Failed to close disk test file: {e}")
+            try:
+                if filepath and filepath.exists():
+                    filepath.unlink()
+                    self.context.logger.debug(f"Deleted {filepath.name}")
+            except Exception as e:
+                self.context.logger.warning(f"Failed to delete {filepath.name}: {e}")
+            try:
+                if buffer:
+                    mapping = buffer.obj
+                    buffer.release()
+                    mapping.close()
+            except Exception as e:
+                self.context.logger.warning(f"Failed to release disk test buffer: {e}")
+
+        return results
 
-                start_time = time.time()
-                urllib.request.urlretrieve(self.network_url, filepath)
-                elapsed = time.time() - start_time
+    def _open_disk_test_file(self, filepath: Path):
+        flags = os.O_RDWR | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+        if self.disk_direct:
+            if not hasattr(os, "O_DIRECT"):
+                self.context.logger.warning("O_DIRECT is not supported on this platform, using buffered I/O")
+            else:
+                try:
+                    return open(os.open(filepath, flags | os.O_DIRECT), 'r+b', buffering=0), True
+                except OSError as e:
+                    self.context.logger.warning(f"Can't open {filepath.name} with O_DIRECT ({e}), using buffered I/O")
+        return open(os.open(filepath, flags), 'r+b', buffering=0), False
+
+    @staticmethod
+    def _drop_disk_test_cache(file, direct: bool):
+        if not direct and hasattr(os, "posix_fadvise"):
+            os.fsync(file.fileno())
+            os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+    def _disk_random_ops(self, file, offsets: list, operation, finish=None) -> dict:
+        latencies = []
+        start_time = time.perf_counter()
+        for offset in offsets:
+            op_start = time.perf_counter()
+            file.seek(offset)
+            operation()
+            latencies.append(time.perf_counter() - op_start)
+        if finish:
+            finish()
+        return {"iops": round(len(offsets) / (time.perf_counter() - start_time)), "latency_ms": self._latency_percentiles(latencies)}
+
+    @staticmethod
+    def _latency_percentiles(latencies: list) -> dict:
+        latencies = sorted(latencies)
+        return {**{f"p{pct}": f"{percentile(latencies, pct) * 1000:.3f}" for pct in PERCENTILES}, "max": f"{latencies[-1] * 1000:.3f}"}
 
-                file_size = os.path.getsize(filepath)
-                total_bytes += file_size
-                download_times.append(elapsed)
+    def _network_load_test(self):
+        """
+        Downloads `url` (or payload of local loopback server) `download_times` times in each of `streams` concurrent streams.
+        Response bodies are drained into reusable buffer and dropped, so results aren't affected by disk speed.
+        """
+        results = {}
+        server = None
 
-            if download_times:
-                results["network.downloads"] = len(download_times)
+        try:
+            url = self.network_url
+            if self.network_local_server:
+                server = ThreadingHTTPServer(("127.0.0.1", 0), LoopbackPayloadHandler)
+                server.daemon_threads = True
+                server.payload_size = int(self.network_local_size_mb * 1024 * 1024)
+                threading.Thread(target=server.serve_forever, daemon=True).start()
+                url = f"http://127.0.0.1:{server.server_address[1]}/payload.bin"
+                self.context.logger.info(f"Started local loopback server at {url}")
+
+            start_time = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=self.network_streams) as executor:
+                streams = list(executor.map(self._network_stream, [url] * self.network_streams))
+            elapsed = time.perf_counter() - start_time
+
+            downloads = [download for stream in streams for download in stream]
+            if downloads:
+                total_bytes = sum(download["bytes"] for download in downloads)
+                download_times = [download["elapsed"] for download in downloads]
+                results["network.local_server"] = self.network_local_server
+                results["network.streams"] = self.network_streams
+                results["network.downloads"] = len(downloads)
                 results["network.total_mb"] = f"{total_bytes / 1024 / 1024:.2f}"
+                results["network.elapsed_seconds"] = f"{elapsed:.2f}"
                 results["network.avg_time"] = f"{sum(download_times) / len(download_times):.2f}"
                 results["network.avg_speed_mbps"] = f"{(total_bytes * 8) / (sum(download_times) * 1_000_000):.2f}"
+                results["network.aggregate_speed_mbps"] = f"{(total_bytes * 8) / (elapsed * 1_000_000):.2f}"
+                results["network.per_stream"] = [{
+                    "total_mb": f"{sum(download['bytes'] for download in stream) / 1024 / 1024:.2f}",
+                    "speed_mbps": f"{sum(download['bytes'] for download in stream) * 8 / (sum(download['elapsed'] for download in stream) * 1_000_000):.2f}",
+                } for stream in streams]
+                results["network.ttfb_ms"] = self._latency_percentiles([download["ttfb"] for download in downloads])
+                self.context.logger.info(f"Network test completed: {results['network.total_mb']}MB in {elapsed:.2f}s, "
+                                         f"{results['network.aggregate_speed_mbps']} Mbps aggregate, TTFB p50 {results['network.ttfb_ms']['p50']}ms")
 
         except Exception as e:
             results["network.error"] = str(e)
             self.context.logger.error(f"Network test failed: {e}")
 
         finally:
-            for filepath in files_to_cleanup:
-                try:
-                    if filepath.exists():
-                        filepath.unlink()
-                        self.context.logger.debug(f"Deleted {filepath.name}")
-                except Exception:
-                    pass
+            if server:
+                server.shutdown()
+                server.server_close()
 
         return results
+
+    def _network_stream(self, url: str) -> list[dict]:
+        downloads = []
+        buffer = memoryview(bytearray(NETWORK_READ_BUFFER))
+        for _ in range(self.network_download_times):
+            start_time = time.perf_counter()
+            total_bytes = 0
+            with urllib.request.urlopen(url, timeout=self.network_timeout) as response:
+                # urlopen returns once status line and headers are received, while buffered reads wait for the whole buffer
+                ttfb = time.perf_counter() - start_time
+                while read_bytes := response.readinto(buffer):
+                    total_bytes += read_bytes
+            downloads.append({"bytes": total_bytes, "elapsed": time.perf_counter() - start_time, "ttfb": ttfb})
+        return downloads
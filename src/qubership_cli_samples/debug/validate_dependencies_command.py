@@ -1,70 +1,144 @@
-import time, traceback
+import importlib, json, time, traceback
+from pathlib import Path
 from qubership_pipelines_common_library.v1.execution.exec_command import ExecutionCommand
 
+EXECUTION_COMMANDS_IMPORTS = [
+    "qubership_cli_samples.file_processing.file_commands:DownloadFileExecutionCommand",
+    "qubership_cli_samples.file_processing.file_commands:AnalyzeFileExecutionCommand",
+    "qubership_cli_samples.umbrella_test.umbrella_command:UmbrellaCommand",
+    "qubership_cli_samples.file_processing.file_commands:GenerateContextFromEnv",
+    "qubership_cli_samples.report.report_command:BuildReport",
+    "qubership_cli_samples.report.report_command:AggregateReports",
+    "qubership_cli_samples.minio_commands:ListMinioBucketObjectsCommand",
+    "qubership_cli_samples.debug.debug_command:DebugCommand",
+    "qubership_cli_samples.debug.system_load_commands:SystemLoadTestCommand",
+    "qubership_cli_samples.sample_command:GenerateTestModuleReportCommand",
+    "qubership_cli_samples.sample_command:GenerateTestOutputFilesCommand",
+    "qubership_cli_samples.sample_command:GenerateTestOutputParamsCommand",
+    "qubership_cli_samples.sample_command:CalcCommand",
+    "qubership_cli_samples.sample_command:SampleStandaloneExecutionCommand",
+    "qubership_cli_samples.batch.batch_command:RunBatchCommand",
+
+    "qubership_pipelines_common_library.v2.github.github_run_pipeline_command:GithubRunPipeline",
+    "qubership_pipelines_common_library.v2.gitlab.gitlab_run_pipeline_command:GitlabRunPipeline",
+    "qubership_pipelines_common_library.v2.gitlab.custom_extensions:GitlabModulesOpsPipelineDataImporter",
+    "qubership_pipelines_common_library.v2.gitlab.custom_extensions:GitlabDOBPParamsPreExt",
+    "qubership_pipelines_common_library.v2.jenkins.jenkins_run_pipeline_command:JenkinsRunPipeline",
+    "qubership_pipelines_common_library.v2.podman.podman_command:PodmanRunImage",
+    "qubership_cli_samples.podman.podman_command:PodmanRunImage",
+    "qubership_cli_samples.podman.podman_command:PodmanPoolCleanup",
+    "qubership_pipelines_common_library.v2.pipelines.download_artifact_command:DownloadArtifact",
+    "qubership_pipelines_common_library.v2.notifications.send_webex_message_command:SendWebexMessage",
+]
+
+CLIENTS_IMPORTS = [
+    "qubership_pipelines_common_library.v1.artifactory_client:ArtifactoryClient",
+    "qubership_pipelines_common_library.v1.git_client:GitClient",
+    "qubership_pipelines_common_library.v1.github_client:GithubClient",
+    "qubership_pipelines_common_library.v1.gitlab_client:GitlabClient",
+    "qubership_pipelines_common_library.v1.jenkins_client:JenkinsClient",
+    "qubership_pipelines_common_library.v1.kube_client:KubeClient",
+    "qubership_pipelines_common_library.v1.log_client:LogClient",
+    "qubership_pipelines_common_library.v1.maven_client:MavenArtifactSearcher",
+    "qubership_pipelines_common_library.v1.minio_client:MinioClient",
+    "qubership_pipelines_common_library.v1.webex_client:WebexClient",
+
+    "qubership_pipelines_common_library.v2.artifacts_finder.auth.aws_credentials:AwsCredentialsProvider",
+    "qubership_pipelines_common_library.v2.artifacts_finder.auth.azure_credentials:AzureCredentialsProvider",
+    "qubership_pipelines_common_library.v2.artifacts_finder.auth.gcp_credentials:GcpCredentialsProvider",
+    "qubership_pipelines_common_library.v2.artifacts_finder.providers.aws_code_artifact:AwsCodeArtifactProvider",
+    "qubership_pipelines_common_library.v2.artifacts_finder.providers.gcp_artifact_registry:GcpArtifactRegistryProvider",
+    "qubership_pipelines_common_library.v2.secret_manager.providers.gcp_secret_manager:GcpSecretManagerProvider",
+    "qubership_pipelines_common_library.v2.secret_manager.providers.hashicorp_vault:HashicorpVaultProvider",
+]
+
 
 class ValidateDependenciesCommand(ExecutionCommand):
-    """Command to validate integrity of common-lib dependencies (especially binary ones)"""
+    """
+    Command to validate integrity of common-lib dependencies (especially binary ones)
+
+    Also measures import time of every validated import, and reports `-X importtime`-style tree of modules they loaded.
+
+    Input Parameters (all optional):
+    - params.import_threshold_ms: Imports and top-level packages slower than this are flagged, default is 100
+    - params.import_report_top: How many slowest imports to put into output params, default is 10
+
+    Output Parameters:
+    - params.import_report.total_ms: Total time of all validated imports
+    - params.import_report.slowest: Slowest validated imports with their cumulative time
+    - params.import_report.packages: Self time of all loaded modules, grouped by top-level package (e.g. botocore, kubernetes, google)
+    - params.import_report.flagged: Imports and packages slower than threshold
+    - params.import_report.files: Names of full report files ("import_time_report.txt" tree and "import_time_report.json")
+    """
+
+    REPORT_FILE_NAME = "import_time_report"
 
     def _validate(self):
+        self.import_threshold_ms = float(self.context.input_param_get("params.import_threshold_ms", 100))
+        self.import_report_top = int(self.context.input_param_get("params.import_report_top", 10))
         return True
 
     def _execute(self):
         self.context.logger.info("Running ValidateDependenciesCommand")
+        from qubership_cli_samples.debug.import_time_tracker import ImportTimeTracker
+        self.tracker = ImportTimeTracker()
+        self.import_times = {}
         try:
-            self.context.logger.info("-- Validating existing execution commands...")
-            self._validate_execution_commands()
-            self.context.logger.info("-- Validating existing clients...")
-            self._validate_clients()
+            with self.tracker:
+                self.context.logger.info("-- Validating existing execution commands...")
+                self._validate_execution_commands()
+                self.context.logger.info("-- Validating existing clients...")
+                self._validate_clients()
         except Exception as e:
             self.context.logger.error(f"Error validating dependencies: [{type(e)} - {str(e)}]")
             self.context.logger.error("Full traceback: %s", traceback.format_exc())
             self._exit(False, f"Exception: {str(e)}")
 
+        self._save_import_report()
         self.context.logger.info("Finished ValidateDependenciesCommand")
 
     def _validate_execution_commands(self):
         start_cmd = time.perf_counter()
-        from qubership_cli_samples.file_processing.file_commands import DownloadFileExecutionCommand
-        from qubership_cli_samples.file_processing.file_commands import AnalyzeFileExecutionCommand
-        from qubership_cli_samples.umbrella_test.umbrella_command import UmbrellaCommand
-        from qubership_cli_samples.file_processing.file_commands import GenerateContextFromEnv
-        from qubership_cli_samples.report.report_command import BuildReport
-        from qubership_cli_samples.minio_commands import ListMinioBucketObjectsCommand
-        from qubership_cli_samples.debug.debug_command import DebugCommand
-        from qubership_cli_samples.debug.system_load_commands import SystemLoadTestCommand
-        from qubership_cli_samples.sample_command import GenerateTestModuleReportCommand
-        from qubership_cli_samples.sample_command import GenerateTestOutputFilesCommand
-        from qubership_cli_samples.sample_command import GenerateTestOutputParamsCommand
-        from qubership_cli_samples.sample_command import CalcCommand
-        from qubership_cli_samples.sample_command import SampleStandaloneExecutionCommand
-
-        from qubership_pipelines_common_library.v2.github.github_run_pipeline_command import GithubRunPipeline
-        from qubership_pipelines_common_library.v2.gitlab.gitlab_run_pipeline_command import GitlabRunPipeline
-        from qubership_pipelines_common_library.v2.gitlab.custom_extensions import GitlabModulesOpsPipelineDataImporter, GitlabDOBPParamsPreExt
-        from qubership_pipelines_common_library.v2.jenkins.jenkins_run_pipeline_command import JenkinsRunPipeline
-        from qubership_pipelines_common_library.v2.podman.podman_command import PodmanRunImage
-        from qubership_pipelines_common_library.v2.pipelines.download_artifact_command import DownloadArtifact
-        from qubership_pipelines_common_library.v2.notifications.send_webex_message_command import SendWebexMessage
+        self._timed_imports(EXECUTION_COMMANDS_IMPORTS)
         self.context.logger.info(f"ExecutionCommands import time: {(time.perf_counter() - start_cmd) * 1_000} ms")
 
     def _validate_clients(self):
         start_cmd = time.perf_counter()
-        from qubership_pipelines_common_library.v1.artifactory_client import ArtifactoryClient
-        from qubership_pipelines_common_library.v1.git_client import GitClient
-        from qubership_pipelines_common_library.v1.github_client import GithubClient
-        from qubership_pipelines_common_library.v1.gitlab_client import GitlabClient
-        from qubership_pipelines_common_library.v1.jenkins_client import JenkinsClient
-        from qubership_pipelines_common_library.v1.kube_client import KubeClient
-        from qubership_pipelines_common_library.v1.log_client import LogClient
-        from qubership_pipelines_common_library.v1.maven_client import MavenArtifactSearcher
-        from qubership_pipelines_common_library.v1.minio_client import MinioClient
-        from qubership_pipelines_common_library.v1.webex_client import WebexClient
-
-        from qubership_pipelines_common_library.v2.artifacts_finder.auth.aws_credentials import AwsCredentialsProvider
-        from qubership_pipelines_common_library.v2.artifacts_finder.auth.azure_credentials import AzureCredentialsProvider
-        from qubership_pipelines_common_library.v2.artifacts_finder.auth.gcp_credentials import GcpCredentialsProvider
-        from qubership_pipelines_common_library.v2.artifacts_finder.providers.aws_code_artifact import AwsCodeArtifactProvider
-        from qubership_pipelines_common_library.v2.artifacts_finder.providers.gcp_artifact_registry import GcpArtifactRegistryProvider
-        from qubership_pipelines_common_library.v2.secret_manager.providers.gcp_secret_manager import GcpSecretManagerProvider
-        from qubership_pipelines_common_library.v2.secret_manager.providers.hashicorp_vault import HashicorpVaultProvider
+        self._timed_imports(CLIENTS_IMPORTS)
         self.context.logger.info(f"Clients import time: {(time.perf_counter() - start_cmd) * 1_000} ms")
+
+    def _timed_imports(self, targets: list[str]):
+        for target in targets:
+            module_name, attr_name = target.split(":")
+            start = time.perf_counter()
+            getattr(importlib.import_module(module_name), attr_name)
+            self.import_times[target] = (time.perf_counter() - start) * 1_000
+            self.context.logger.debug(f"Imported {target} in {self.import_times[target]:0.3f} ms")
+
+    def _save_import_report(self):
+        slowest = sorted(self.import_times.items(), key=lambda item: -item[1])
+        packages = self.tracker.package_totals_ms()
+        flagged = [f"import {target}: {ms:0.1f} ms" for target, ms in slowest if ms > self.import_threshold_ms]
+        flagged.extend(f"package {package}: {ms:0.1f} ms" for package, ms in packages.items() if ms > self.import_threshold_ms)
+        for message in flagged:
+            self.context.logger.warning(f"Slow {message} (threshold is {self.import_threshold_ms} ms)")
+
+        report_dir = Path(self.context.input_param_get("paths.output.files") or self.context.path_logs)
+        report_dir.mkdir(parents=True, exist_ok=True)
+        (report_dir / f"{self.REPORT_FILE_NAME}.txt").write_text(self.tracker.format_tree(), encoding='utf-8')
+        with open(report_dir / f"{self.REPORT_FILE_NAME}.json", 'w', encoding='utf-8') as fs:
+            json.dump({
+                "threshold_ms": self.import_threshold_ms,
+                "imports_ms": {target: round(ms, 3) for target, ms in slowest},
+                "packages_ms": packages,
+                "flagged": flagged,
+                "tree": [root.to_dict() for root in sorted(self.tracker.roots, key=lambda r: -r.cumulative_us)],
+            }, fs, indent=2)
+
+        self.context.output_param_set("params.import_report.total_ms", round(sum(self.import_times.values()), 3))
+        self.context.output_param_set("params.import_report.slowest",
+                                      [{"import": target, "cumulative_ms": round(ms, 3)} for target, ms in slowest[:self.import_report_top]])
+        self.context.output_param_set("params.import_report.packages", packages)
+        self.context.output_param_set("params.import_report.flagged", flagged)
+        self.context.output_param_set("params.import_report.files", [f"{self.REPORT_FILE_NAME}.txt", f"{self.REPORT_FILE_NAME}.json"])
+        self.context.output_params_save()
@@ -0,0 +1,134 @@
+import hashlib, json, logging, os, shutil, stat, uuid
+from pathlib import Path
+
+# Linux ioctl to share file extents (copy-on-write clone) on btrfs/xfs/etc.
+FICLONE = 0x40049409
+
+
+class DownloadCache:
+    """
+    On-disk content-addressed cache of downloaded files.
+
+    Files are stored once per content SHA-256 under "blobs/", and looked up either directly by expected SHA-256,
+    or by key built from URL and its ETag/Last-Modified (stored under "keys/", pointing to blob).
+    Files are put into output folder using reflink (copy-on-write clone), hardlink or plain copy - whichever works first.
+    Blobs are read-only (so that hardlinked outputs can't silently corrupt cache), and their mtime is used for LRU eviction
+    once total size exceeds `max_size`.
+    """
+
+    def __init__(self, cache_dir, max_size: int, link_mode: str = "auto", logger: logging.Logger = None):
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+        self.link_mode = link_mode
+        self.logger = logger or logging.getLogger(__name__)
+        self.blobs_dir = self.cache_dir.joinpath("blobs")
+        self.keys_dir = self.cache_dir.joinpath("keys")
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        self.keys_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(url: str, etag: str = None, last_modified: str = None, sha256: str = None):
+        """Returns cache key, or None if response can't be validated (no checksum, ETag or Last-Modified)"""
+        if sha256:
+            return f"sha256:{sha256.lower()}"
+        if etag or last_modified:
+            return f"url:{url}\netag:{etag or ''}\nlast-modified:{last_modified or ''}"
+        return None
+
+    def get(self, key: str, target_path) -> int:
+        """Puts cached file into `target_path`, returns its size - or None on cache miss"""
+        sha256 = self._resolve(key)
+        if not sha256 or not (blob := self._blob_path(sha256)).is_file():
+            return None
+        self._materialize(blob, Path(target_path))
+        try:
+            os.utime(blob)
+        except OSError:
+            pass
+        return blob.stat().st_size
+
+    def put(self, key: str, source_path, sha256: str):
+        """Stores `source_path` with known content `sha256` under `key`, and evicts least recently used files"""
+        blob = self._blob_path(sha256)
+        if blob.is_file():
+            os.utime(blob)
+        else:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = blob.parent.joinpath(f".tmp-{uuid.uuid4().hex}")
+            try:
+                self._materialize(Path(source_path), temp_path)
+                os.chmod(temp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+                os.replace(temp_path, blob)
+            finally:
+                temp_path.unlink(missing_ok=True)
+        if not key.startswith("sha256:"):
+            key_path = self._key_path(key)
+            key_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = key_path.parent.joinpath(f".tmp-{uuid.uuid4().hex}")
+            temp_path.write_text(json.dumps({"key": key, "sha256": sha256}), encoding='utf-8')
+            os.replace(temp_path, key_path)
+        self.evict()
+
+    def evict(self):
+        blobs = []
+        for path in self.blobs_dir.glob("*/*"):
+            if path.name.startswith(".tmp-"):
+                continue
+            try:
+                blobs.append((path.stat(), path))
+            except OSError:
+                continue
+        total = sum(st.st_size for st, _ in blobs)
+        for st, path in sorted(blobs, key=lambda item: item[0].st_mtime):
+            if total <= self.max_size:
+                break
+            self.logger.debug(f"Evicting {path.name} ({st.st_size} bytes) from download cache")
+            path.unlink(missing_ok=True)
+            total -= st.st_size
+
+    def _resolve(self, key: str):
+        if key.startswith("sha256:"):
+            return key[len("sha256:"):]
+        try:
+            entry = json.loads(self._key_path(key).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        return entry.get("sha256") if entry.get("key") == key else None
+
+    def _blob_path(self, sha256: str) -> Path:
+        return self.blobs_dir.joinpath(sha256[:2], sha256)
+
+    def _key_path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return self.keys_dir.joinpath(digest[:2], f"{digest}.json")
+
+    def _materialize(self, source: Path, target: Path):
+        target.unlink(missing_ok=True)
+        if self.link_mode in ("auto", "reflink") and DownloadCache._reflink(source, target):
+            return
+        if self.link_mode in ("auto", "hardlink"):
+            try:
+                os.link(source, target)
+                return
+            except OSError:
+                pass
+        shutil.copyfile(source, target)
+
+    @staticmethod
+    def _reflink(source: Path, target: Path) -> bool:
+        try:
+            import fcntl
+        except ImportError:
+            return False
+        try:
+            with open(source, 'rb') as src, open(target, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return True
+        except OSError:
+            target.unlink(missing_ok=True)
+            return False
+
+
+def file_sha256(path) -> str:
+    with open(path, 'rb') as fs:
+        return hashlib.file_digest(fs, "sha256").hexdigest()
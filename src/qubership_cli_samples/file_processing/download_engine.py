@@ -0,0 +1,239 @@
+import json, logging, os, threading, time, urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+import urllib3
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_PARALLEL_RANGES = 4
+DEFAULT_PARALLEL_THRESHOLD = 64 * 1024 * 1024
+
+
+class DownloadException(Exception):
+    pass
+
+
+class DownloadEngine:
+    """
+    Streams HTTP(S) downloads to disk using pooled keep-alive connections.
+
+    One engine can be shared by several threads downloading different files - they reuse the same connection pools
+    (up to `max_connections_per_host` kept-alive connections per host).
+
+    - Response body is read and written by `chunk_size` blocks, and never held in memory as a whole
+    - Files larger than `parallel_threshold` are split into `parallel_ranges` HTTP Range requests, if server accepts ranges
+    - Data is written into "<target>.part" file, and its progress into "<target>.part.json" state file -
+      next download of the same URL (with unchanged size and ETag) continues from where previous one stopped
+    - Dropped connections (and responses ending without data) are retried up to `retries` times, continuing from the last received byte
+    """
+
+    PART_SUFFIX = ".part"
+    STATE_SUFFIX = ".part.json"
+    STATE_SAVE_INTERVAL = 8 * 1024 * 1024
+    RETRY_BACKOFF = 0.5
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE, parallel_ranges: int = DEFAULT_PARALLEL_RANGES,
+                 parallel_threshold: int = DEFAULT_PARALLEL_THRESHOLD, retries: int = 3, timeout: float = 60,
+                 max_connections_per_host: int = None, pool_manager: urllib3.PoolManager = None, logger: logging.Logger = None):
+        self.chunk_size = max(1, chunk_size)
+        self.parallel_ranges = max(1, parallel_ranges)
+        self.parallel_threshold = parallel_threshold
+        self.retries = retries
+        self.timeout = timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self.max_connections_per_host = max_connections_per_host or self.parallel_ranges
+        self._pool_manager = pool_manager
+        self._pool_managers = {}
+        self._pools_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+
+    @staticmethod
+    def create_pool_manager(maxsize: int, timeout: float, url: str = None) -> urllib3.PoolManager:
+        """Pool of keep-alive connections per host, honoring standard proxy environment variables"""
+        kwargs = {"maxsize": maxsize, "timeout": urllib3.Timeout(connect=timeout, read=timeout), "retries": False}
+        if url and (proxy := DownloadEngine._get_proxy(url)):
+            return urllib3.ProxyManager(proxy, **kwargs)
+        return urllib3.PoolManager(**kwargs)
+
+    def _http(self, url: str) -> urllib3.PoolManager:
+        if self._pool_manager is not None:
+            return self._pool_manager
+        proxy = DownloadEngine._get_proxy(url)
+        with self._pools_lock:
+            if proxy not in self._pool_managers:
+                self._pool_managers[proxy] = DownloadEngine.create_pool_manager(self.max_connections_per_host, self.timeout, url)
+            return self._pool_managers[proxy]
+
+    @staticmethod
+    def _get_proxy(url: str):
+        parsed = urlparse(url)
+        if parsed.hostname and urllib.request.proxy_bypass(parsed.hostname):
+            return None
+        return urllib.request.getproxies().get(parsed.scheme)
+
+    def download(self, url: str, target_path, info: dict = None) -> dict:
+        """
+        Downloads `url` into `target_path` (`info` can be passed from previous `probe` call), returns dict with download stats:
+        `size`, `downloaded` (bytes received in this run), `resumed_from`, `elapsed` (seconds), `mode` and `chunks` timings
+        """
+        target_path = Path(target_path)
+        part_path = Path(f"{target_path}{DownloadEngine.PART_SUFFIX}")
+        state_path = Path(f"{target_path}{DownloadEngine.STATE_SUFFIX}")
+        start = time.perf_counter()
+        info = info or self.probe(url)
+        state = self._load_state(state_path, part_path, info)
+        if state:
+            resumed_from = sum(rng["done"] for rng in state["ranges"])
+            self.logger.info(f"Resuming download of {info['url']} from {resumed_from} bytes")
+        else:
+            state = self._new_state(info)
+            resumed_from = 0
+            with open(part_path, 'wb') as fs:
+                if info["size"]:
+                    fs.truncate(info["size"])
+
+        completed = False
+        try:
+            if len(state["ranges"]) > 1:
+                with ThreadPoolExecutor(max_workers=len(state["ranges"]), thread_name_prefix="download_range") as pool:
+                    list(pool.map(lambda rng: self._fetch_range(info, part_path, state, state_path, rng), state["ranges"]))
+            else:
+                self._fetch_range(info, part_path, state, state_path, state["ranges"][0])
+            completed = True
+        finally:
+            if not completed:
+                self._save_state(state_path, state)
+
+        size = os.path.getsize(part_path)
+        if info["size"] is not None and size != info["size"]:
+            self._save_state(state_path, state)
+            raise DownloadException(f"Downloaded size {size} doesn't match expected {info['size']} for {url}")
+        os.replace(part_path, target_path)
+        state_path.unlink(missing_ok=True)
+        return {
+            "url": info["url"],
+            "size": size,
+            "downloaded": size - resumed_from,
+            "resumed_from": resumed_from,
+            "elapsed": time.perf_counter() - start,
+            "mode": "parallel" if len(state["ranges"]) > 1 else "single",
+            "etag": info["etag"],
+            "last_modified": info["last_modified"],
+            "chunks": [{key: rng[key] for key in ("start", "end", "bytes", "time", "attempts", "slowest_chunk")}
+                       for rng in state["ranges"]],
+        }
+
+    def probe(self, url: str) -> dict:
+        """HEAD request to find out final URL, size and range support. Servers that reject HEAD are downloaded in one stream"""
+        info = {"url": url, "size": None, "accept_ranges": False, "etag": None, "last_modified": None}
+        try:
+            response = self._http(url).request("HEAD", url, headers={"Accept-Encoding": "identity"},
+                                         redirect=True, retries=urllib3.Retry(total=self.retries, redirect=10))
+        except urllib3.exceptions.HTTPError as e:
+            self.logger.debug(f"HEAD request to {url} failed: {e}")
+            return info
+        if response.status >= 400:
+            self.logger.debug(f"HEAD request to {url} returned {response.status}")
+            return info
+        info["url"] = urljoin(url, response.geturl() or url)
+        if (length := response.headers.get("Content-Length", "")).isdigit() and not response.headers.get("Content-Encoding"):
+            info["size"] = int(length)
+        info["accept_ranges"] = response.headers.get("Accept-Ranges", "").lower() == "bytes"
+        info["etag"] = response.headers.get("ETag")
+        info["last_modified"] = response.headers.get("Last-Modified")
+        return info
+
+    def _new_state(self, info: dict) -> dict:
+        size = info["size"]
+        ranges_count = 1
+        if info["accept_ranges"] and size and size >= self.parallel_threshold:
+            ranges_count = min(self.parallel_ranges, max(1, size // self.chunk_size))
+        if not size:
+            bounds = [(0, None)]
+        else:
+            step = -(-size // ranges_count)
+            bounds = [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+        return {
+            "url": info["url"], "size": size, "etag": info["etag"], "last_modified": info["last_modified"],
+            "ranges": [{"start": start, "end": end, "done": 0, "bytes": 0, "time": 0.0, "attempts": 0, "slowest_chunk": 0.0}
+                       for start, end in bounds],
+        }
+
+    def _load_state(self, state_path: Path, part_path: Path, info: dict):
+        if not (info["accept_ranges"] and state_path.is_file() and part_path.is_file()):
+            return None
+        try:
+            state = json.loads(state_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if any(state.get(key) != info[key] for key in ("url", "size", "etag", "last_modified")):
+            self.logger.info("Remote file has changed since previous attempt, starting download from scratch")
+            return None
+        for rng in state["ranges"]:
+            rng.update({"bytes": 0, "time": 0.0, "attempts": 0, "slowest_chunk": 0.0})
+        return state
+
+    def _save_state(self, state_path: Path, state: dict):
+        if not state.get("size"):
+            return
+        with self._state_lock:
+            try:
+                state_path.write_text(json.dumps(state), encoding='utf-8')
+            except OSError as e:
+                self.logger.warning(f"Failed to save download state to {state_path}: {e}")
+
+    def _fetch_range(self, info: dict, part_path: Path, state: dict, state_path: Path, rng: dict):
+        start = time.perf_counter()
+        unsaved = 0
+        with open(part_path, 'r+b') as fs:
+            while True:
+                offset = rng["start"] + rng["done"]
+                if rng["end"] is not None and offset > rng["end"]:
+                    break
+                headers = {"Accept-Encoding": "identity"}
+                if offset > 0 or (rng["end"] is not None and rng["end"] + 1 != info["size"]):
+                    headers["Range"] = f"bytes={offset}-{'' if rng['end'] is None else rng['end']}"
+                rng["attempts"] += 1
+                done_before = rng["done"]
+                try:
+                    # Pools don't retry by themselves, so redirects have to be allowed explicitly (e.g. if HEAD was rejected)
+                    response = self._http(info["url"]).request("GET", info["url"], headers=headers, preload_content=False,
+                                                 decode_content=False, redirect=True,
+                                                 retries=urllib3.Retry(total=None, connect=0, read=0, status=0, other=0, redirect=10))
+                    try:
+                        if not 200 <= response.status < 300:
+                            raise DownloadException(f"Download of {info['url']} failed with HTTP status {response.status}")
+                        if "Range" in headers and response.status != 206:
+                            raise DownloadException(f"Server ignored Range request for {info['url']} (HTTP status {response.status})")
+                        fs.seek(offset)
+                        chunk_start = time.perf_counter()
+                        for chunk in response.stream(self.chunk_size, decode_content=False):
+                            fs.write(chunk)
+                            rng["done"] += len(chunk)
+                            rng["bytes"] += len(chunk)
+                            chunk_end = time.perf_counter()
+                            rng["slowest_chunk"] = max(rng["slowest_chunk"], chunk_end - chunk_start)
+                            chunk_start = chunk_end
+                            unsaved += len(chunk)
+                            if unsaved >= DownloadEngine.STATE_SAVE_INTERVAL:
+                                fs.flush()
+                                self._save_state(state_path, state)
+                                unsaved = 0
+                    finally:
+                        response.release_conn()
+                    if rng["end"] is None:
+                        break
+                    if rng["done"] == done_before:
+                        # Counted as dropped connection, so server returning empty bodies can't make this loop endless
+                        raise urllib3.exceptions.ProtocolError(f"Response ended without data at byte {offset}")
+                except (urllib3.exceptions.HTTPError, OSError) as e:
+                    if rng["attempts"] > self.retries:
+                        raise DownloadException(f"Download of {info['url']} failed after {rng['attempts']} attempts: {e}") from e
+                    if not info["accept_ranges"] and rng["done"]:
+                        self.logger.warning(f"Server doesn't accept ranges, restarting download of {info['url']}")
+                        rng["done"] = 0
+                        fs.truncate(0)
+                    self.logger.warning(f"Connection error while downloading {info['url']} at byte {rng['start'] + rng['done']}: {e}, retrying...")
+                    time.sleep(DownloadEngine.RETRY_BACKOFF * rng["attempts"])
+        rng["time"] = time.perf_counter() - start
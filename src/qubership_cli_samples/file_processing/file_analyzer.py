@@ -0,0 +1,113 @@
+import codecs, hashlib, math, mmap, os, re, time, zlib
+from collections import Counter
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+BLOCK_SIZE = 8 * 1024 * 1024
+HEAD_SIZE = 64 * 1024
+DEFAULT_HISTOGRAM_SAMPLE = 4 * 1024 * 1024
+
+_YAML_KEY_PATTERN = re.compile(rb'^(---|[\w.\-"\']+\s*:(\s|$)|-\s)')
+_CONTROL_BYTES = set(range(0, 8)) | set(range(14, 27)) | set(range(28, 32))
+
+
+class _Crc32:
+    """hashlib-like wrapper over zlib.crc32, used as fast checksum when `xxhash` is not installed"""
+    name = "crc32"
+
+    def __init__(self):
+        self.value = 0
+
+    def update(self, data):
+        self.value = zlib.crc32(data, self.value)
+
+    def hexdigest(self) -> str:
+        return f"{self.value:08x}"
+
+
+def fast_checksum_name() -> str:
+    return "xxh64" if xxhash else _Crc32.name
+
+
+def analyze_file(path, block_size: int = BLOCK_SIZE, histogram_sample: int = DEFAULT_HISTOGRAM_SAMPLE) -> dict:
+    """
+    Computes checksums (sha256, md5 and xxh64 or crc32), line count, byte histogram, entropy and type of file in one pass.
+
+    File is read through `mmap` by `block_size` blocks, and every block is fed to all consumers at once.
+    Byte histogram is collected from every N-th byte, so that no more than `histogram_sample` bytes are counted
+    (whole file is counted when it's smaller than that), `0` disables histogram.
+    """
+    start = time.perf_counter()
+    size = os.path.getsize(path)
+    checksums = {"sha256": hashlib.sha256(), "md5": hashlib.md5(), fast_checksum_name(): xxhash.xxh64() if xxhash else _Crc32()}
+    histogram = Counter()
+    step = max(1, -(-size // histogram_sample)) if histogram_sample > 0 else 0
+    lines, sampled, head = 0, 0, b""
+    if size:
+        with open(path, 'rb') as fs, mmap.mmap(fs.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            head = mm[:HEAD_SIZE]
+            for offset in range(0, size, block_size):
+                block = mm[offset:offset + block_size]
+                for checksum in checksums.values():
+                    checksum.update(block)
+                lines += block.count(b"\n")
+                if step:
+                    sample = block[(-offset) % step::step]
+                    histogram.update(sample)
+                    sampled += len(sample)
+            if mm[size - 1] != ord("\n"):
+                lines += 1
+    return {
+        "size": size,
+        "checksums": {name: checksum.hexdigest() for name, checksum in checksums.items()},
+        "lines": lines,
+        "type": detect_type(head, os.path.basename(path), histogram),
+        "entropy": round(entropy(histogram, sampled), 3),
+        "histogram": {f"0x{byte:02x}": count for byte, count in sorted(histogram.items())},
+        "histogram_sampled_bytes": sampled,
+        "time": time.perf_counter() - start,
+    }
+
+
+def entropy(histogram: Counter, total: int) -> float:
+    """Shannon entropy in bits per byte: ~8 for compressed/encrypted data, ~4-5 for text"""
+    return -sum(count / total * math.log2(count / total) for count in histogram.values()) if total else 0.0
+
+
+def detect_type(head: bytes, filename: str, histogram: Counter) -> str:
+    """Detects one of: zip, tar, gzip, json, yaml, text, binary, empty - by magic bytes, file start and byte histogram"""
+    if not head:
+        return "empty"
+    if head.startswith((b"PK\x03\x04", b"PK\x05\x06", b"PK\x07\x08")):
+        return "zip"
+    if head[257:262] == b"ustar":
+        return "tar"
+    if head.startswith(b"\x1f\x8b"):
+        return "gzip"
+    if not _is_text(head, histogram):
+        return "binary"
+    stripped = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+    if stripped[:1] in (b"{", b"["):
+        return "json"
+    if os.path.splitext(filename)[1].lower() in (".yaml", ".yml"):
+        return "yaml"
+    first_line = next((line for line in stripped.splitlines() if line.strip() and not line.startswith(b"#")), b"")
+    return "yaml" if _YAML_KEY_PATTERN.match(first_line) else "text"
+
+
+def _is_text(head: bytes, histogram: Counter) -> bool:
+    if b"\x00" in head or histogram.get(0):
+        return False
+    control = sum(histogram.get(byte, 0) for byte in _CONTROL_BYTES) + sum(head.count(byte) for byte in _CONTROL_BYTES)
+    if control * 100 > max(1, sum(histogram.values()) + len(head)):
+        return False
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
@@ -1,13 +1,18 @@
+import json
 import os
+import threading
 from pathlib import Path
 
 import yaml
 from qubership_pipelines_common_library.v1.execution.exec_command import ExecutionCommand
 import urllib.request
 import time
+from urllib.parse import urlparse
 
 from qubership_pipelines_common_library.v1.utils.utils_context import create_execution_context
 
+from qubership_cli_samples.file_processing.file_analyzer import analyze_file
+
 
 def sizeof_fmt(num, suffix="B"):
     for unit in ("", "Ki", "Mi", "Gi", "Ti", "Pi", "Ei", "Zi"):
@@ -17,47 +22,371 @@ def sizeof_fmt(num, suffix="B"):
     return f"{num:.1f} Yi{suffix}"
 
 
+def throughput_fmt(num_bytes, seconds):
+    return sizeof_fmt(num_bytes / seconds if seconds > 0 else 0, "B/s")
+
+
 class DownloadFileExecutionCommand(ExecutionCommand):
+    """
+    Downloads file from `params.url` (or all files from `params.files` list) into output files folder.
+
+    HTTP(S) files are streamed by chunks, large files are downloaded using parallel Range requests (if server supports them),
+    and interrupted downloads are resumed on the next run. Other URL schemes (e.g. `file://`) are retrieved as is.
+    Files from `params.files` are downloaded concurrently, reusing kept-alive connections to the same hosts.
+
+    When cache folder is configured, downloaded files are stored there by their SHA-256, and later downloads of the same URL
+    (with unchanged ETag/Last-Modified) or of the same expected SHA-256 are linked from cache instead of being downloaded.
+
+    Input Parameters Structure (this structure is expected inside "input_params.params" block):
+    ```
+    {
+        "url": "https://example.com/artifact.zip",  # REQUIRED (if "files" are not passed)
+        "filename": "artifact.zip",                 # REQUIRED (if "files" are not passed): Name of file in output files folder
+        "sha256": "9f86d08...",                     # OPTIONAL: Expected checksum, download fails on mismatch
+        "files": [                                  # OPTIONAL: List of files to download instead of single "url"
+            {"url": "https://example.com/a.zip", "filename": "a.zip", "sha256": "9f86d08..."},
+            "https://example.com/b.zip",            # filename is taken from URL path, if not passed
+        ],
+        "workers": 4,                               # OPTIONAL: How many "files" are downloaded at the same time, default is 4
+        "chunk_size_kb": 1024,                      # OPTIONAL: Read/write block size, default is 1024 KiB
+        "parallel_ranges": 4,                       # OPTIONAL: Number of parallel Range requests for large files, default is 4
+        "parallel_threshold_mb": 64,                # OPTIONAL: Files of this size (or larger) are downloaded in parallel, default is 64 MiB
+        "retries": 3,                               # OPTIONAL: Reconnect attempts per range after dropped connection, default is 3
+        "timeout": 60,                              # OPTIONAL: Connect/read timeout in seconds, default is 60
+        "cache_dir": "/cache/downloads",            # OPTIONAL: Download cache folder, default is taken from QUBERSHIP_CLI_DOWNLOAD_CACHE_DIR env variable
+        "cache_max_size_mb": 10240,                 # OPTIONAL: Least recently used files are evicted from cache above this size, default is 10 GiB
+        "cache_link": "auto",                       # OPTIONAL: How cached files are put into output folder: auto, reflink, hardlink or copy
+    }
+    ```
+
+    Hardlinked files share read-only cache copy, use `cache_link: copy` (or `reflink`) if later steps modify them in place.
+
+    Output Parameters (single file):
+        - params.filename
+        - params.filesize
+        - params.download_time
+        - params.download_mode: "single", "parallel" or "cache"
+        - params.throughput: Average speed of bytes received in this run
+        - params.resumed_from: Size of partial file continued from previous run
+        - params.chunks: Per-range size, time, throughput, attempts and slowest chunk read time
+
+    Output Parameters (multiple files):
+        - params.files: Per-file url, filename, status, size, time, throughput, download mode and cache status (or error)
+        - params.files_count
+        - params.filesize: Total size of downloaded files
+        - params.download_time: Wall time of all downloads
+        - params.throughput: Aggregate speed of all downloads
+
+    Output Parameters (both modes, if cache is configured):
+        - params.cache.hits
+        - params.cache.misses
+        - params.cache.uncacheable: Downloads without ETag/Last-Modified (and expected SHA-256), not stored in cache
+        - params.cache.bytes_saved
+    """
+
+    CACHE_DIR_ENV = "QUBERSHIP_CLI_DOWNLOAD_CACHE_DIR"
 
     def _validate(self):
+        self.files = self.context.input_param_get("params.files")
         names = ["paths.input.params",
                  "paths.output.params",
-                 "paths.output.files",
-                 "params.url",
-                 "params.filename"]
-        return self.context.validate(names)
+                 "paths.output.files"]
+        if not self.files:
+            names.extend(["params.url", "params.filename"])
+        if not self.context.validate(names):
+            return False
+        if self.files is not None and not isinstance(self.files, list):
+            self.context.logger.error("params.files should be a list of urls or url/filename pairs")
+            return False
+        self.output_folder = Path(self.context.input_param_get("paths.output.files"))
+        if not self.files and not self._is_inside_output_folder(self.context.input_param_get("params.filename")):
+            self.context.logger.error("params.filename should be relative path inside output files folder")
+            return False
+        self.file_entries = [self._parse_file_entry(entry) for entry in self.files or []]
+        # files are downloaded concurrently, so same filename would mean same target (and ".part") file for several downloads
+        from collections import Counter
+        filenames = Counter(os.path.normcase(os.path.normpath(filename)) for _, filename, _ in self.file_entries)
+        if duplicates := sorted(filename for filename, count in filenames.items() if count > 1):
+            self.context.logger.error(f"Entries of params.files should have unique filenames, duplicated: {', '.join(duplicates)}")
+            return False
+        self.workers = max(1, int(self.context.input_param_get("params.workers", 4)))
+        self.chunk_size = int(float(self.context.input_param_get("params.chunk_size_kb", 1024)) * 1024)
+        self.parallel_ranges = int(self.context.input_param_get("params.parallel_ranges", 4))
+        self.parallel_threshold = int(float(self.context.input_param_get("params.parallel_threshold_mb", 64)) * 1024 * 1024)
+        self.retries = int(self.context.input_param_get("params.retries", 3))
+        self.timeout = float(self.context.input_param_get("params.timeout", 60))
+        self.cache_dir = self.context.input_param_get("params.cache_dir") or os.getenv(DownloadFileExecutionCommand.CACHE_DIR_ENV)
+        self.cache_max_size = int(float(self.context.input_param_get("params.cache_max_size_mb", 10240)) * 1024 * 1024)
+        self.cache_link = self.context.input_param_get("params.cache_link", "auto")
+        if self.cache_link not in ("auto", "reflink", "hardlink", "copy"):
+            self.context.logger.error(f"Unsupported params.cache_link '{self.cache_link}', expected: auto, reflink, hardlink or copy")
+            return False
+        return True
 
     def _execute(self):
+        from qubership_cli_samples.file_processing.download_engine import DownloadEngine
+        self.engine = DownloadEngine(chunk_size=self.chunk_size, parallel_ranges=self.parallel_ranges,
+                                     parallel_threshold=self.parallel_threshold, retries=self.retries, timeout=self.timeout,
+                                     max_connections_per_host=self.parallel_ranges * (self.workers if self.files else 1),
+                                     logger=self.context.logger)
+        self.cache = None
+        if self.cache_dir:
+            from qubership_cli_samples.file_processing.download_cache import DownloadCache
+            self.cache = DownloadCache(self.cache_dir, self.cache_max_size, self.cache_link, logger=self.context.logger)
+        self.cache_stats = {"hits": 0, "misses": 0, "uncacheable": 0, "bytes_saved": 0}
+        self._cache_lock = threading.Lock()
+        if self.files:
+            self._download_files()
+        else:
+            self._download_single_file()
+
+    def _download_single_file(self):
+        from qubership_cli_samples.file_processing.download_engine import DownloadException
         url = self.context.input_param_get("params.url")
         filename = self.context.input_param_get("params.filename")
         self.context.logger.info(f"Downloading file from {url} and putting it as {filename} to output files folder...")
-        target_path = Path(self.context.input_param_get("paths.output.files")).joinpath(filename)
-        start = time.perf_counter()
-        urllib.request.urlretrieve(url, target_path)
-        end = time.perf_counter()
+        try:
+            result = self._download(url, filename, self.context.input_param_get("params.sha256"))
+        except DownloadException as e:
+            self._exit(False, str(e))
         self.context.output_param_set("params.filename", filename)
-        self.context.output_param_set("params.filesize", sizeof_fmt(os.path.getsize(target_path)))
-        self.context.output_param_set("params.download_time", f"{end - start:0.3f}s")
+        self.context.output_param_set("params.filesize", sizeof_fmt(result["size"]))
+        self.context.output_param_set("params.download_time", f"{result['elapsed']:0.3f}s")
+        if result["mode"]:
+            self.context.output_param_set("params.download_mode", result["mode"])
+            self.context.output_param_set("params.throughput", throughput_fmt(result["downloaded"], result["elapsed"]))
+            self.context.output_param_set("params.resumed_from", sizeof_fmt(result["resumed_from"]))
+            self.context.output_param_set("params.chunks", [{
+                "range": f"{chunk['start']}-{'' if chunk['end'] is None else chunk['end']}",
+                "size": sizeof_fmt(chunk["bytes"]),
+                "time": f"{chunk['time']:0.3f}s",
+                "throughput": throughput_fmt(chunk["bytes"], chunk["time"]),
+                "attempts": chunk["attempts"],
+                "slowest_chunk": f"{chunk['slowest_chunk']:0.3f}s",
+            } for chunk in result["chunks"]])
+            self.context.logger.info(f"Downloaded {sizeof_fmt(result['size'])} ({result['mode']} mode) "
+                                     f"at {throughput_fmt(result['downloaded'], result['elapsed'])}")
+        self._set_cache_output_params()
+        self.context.output_params_save()
+
+    def _download_files(self):
+        from concurrent.futures import ThreadPoolExecutor
+        entries = self.file_entries
+        self.context.logger.info(f"Downloading {len(entries)} files using {self.workers} workers...")
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="download_file") as pool:
+            results = list(pool.map(lambda entry: self._download_file_entry(*entry), entries))
+        elapsed = time.perf_counter() - start
+
+        failed = [result for result in results if result["status"] == "FAILED"]
+        total_size = sum(result.get("bytes", 0) for result in results)
+        downloaded = sum(result.pop("downloaded", 0) for result in results)
+        for result in results:
+            result.pop("bytes", None)
+        self.context.output_param_set("params.files", results)
+        self.context.output_param_set("params.files_count", len(results) - len(failed))
+        self.context.output_param_set("params.filesize", sizeof_fmt(total_size))
+        self.context.output_param_set("params.download_time", f"{elapsed:0.3f}s")
+        self.context.output_param_set("params.throughput", throughput_fmt(downloaded, elapsed))
+        self._set_cache_output_params()
         self.context.output_params_save()
+        self.context.logger.info(f"Downloaded {len(results) - len(failed)} files ({sizeof_fmt(total_size)}) in {elapsed:0.3f}s "
+                                 f"at {throughput_fmt(downloaded, elapsed)}")
+        if failed:
+            self._exit(False, f"Failed to download {len(failed)} of {len(results)} files: "
+                              f"{', '.join(result['url'] for result in failed)}")
+
+    def _set_cache_output_params(self):
+        if self.cache:
+            self.context.output_param_set("params.cache.hits", self.cache_stats["hits"])
+            self.context.output_param_set("params.cache.misses", self.cache_stats["misses"])
+            self.context.output_param_set("params.cache.uncacheable", self.cache_stats["uncacheable"])
+            self.context.output_param_set("params.cache.bytes_saved", sizeof_fmt(self.cache_stats["bytes_saved"]))
+
+    def _parse_file_entry(self, entry) -> tuple[str, str, str]:
+        if isinstance(entry, str):
+            entry = {"url": entry}
+        if not isinstance(entry, dict):
+            self._exit(False, f"Entry of params.files should be url or mapping with url: {entry}")
+        url = entry.get("url")
+        if not url:
+            self._exit(False, f"Entry of params.files doesn't have url: {entry}")
+        filename = entry.get("filename") or os.path.basename(urlparse(url).path) or "index.html"
+        if not self._is_inside_output_folder(filename):
+            self._exit(False, f"Entry of params.files has filename outside of output files folder: {filename}")
+        return url, filename, entry.get("sha256")
+
+    def _is_inside_output_folder(self, filename) -> bool:
+        if os.path.isabs(str(filename)):
+            return False
+        output_folder = self.output_folder.resolve()
+        return output_folder.joinpath(str(filename)).resolve().is_relative_to(output_folder)
+
+    def _download_file_entry(self, url: str, filename: str, sha256: str = None) -> dict:
+        try:
+            result = self._download(url, filename, sha256)
+        except Exception as e:
+            self.context.logger.error(f"Failed to download {url}: {e}")
+            return {"url": url, "filename": filename, "status": "FAILED", "error": str(e)}
+        self.context.logger.info(f"Downloaded {filename} ({sizeof_fmt(result['size'])}) in {result['elapsed']:0.3f}s")
+        return {
+            "url": url,
+            "filename": filename,
+            "status": "SUCCESS",
+            "size": sizeof_fmt(result["size"]),
+            "time": f"{result['elapsed']:0.3f}s",
+            "throughput": throughput_fmt(result["downloaded"], result["elapsed"]),
+            "mode": result["mode"] or "retrieve",
+            "cache": result.get("cache", "disabled"),
+            "bytes": result["size"],
+            "downloaded": result["downloaded"],
+        }
+
+    def _download(self, url: str, filename: str, sha256: str = None) -> dict:
+        from qubership_cli_samples.file_processing.download_cache import DownloadCache, file_sha256
+        from qubership_cli_samples.file_processing.download_engine import DownloadException
+        target_path = self.output_folder.joinpath(filename)
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        if urlparse(url).scheme not in ("http", "https"):
+            urllib.request.urlretrieve(url, target_path)
+            result = {"size": os.path.getsize(target_path), "elapsed": time.perf_counter() - start, "mode": None}
+            result["downloaded"] = result["size"]
+        else:
+            info, cache_key = None, None
+            if self.cache:
+                info = None if sha256 else self.engine.probe(url)
+                cache_key = DownloadCache.make_key(url, info and info["etag"], info and info["last_modified"], sha256)
+                if cache_key and (size := self.cache.get(cache_key, target_path)) is not None:
+                    self.context.logger.info(f"Took {filename} ({sizeof_fmt(size)}) from download cache")
+                    self._count_cache("hits", size)
+                    return {"size": size, "downloaded": 0, "resumed_from": 0, "elapsed": time.perf_counter() - start,
+                            "mode": "cache", "cache": "hit", "chunks": []}
+            result = self.engine.download(url, target_path, info)
+            if self.cache:
+                result["cache"] = "miss" if cache_key else "uncacheable"
+                self._count_cache("misses" if cache_key else "uncacheable")
+        if sha256 or result.get("cache") == "miss":
+            actual_sha256 = file_sha256(target_path)
+            if sha256 and actual_sha256 != sha256.lower():
+                target_path.unlink(missing_ok=True)
+                raise DownloadException(f"Checksum mismatch for {url}: expected sha256 {sha256}, got {actual_sha256}")
+            if result.get("cache") == "miss":
+                self.cache.put(cache_key, target_path, actual_sha256)
+        return result
+
+    def _count_cache(self, counter: str, saved_bytes: int = 0):
+        with self._cache_lock:
+            self.cache_stats[counter] += 1
+            self.cache_stats["bytes_saved"] += saved_bytes
 
 
 class AnalyzeFileExecutionCommand(ExecutionCommand):
+    """
+    Analyzes file `params.filename` from input files folder (or all files in it, if filename is a folder or not passed).
+
+    Checksums, line count, byte histogram and type of each file are computed in a single pass over its memory-mapped content,
+    folders are processed by several worker processes.
+
+    Input Parameters Structure (this structure is expected inside "input_params.params" block):
+    ```
+    {
+        "filename": "artifact.zip",     # OPTIONAL: File (or folder) inside input files folder, whole folder is analyzed by default
+        "workers": 4,                   # OPTIONAL: Number of processes analyzing files of folder, default is number of CPUs (up to 8)
+        "histogram_sample_mb": 4,       # OPTIONAL: Max amount of evenly spread bytes counted into histogram, 0 disables it
+    }
+    ```
+
+    Output Parameters (single file):
+        - params.filename
+        - params.filesize
+        - params.checksums: sha256, md5 and xxh64 (crc32, when `xxhash` is not installed)
+        - params.lines
+        - params.file_type: zip, tar, gzip, json, yaml, text, binary or empty
+        - params.entropy: Bits per byte, estimated from histogram
+        - params.analysis_time
+
+    Output Parameters (folder):
+        - params.files: Same size/checksums/lines/file_type/entropy data per relative file path
+        - params.files_count
+        - params.filesize: Total size of analyzed files
+        - params.analysis_time
+        - params.throughput
+
+    Full results, including byte histograms, are also saved as "file_analysis.json" into output files folder (if it's passed).
+    """
+
+    REPORT_FILE_NAME = "file_analysis.json"
 
     def _validate(self):
         names = ["paths.input.params",
                  "paths.input.files",
-                 "paths.output.params",
-                 "params.filename"]
-        return self.context.validate(names)
+                 "paths.output.params"]
+        if not self.context.validate(names):
+            return False
+        self.workers = max(1, int(self.context.input_param_get("params.workers", min(8, os.cpu_count() or 1))))
+        self.histogram_sample = int(float(self.context.input_param_get("params.histogram_sample_mb", 4)) * 1024 * 1024)
+        return True
 
     def _execute(self):
         filename = self.context.input_param_get("params.filename")
-        self.context.logger.info(f"Analyzing data in {filename} and saving it to output params...")
-        target_path = Path(self.context.input_param_get("paths.input.files")).joinpath(filename)
-        self.context.output_param_set("params.filename", filename)
-        self.context.output_param_set("params.filesize", sizeof_fmt(os.path.getsize(target_path)))
+        input_folder = Path(self.context.input_param_get("paths.input.files"))
+        target_path = input_folder.joinpath(filename) if filename else input_folder
+        if not target_path.exists():
+            self._exit(False, f"Input file {target_path} doesn't exist")
+        start = time.perf_counter()
+        if target_path.is_dir():
+            self.context.logger.info(f"Analyzing files in {target_path} and saving results to output params...")
+            results = self._analyze_folder(target_path)
+        else:
+            self.context.logger.info(f"Analyzing data in {filename} and saving it to output params...")
+            results = {filename: analyze_file(target_path, histogram_sample=self.histogram_sample)}
+        elapsed = time.perf_counter() - start
+
+        if target_path.is_dir():
+            total_size = sum(result["size"] for result in results.values())
+            self.context.output_param_set("params.files", {name: self._result_params(result) for name, result in results.items()})
+            self.context.output_param_set("params.files_count", len(results))
+            self.context.output_param_set("params.filesize", sizeof_fmt(total_size))
+            self.context.output_param_set("params.throughput", throughput_fmt(total_size, elapsed))
+            self.context.logger.info(f"Analyzed {len(results)} files ({sizeof_fmt(total_size)}) at {throughput_fmt(total_size, elapsed)}")
+        else:
+            self.context.output_param_set("params.filename", filename)
+            for key, value in self._result_params(results[filename]).items():
+                self.context.output_param_set(f"params.{key}", value)
+        self.context.output_param_set("params.analysis_time", f"{elapsed:0.3f}s")
+        self._save_report(results)
         self.context.output_params_save()
 
+    def _analyze_folder(self, folder: Path) -> dict:
+        paths = sorted(path for path in folder.rglob("*") if path.is_file())
+        names = [path.relative_to(folder).as_posix() for path in paths]
+        if self.workers == 1 or len(paths) < 2:
+            return {name: analyze_file(path, histogram_sample=self.histogram_sample) for name, path in zip(names, paths)}
+        from concurrent.futures import ProcessPoolExecutor
+        from functools import partial
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(paths))) as pool:
+            results = pool.map(partial(analyze_file, histogram_sample=self.histogram_sample), paths,
+                               chunksize=max(1, len(paths) // (self.workers * 4)))
+            return dict(zip(names, results))
+
+    @staticmethod
+    def _result_params(result: dict) -> dict:
+        return {
+            "filesize": sizeof_fmt(result["size"]),
+            "checksums": result["checksums"],
+            "lines": result["lines"],
+            "file_type": result["type"],
+            "entropy": result["entropy"],
+        }
+
+    def _save_report(self, results: dict):
+        if not (output_folder := self.context.input_param_get("paths.output.files")):
+            return
+        Path(output_folder).mkdir(parents=True, exist_ok=True)
+        with open(Path(output_folder).joinpath(AnalyzeFileExecutionCommand.REPORT_FILE_NAME), 'w', encoding='utf-8') as fs:
+            json.dump(results, fs, indent=2)
+
 
 class GenerateContextFromEnv(ExecutionCommand):
 
@@ -0,0 +1,169 @@
+import hashlib, json, logging, os, subprocess, time, uuid
+
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class ContainerPoolException(Exception):
+    pass
+
+
+class ContainerPool:
+    """
+    Long-running ("warm") containers, reused by several `podman-run-image` steps via `podman exec`.
+
+    Containers are grouped by key built from everything that can't be changed for `podman exec` (image, mounts, run flags).
+    State of each container (last use time, and steps currently using it) is kept in its own JSON file under `state_dir`,
+    shared by all processes on host. Each key has its own file lock, held while its containers are started, removed or their state is updated,
+    so steps using different keys never wait for each other's `podman` calls.
+    Container that shouldn't be reused (e.g. step timed out in it) is "draining": it's removed once the last step using it is released.
+    Containers idle for longer than their `idle_timeout` are removed by any next step that uses the pool,
+    or by `podman-pool-cleanup` command (e.g. scheduled on host, so they don't outlive the last step).
+    """
+
+    LABEL = "qubership.cli.pool"
+    NAME_PREFIX = "qubership_pool_"
+
+    def __init__(self, state_dir, operations_timeout: float = 15, logger: logging.Logger = None):
+        self.state_dir = Path(state_dir)
+        self.operations_timeout = operations_timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(image: str, run_flags: list[str]) -> str:
+        return hashlib.sha256(json.dumps([image, run_flags]).encode("utf-8")).hexdigest()[:16]
+
+    def acquire(self, key: str, step_id: str, run_args: list[str], idle_timeout: float, busy_timeout: float,
+                cwd=None) -> tuple[str, bool]:
+        """
+        Returns name of running pool container for `key` and whether it was already running.
+        Container is started with `podman run --detach ... <run_args>` from `cwd` folder if needed (`run_args` should keep it alive).
+        Step is considered using container until it's released, or for `busy_timeout` seconds at most (e.g. if its process was killed).
+        """
+        with self._lock(key):
+            name, state = next(((name, state) for name, state in self._key_states(key) if state and not state.get("draining")), (None, None))
+            reused = name is not None and self._is_running(name)
+            if not reused:
+                if name:
+                    self._remove(name)
+                name, state = f"{ContainerPool.NAME_PREFIX}{key}_{uuid.uuid4().hex[:8]}", {}
+                self._start(name, key, run_args, cwd)
+            now = time.time()
+            state.update({"key": key, "last_used": now, "idle_timeout": idle_timeout,
+                          "steps": {**state.get("steps", {}), step_id: now + busy_timeout}})
+            self._write_state(name, state)
+        self.evict_idle()
+        return name, reused
+
+    def release(self, name: str, step_id: str, discard: bool = False):
+        """
+        Marks step as finished with container. Discarded container (e.g. step timed out, and its process may still be running)
+        is not reused anymore, and is removed once no other steps use it.
+        """
+        with self._lock(self._key_of(name)):
+            if not (state := self._read_state(name)):
+                return
+            now = time.time()
+            state.get("steps", {}).pop(step_id, None)
+            state["draining"] = state.get("draining", False) or discard
+            active_steps = [step for step, busy_until in state["steps"].items() if now < busy_until]
+            if state["draining"] and not active_steps:
+                self._remove(name)
+                self.logger.info(f"Removed discarded pool container {name}")
+                return
+            if discard:
+                self.logger.warning(f"Pool container {name} will be removed once steps {', '.join(active_steps)} finish")
+            state["last_used"] = now
+            self._write_state(name, state)
+
+    def evict_idle(self) -> list[str]:
+        """Removes containers idle for longer than their `idle_timeout` (or draining ones no step uses), returns their names"""
+        evicted = []
+        keys = sorted({self._key_of(state_path.stem) for state_path in self.state_dir.glob(f"{ContainerPool.NAME_PREFIX}*.json")})
+        for key in keys:
+            with self._lock(key, blocking=False) as locked:
+                # Key locked by another process is being started or used
+                if not locked:
+                    continue
+                for name, state in self._key_states(key):
+                    if self._is_idle(state):
+                        self._remove(name)
+                        evicted.append(name)
+                        self.logger.info(f"Removed idle pool container {name}")
+        return evicted
+
+    @staticmethod
+    def _is_idle(state: dict) -> bool:
+        """Containers with unreadable state are considered idle, since nothing can reuse them"""
+        now = time.time()
+        if not state:
+            return True
+        steps_finished = all(now >= busy_until for busy_until in state.get("steps", {}).values())
+        return steps_finished and (state.get("draining") or now >= state["last_used"] + state["idle_timeout"])
+
+    def _start(self, name: str, key: str, run_args: list[str], cwd):
+        run_command = ["podman", "run", "--detach", "--name", name, "--label", f"{ContainerPool.LABEL}={key}", *run_args]
+        timeout = self.operations_timeout * 4
+        try:
+            result = subprocess.run(run_command, capture_output=True, text=True, timeout=timeout, cwd=cwd)
+        except subprocess.TimeoutExpired:
+            self._podman(["rm", "-f", name])
+            raise ContainerPoolException(f"Starting pool container {name} timed out after {timeout} seconds")
+        if result.returncode != 0:
+            raise ContainerPoolException(f"Failed to start pool container {name}: {result.stderr}")
+        self.logger.info(f"Started pool container {name}")
+
+    def _remove(self, name: str):
+        self._podman(["rm", "-f", name])
+        self._state_path(name).unlink(missing_ok=True)
+
+    def _is_running(self, name: str) -> bool:
+        result = self._podman(["container", "inspect", "--format", "{{.State.Running}}", name])
+        return result is not None and result.returncode == 0 and result.stdout.strip() == "true"
+
+    def _podman(self, args: list[str]):
+        try:
+            return subprocess.run(["podman", *args], capture_output=True, text=True, timeout=self.operations_timeout)
+        except subprocess.TimeoutExpired:
+            self.logger.warning(f"Command 'podman {' '.join(args)}' timed out after {self.operations_timeout} seconds")
+            return None
+
+    @staticmethod
+    def _key_of(name: str) -> str:
+        return name[len(ContainerPool.NAME_PREFIX):].rsplit("_", 1)[0]
+
+    def _key_states(self, key: str) -> list[tuple[str, dict]]:
+        return [(state_path.stem, self._read_state(state_path.stem))
+                for state_path in sorted(self.state_dir.glob(f"{ContainerPool.NAME_PREFIX}{key}_*.json"))]
+
+    def _state_path(self, name: str) -> Path:
+        return self.state_dir.joinpath(f"{name}.json")
+
+    def _read_state(self, name: str):
+        try:
+            with open(self._state_path(name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_state(self, name: str, state: dict):
+        temp_path = self.state_dir.joinpath(f".{name}.json.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self._state_path(name))
+
+    @contextmanager
+    def _lock(self, key: str, blocking: bool = True):
+        """Locks containers of single key, yields whether lock was taken (it always is, unless `blocking` is disabled)"""
+        # Lock files are never deleted: process waiting on deleted file would hold lock nobody else sees
+        with open(self.state_dir.joinpath(f"{ContainerPool.NAME_PREFIX}{key}.lock"), 'a') as lock_file:
+            locked = True
+            try:
+                import fcntl
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except ImportError:
+                pass  # no inter-process locking on Windows
+            except BlockingIOError:
+                locked = False
+            yield locked
@@ -1,8 +1,13 @@
-import os, subprocess, time, uuid
+import copy, json, os, subprocess, tempfile, threading, time, uuid
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from qubership_pipelines_common_library.v1.execution.exec_command import ExecutionCommand
 from qubership_pipelines_common_library.v1.utils.utils_string import UtilsString
+from qubership_cli_samples.podman.container_pool import ContainerPool, ContainerPoolException
+
+DEFAULT_POOL_STATE_DIR = os.path.join(tempfile.gettempdir(), "qubership_podman_pool")
 
 
 class PodmanRunImage(ExecutionCommand):
@@ -20,10 +25,20 @@ class PodmanRunImage(ExecutionCommand):
                 "working_dir": "/some/dir/inside/container",  # Working directory inside container
                 "timeout": "600",  # Maximum execution time in seconds
                 "operations_timeout": "15",  # Timeout for operations like file copying
+                "transfer_workers": "4",  # Max number of "podman cp" transfers running concurrently in after_script
+                "max_parallel": "4",  # Max number of containers running at once in matrix mode
+                "reuse_container": False,  # Run "command" via "podman exec" in warm container, kept alive between steps with same image, mounts and run flags
+                "idle_timeout": "600",  # Warm container is removed after it wasn't used for this many seconds
+                "keepalive_command": "sleep infinity",  # Command that keeps warm container running (image entrypoint is cleared)
+                "pool_state_dir": "/tmp/qubership_podman_pool",  # Host folder where warm containers usage is tracked
+                "max_params_file_size_mb": "64",  # Files from "extract_params_from_files" larger than this are skipped
+                "resource_sampling_interval": "2",  # Sample container CPU/memory/IO usage via "podman stats" every N seconds (disabled by default), warm container is sampled as a whole, including other steps running in it
                 "remove_container": True,  # Whether to remove container after execution
                 "save_stdout_to_logs": True,  # Save container stdout to execution logs
                 "save_stdout_to_files": True,  # Save container stdout to output files
                 "save_stdout_to_params": False,  # Save container stdout to output parameters
+                "stream_output": False,  # Read container output while it runs: it's written to logs/files line by line, and only its tail is kept in memory
+                "stdout_tail_lines": "1000",  # How many last lines of stdout/stderr are saved to params in streaming mode
                 "expected_return_codes": "0,125",  # Comma-separated list of acceptable exit codes
                 "additional_run_flags": "--cgroups=disabled",  # Optional string of flags that will be added to "podman run" command
             },
@@ -55,21 +70,40 @@ class PodmanRunImage(ExecutionCommand):
                 "extract_params_from_files": {  # OPTIONAL: Extract parameters from container files. Supports JSON, YAML, and ENV files
                     "SOME_FILE_IN_CONTAINER": "SECTION_NAME_IN_PARAMS_WHERE_IT_WILL_BE_STORED",
                 }
-            }
+            },
+            "matrix": [  # OPTIONAL: Runs one container per entry concurrently, each entry overrides "command", explicit env vars and mounts
+                {"name": "shard_1", "command": "pytest --shard=1/2", "env_vars": {"SHARD": "1"}, "mounts": {"shard_1_data": "/DATA"}},
+                {"name": "shard_2", "command": "pytest --shard=2/2", "env_vars": {"SHARD": "2"}},
+            ]
         }
 
         Output Parameters:
         - params.execution_time: Total execution time in seconds
         - params.return_code: Container exit code
-        - params.stdout: Container stdout (if save_stdout_to_params enabled)
-        - params.stderr: Container stderr (if save_stdout_to_params enabled)
+        - params.stdout: Container stdout (if save_stdout_to_params enabled, only last "stdout_tail_lines" lines in streaming mode)
+        - params.stderr: Container stderr (if save_stdout_to_params enabled, only last "stdout_tail_lines" lines in streaming mode)
         - params.extracted_output.*: Extracted parameters from files (if extract_params_from_files configured)
+        - params.extracted_files: Size, detected format and parse time of each file from extract_params_from_files (or why it was skipped)
+        - params.transfers: Source, target, status and time of each "podman cp" transfer from after_script
+        - params.transfers_time: Total time spent on after_script transfers
+        - params.matrix_results.<name>.*: Same params as above, per matrix entry (in matrix mode)
+        - params.matrix_summary: Number of succeeded/failed containers and return code of each one (in matrix mode)
+        - params.container_reused: Whether warm container was already running (if reuse_container enabled)
+        - params.resource_usage: Avg/peak CPU, memory and PIDs, and total network/block I/O (if resource_sampling_interval is set),
+          all samples are saved to "container_resource_usage.csv" in output files
 
         Notes:
         - The command automatically handles container lifecycle including start, execution, and cleanup
         - All host-paths (including mount paths) are resolved relative to context directory.
+        - In matrix mode, each container writes its stdout and "copy_files_to_host" files into its own "<output files>/<name>"
+          subfolder, and "matrix_summary.json" is written into output files. Command fails if any container fails.
+        - Files from extract_params_from_files larger than max_params_file_size_mb are skipped (not parsed partially or in chunks):
+          nothing is put into extracted_output for them, and they are marked as skipped in extracted_files
         """
 
+    PARAMS_FILE_FORMATS = ["json", "yaml", "env"]
+    PARAMS_FILE_EXTENSIONS = {".json": "json", ".yaml": "yaml", ".yml": "yaml", ".env": "env", ".properties": "env"}
+
     def _validate(self):
         names = [
             "paths.input.params",
@@ -95,10 +129,19 @@ class PodmanRunImage(ExecutionCommand):
         self.working_dir = self.context.input_param_get("params.execution_config.working_dir")
         self.timeout = float(self.context.input_param_get("params.execution_config.timeout", 60))
         self.operations_timeout = float(self.context.input_param_get("params.execution_config.operations_timeout", 15))
+        self.transfer_workers = max(1, int(self.context.input_param_get("params.execution_config.transfer_workers", 4)))
         self.remove_container = UtilsString.convert_to_bool(self.context.input_param_get("params.execution_config.remove_container", True))
         self.save_stdout_to_logs = UtilsString.convert_to_bool(self.context.input_param_get("params.execution_config.save_stdout_to_logs", True))
         self.save_stdout_to_files = UtilsString.convert_to_bool(self.context.input_param_get("params.execution_config.save_stdout_to_files", True))
         self.save_stdout_to_params = UtilsString.convert_to_bool(self.context.input_param_get("params.execution_config.save_stdout_to_params", False))
+        self.stream_output = UtilsString.convert_to_bool(self.context.input_param_get("params.execution_config.stream_output", False))
+        self.stdout_tail_lines = int(self.context.input_param_get("params.execution_config.stdout_tail_lines", 1000))
+        self.reuse_container = UtilsString.convert_to_bool(self.context.input_param_get("params.execution_config.reuse_container", False))
+        self.idle_timeout = float(self.context.input_param_get("params.execution_config.idle_timeout", 600))
+        self.keepalive_command = self.context.input_param_get("params.execution_config.keepalive_command", "sleep infinity")
+        self.pool_state_dir = self.context.input_param_get("params.execution_config.pool_state_dir", DEFAULT_POOL_STATE_DIR)
+        self.params_file_max_size = float(self.context.input_param_get("params.execution_config.max_params_file_size_mb", 64)) * 1024 * 1024
+        self.resource_sampling_interval = float(self.context.input_param_get("params.execution_config.resource_sampling_interval", 0))
         self.expected_return_codes = [int(num) for num in self.context.input_param_get("params.execution_config.expected_return_codes", "0").split(',')]
         self.additional_run_flags = self.context.input_param_get("params.execution_config.additional_run_flags")
 
@@ -110,12 +153,34 @@ class PodmanRunImage(ExecutionCommand):
         self.copy_files_config = self.context.input_param_get("params.after_script.copy_files_to_host", {})
         self.extract_params_config = self.context.input_param_get("params.after_script.extract_params_from_files", {})
 
-        # Get base paths
-        self.context_dir_path = Path(os.path.dirname(self.context.context_path))
+        # Get base paths (absolute ones, since "podman" is executed from context folder, and relative paths are relative to cwd)
+        self.context_dir_path = Path(os.path.dirname(os.path.abspath(self.context.context_path)))
         self.input_params_path = Path(self.context.input_param_get("paths.input.params"))
         self.output_params_path = Path(self.context.input_param_get("paths.output.params"))
-        self.output_files_path = Path(self.context.input_param_get("paths.output.files"))
+        self.output_files_path = Path(self.context.input_param_get("paths.output.files")).resolve()
         self.container_name = f"podman_{str(uuid.uuid4())}"
+        self.transfers = []
+        self.parsed_params_files = []
+        self.host_paths_root = self.context_dir_path
+        self.output_params_prefix = "params"
+        self.env_file_name = "temp.env"
+        self._output_lock = threading.Lock()
+
+        # matrix
+        self.matrix = self.context.input_param_get("params.matrix", [])
+        self.max_parallel = max(1, int(self.context.input_param_get("params.execution_config.max_parallel", 4)))
+        if self.matrix:
+            if not isinstance(self.matrix, list) or not all(isinstance(entry, dict) for entry in self.matrix):
+                self.context.logger.error("params.matrix should be a list of objects")
+                return False
+            names = [str(entry.get("name", f"shard_{index}")) for index, entry in enumerate(self.matrix, start=1)]
+            if len(set(names)) != len(names) or any(not name or "/" in name or "\\" in name or name.startswith(".") for name in names):
+                self.context.logger.error(f"Names of params.matrix entries should be unique and usable as folder names: {names}")
+                return False
+
+        if self.reuse_container and not (self.command or any(entry.get("command") for entry in self.matrix)):
+            self.context.logger.error("params.command is mandatory when reuse_container is enabled")
+            return False
         return True
 
     def _run_sp_command(self, command, timeout=None):
@@ -123,6 +188,55 @@ class PodmanRunImage(ExecutionCommand):
                               timeout=timeout if timeout else self.timeout,
                               cwd=self.context_dir_path)
 
+    def _run_streaming_command(self, command) -> subprocess.CompletedProcess:
+        """
+        Runs command reading its stdout/stderr line by line while it runs: lines go to logs and output files right away,
+        and only last `stdout_tail_lines` of each stream are kept (and returned in result)
+        """
+        output_files = {}
+        try:
+            if self.save_stdout_to_files:
+                # Opened before container is started, so it can't be left writing into pipe nobody reads
+                self.output_files_path.mkdir(parents=True, exist_ok=True)
+                for name in ("stdout", "stderr"):
+                    output_files[name] = open(self.output_files_path / f"container_{name}.txt", 'w', encoding='utf-8')
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                       encoding='utf-8', errors='replace', cwd=self.context_dir_path)
+            tails = {"stdout": deque(maxlen=self.stdout_tail_lines), "stderr": deque(maxlen=self.stdout_tail_lines)}
+            readers = [threading.Thread(target=self._pump_stream, args=(pipe, name, tails[name], output_files.get(name)), daemon=True)
+                       for pipe, name in ((process.stdout, "stdout"), (process.stderr, "stderr"))]
+            for reader in readers:
+                reader.start()
+            try:
+                process.wait(timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                # Pipes might still be held open by processes spawned from killed one, so readers aren't waited for long
+                for reader in readers:
+                    reader.join(1)
+                raise
+            for reader in readers:
+                reader.join(self.operations_timeout)
+            return subprocess.CompletedProcess(command, process.returncode, "".join(tails["stdout"]), "".join(tails["stderr"]))
+        finally:
+            for output_file in output_files.values():
+                output_file.close()
+
+    def _pump_stream(self, pipe, name: str, tail: deque, output_file=None):
+        """Reads pipe till its end, even if output file can't be written anymore (e.g. disk is full)"""
+        with pipe:
+            for line in pipe:
+                tail.append(line)
+                if output_file:
+                    try:
+                        output_file.write(line)
+                    except (OSError, ValueError) as e:
+                        self.context.logger.warning(f"Failed to write container {name} into output files: {e}")
+                        output_file = None
+                if self.save_stdout_to_logs:
+                    self.context.logger.debug(f"Container {name}: {line.rstrip()}")
+
     def _build_podman_command(self) -> list[str]:
         cmd = ["podman", "run", "--name", self.container_name]
 
@@ -136,9 +250,7 @@ class PodmanRunImage(ExecutionCommand):
         if self.env_vars_config:
             cmd.extend(self._build_command_env_var_args())
 
-        for host_path, container_path in self.mounts_config.items():
-            cmd.extend(["--mount", f"type=bind,source={host_path},target={container_path}"])
-
+        cmd.extend(self._build_mount_args())
         cmd.append(self.image)
 
         if self.command:
@@ -147,6 +259,47 @@ class PodmanRunImage(ExecutionCommand):
 
         return cmd
 
+    def _build_mount_args(self) -> list[str]:
+        args = []
+        for host_path, container_path in self.mounts_config.items():
+            args.extend(["--mount", f"type=bind,source={host_path},target={container_path}"])
+        return args
+
+    def _acquire_pooled_container(self) -> list[str]:
+        """Makes sure warm container for current image/mounts/run flags is running, returns "podman exec" command for this step"""
+        import shlex
+        self.container_pool = ContainerPool(self.pool_state_dir, self.operations_timeout, logger=self.context.logger)
+        run_flags = (shlex.split(self.additional_run_flags) if self.additional_run_flags else []) + self._build_mount_args()
+        # Container is started from context folder, where relative mount sources are resolved from, so it's also part of the key
+        key = ContainerPool.make_key(self.image, [str(self.context_dir_path), *run_flags])
+        run_args = ["--entrypoint", "", *run_flags, self.image, *shlex.split(self.keepalive_command)]
+        self.step_id = uuid.uuid4().hex
+        self.container_name, reused = self.container_pool.acquire(key, self.step_id, run_args, self.idle_timeout,
+                                                                  self.timeout + self.operations_timeout * 4, cwd=self.context_dir_path)
+        self._output_param_set("container_reused", reused)
+
+        # Set before folder is created, so step is released (and container discarded) even if that fails
+        self.step_dir = f"{(self.working_dir or '/tmp').rstrip('/')}/qubership_step_{self.step_id}"
+        try:
+            mkdir_result = self._run_sp_command(["podman", "exec", self.container_name, "mkdir", "-p", self.step_dir], self.operations_timeout)
+        except subprocess.TimeoutExpired:
+            raise ContainerPoolException(f"Creating step folder {self.step_dir} timed out after {self.operations_timeout} seconds")
+        if mkdir_result.returncode != 0:
+            raise ContainerPoolException(f"Failed to create step folder {self.step_dir}: {mkdir_result.stderr}")
+        return ["podman", "exec", "--workdir", self.step_dir, *self._build_command_env_var_args(), self.container_name,
+                *shlex.split(self.command)]
+
+    def _release_pooled_container(self, discard: bool):
+        """Returns warm container to the pool, or removes it if step's process might still be running there (e.g. on timeout)"""
+        if discard:
+            self.context.logger.warning(f"Removing warm container {self.container_name}, since step didn't finish there")
+        else:
+            try:
+                self._run_sp_command(["podman", "exec", self.container_name, "rm", "-rf", self.step_dir], self.operations_timeout)
+            except subprocess.TimeoutExpired:
+                self.context.logger.warning(f"Failed to remove step folder {self.step_dir} in {self.container_name}")
+        self.container_pool.release(self.container_name, self.step_id, discard=discard)
+
     def _build_command_env_var_args(self) -> list[str]:
         args = []
         for key, value in self.env_vars_config.get("explicit", {}).items():
@@ -159,7 +312,7 @@ class PodmanRunImage(ExecutionCommand):
             args.extend(["--env-file", f"{env_file}"])
 
         if self.env_vars_config.get("pass_via_file"):
-            env_file_path = self.context_dir_path.joinpath("temp").joinpath("temp.env")
+            env_file_path = self.context_dir_path.joinpath("temp").joinpath(self.env_file_name)
             env_file_path.parent.mkdir(parents=True, exist_ok=True)
             with open(env_file_path, 'w') as f:
                 for key, value in self.env_vars_config["pass_via_file"].items():
@@ -168,117 +321,219 @@ class PodmanRunImage(ExecutionCommand):
 
         return args
 
+    def _copy_from_container(self, container_path: str, host_path: Path) -> dict:
+        """Runs single "podman cp", returns its timing and status instead of raising"""
+        start = time.perf_counter()
+        copy_command = ["podman", "cp", f"{self.container_name}:{container_path}", str(host_path)]
+        try:
+            copy_result = self._run_sp_command(copy_command, self.operations_timeout)
+            status, error = ("SUCCESS", None) if copy_result.returncode == 0 else ("FAILED", copy_result.stderr)
+        except subprocess.TimeoutExpired:
+            status, error = "TIMEOUT", f"Copy command timed out after {self.operations_timeout} seconds"
+        return {"source": container_path, "target": str(host_path), "status": status, "error": error,
+                "time": f"{time.perf_counter() - start:0.3f}s"}
+
+    def _copy_concurrently(self, transfers: list[tuple[str, Path]]) -> list[dict]:
+        """Runs "podman cp" for each (container_path, host_path) pair, at most `transfer_workers` at once"""
+        if len(transfers) == 1 or self.transfer_workers == 1:
+            results = [self._copy_from_container(*transfer) for transfer in transfers]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.transfer_workers, len(transfers))) as pool:
+                results = list(pool.map(lambda transfer: self._copy_from_container(*transfer), transfers))
+        self.transfers.extend(results)
+        return results
+
     def _copy_files_from_container(self):
+        transfers = []
         for host_path, container_path in self.copy_files_config.items():
-            full_host_path = self.context_dir_path.joinpath(host_path)
+            full_host_path = self.host_paths_root.joinpath(host_path)
             full_host_path.parent.mkdir(parents=True, exist_ok=True)
+            transfers.append((container_path, full_host_path))
 
-            copy_command = ["podman", "cp", f"{self.container_name}:{container_path}", str(full_host_path)]
-            try:
-                copy_result = self._run_sp_command(copy_command, self.operations_timeout)
-                if copy_result.returncode != 0:
-                    self.context.logger.warning(f"Failed to copy {container_path} to {host_path}: {copy_result.stderr}")
-                else:
-                    self.context.logger.debug(f"Copied {container_path} to {host_path}")
-            except subprocess.TimeoutExpired:
-                self.context.logger.warning(f"Copy command timed out after {self.operations_timeout} seconds")
+        for result in self._copy_concurrently(transfers):
+            if result["status"] == "SUCCESS":
+                self.context.logger.debug(f"Copied {result['source']} to {result['target']} in {result['time']}")
+            else:
+                self.context.logger.warning(f"Failed to copy {result['source']} to {result['target']}: {result['error']}")
 
     def _extract_params_from_container(self):
-        import tempfile
         with tempfile.TemporaryDirectory() as temp_dir:
-            for container_file_path, output_key_base in self.extract_params_config.items():
+            # Files are copied concurrently, so each one gets its own name prefix in case of same base names
+            transfers = [(container_file_path, Path(temp_dir) / f"{index}_{Path(container_file_path).name}")
+                         for index, container_file_path in enumerate(self.extract_params_config)]
+            results = self._copy_concurrently(transfers)
+            for (container_file_path, output_key_base), result in zip(self.extract_params_config.items(), results):
                 try:
-                    temp_file_path = Path(temp_dir) / Path(container_file_path).name
-                    copy_command = ["podman", "cp", f"{self.container_name}:{container_file_path}", str(temp_file_path)]
-                    copy_result = self._run_sp_command(copy_command, self.operations_timeout)
-                    if copy_result.returncode != 0:
-                        self.context.logger.warning(f"Failed to copy file {container_file_path} for params-extraction: {copy_result.stderr}")
+                    temp_file_path = Path(result["target"])
+                    if result["status"] != "SUCCESS":
+                        self.context.logger.warning(f"Failed to copy file {container_file_path} for params-extraction: {result['error']}")
                         continue
                     if not temp_file_path.exists():
                         self.context.logger.warning(f"File {container_file_path} for params-extraction not found after copy")
                         continue
-                    if file_content := self._parse_custom_file_params(temp_file_path):
+                    if file_content := self._parse_custom_file_params(temp_file_path, container_file_path):
                         base_key = output_key_base if output_key_base else container_file_path.replace('/','_').replace('.', '_')
-                        self.context.output_param_set(f"params.extracted_output.{base_key}", file_content)
+                        self._output_param_set(f"extracted_output.{base_key}", file_content)
                 except Exception as e:
                     self.context.logger.warning(f"Failed to extract params from file {container_file_path}: {e}")
+        if self.parsed_params_files:
+            self._output_param_set("extracted_files", self.parsed_params_files)
 
-    def _parse_custom_file_params(self, file_path: Path):
+    def _parse_custom_file_params(self, file_path: Path, source: str = None):
+        """
+        Reads file once, and parses it as JSON, YAML or ENV file - format is detected by extension or by content.
+        If detected format doesn't fit, other ones are tried (from already read content), and stripped text is returned at last.
+        """
+        start = time.perf_counter()
+        stats = {"file": source or str(file_path), "size": None, "format": None}
         try:
-            try:
-                import json
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
-
-            try:
-                import yaml
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return yaml.safe_load(f)
-            except:
-                pass
-
-            try:
-                key_values = {}
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and not line.startswith('#') and '=' in line:
-                            key, value = line.split('=', 1)
-                            key_values[key.strip()] = value.strip()
-                return key_values if key_values else None
-            except:
-                pass
-
+            stats["size"] = file_path.stat().st_size
+            if stats["size"] > self.params_file_max_size:
+                stats["skipped"] = "too large"
+                self.context.logger.warning(f"Custom-params file {file_path} is too large ({stats['size']} bytes, "
+                                            f"max is {self.params_file_max_size}), skipping it")
+                return None
             with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read().strip()
+                content = f.read()
+            detected_format = self._detect_params_file_format(file_path, content)
+            for file_format in [detected_format, *(f for f in PodmanRunImage.PARAMS_FILE_FORMATS if f != detected_format)]:
+                try:
+                    result = getattr(self, f"_parse_{file_format}_params")(content)
+                except Exception:
+                    continue
+                if file_format != "env" or result is not None:
+                    stats["format"] = file_format
+                    return result
+            stats["format"] = "text"
+            return content.strip()
 
         except Exception as e:
             self.context.logger.warning(f"Failed to parse custom-params file {file_path}: {e}")
             return None
+        finally:
+            stats["time"] = f"{time.perf_counter() - start:0.3f}s"
+            self.parsed_params_files.append(stats)
+
+    @staticmethod
+    def _detect_params_file_format(file_path: Path, content: str) -> str:
+        if file_format := PodmanRunImage.PARAMS_FILE_EXTENSIONS.get(file_path.suffix.lower()):
+            return file_format
+        head = content[:4096].lstrip()
+        if head[:1] in ("{", "["):
+            return "json"
+        first_line = next((line.strip() for line in head.splitlines() if line.strip() and not line.lstrip().startswith("#")), "")
+        if "=" in first_line and ":" not in first_line.split("=", 1)[0]:
+            return "env"
+        return "yaml"
+
+    @staticmethod
+    def _parse_json_params(content: str):
+        import json
+        return json.loads(content)
+
+    @staticmethod
+    def _parse_yaml_params(content: str):
+        import yaml
+        # C-accelerated loader is several times faster for large files, when PyYAML is built with libyaml
+        return yaml.load(content, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+    @staticmethod
+    def _parse_env_params(content: str):
+        key_values = {}
+        for line in content.splitlines():
+            line = line.strip()
+            if line and not line.startswith('#') and '=' in line:
+                key, value = line.split('=', 1)
+                key_values[key.strip()] = value.strip()
+        return key_values if key_values else None
 
     def _write_stdout_files(self, stdout: str, stderr: str):
         (self.output_files_path / "container_stdout.txt").write_text(stdout, encoding='utf-8')
         (self.output_files_path / "container_stderr.txt").write_text(stderr, encoding='utf-8')
 
-    def _post_execute(self, output: subprocess.CompletedProcess):
-        self.context.output_param_set("params.execution_time", f"{self.execution_time:0.3f}s")
-        self.context.output_param_set("params.return_code", output.returncode)
+    def _output_param_set(self, name: str, value):
+        """Sets output param under "params" (or under result section of matrix entry), containers of matrix run concurrently"""
+        with self._output_lock:
+            self.context.output_param_set(f"{self.output_params_prefix}.{name}", value)
+
+    def _process_output(self, output: subprocess.CompletedProcess):
+        self._output_param_set("execution_time", f"{self.execution_time:0.3f}s")
+        self._output_param_set("return_code", output.returncode)
 
-        if self.save_stdout_to_logs:
+        # In streaming mode, output is already written into logs and files as it arrived
+        if self.save_stdout_to_logs and not self.stream_output:
             if output.stdout:
                 self.context.logger.debug(f"Container stdout:\n{output.stdout}")
             if output.stderr:
                 self.context.logger.debug(f"Container stderr:\n{output.stderr}")
 
-        if self.save_stdout_to_files:
+        if self.save_stdout_to_files and not self.stream_output:
             self._write_stdout_files(output.stdout, output.stderr)
 
         if self.save_stdout_to_params:
-            self.context.output_param_set("params.stdout", output.stdout)
-            self.context.output_param_set("params.stderr", output.stderr)
+            self._output_param_set("stdout", output.stdout)
+            self._output_param_set("stderr", output.stderr)
 
+        transfers_start = time.perf_counter()
         if self.extract_params_config:
             self._extract_params_from_container()
 
         if self.copy_files_config:
             self._copy_files_from_container()
 
+        if self.transfers:
+            self._output_param_set("transfers", self.transfers)
+            self._output_param_set("transfers_time", f"{time.perf_counter() - transfers_start:0.3f}s")
+
         if output.returncode not in self.expected_return_codes:
-            raise PodmanException(output.stderr)
+            raise PodmanException(output.stderr, output.returncode)
 
-    def _execute(self):
-        self.context.logger.info(f"Running podman image \"{self.image}\"...")
+    def _save_resource_usage(self, sampler):
+        self._output_param_set("resource_usage", sampler.summary())
+        try:
+            self.output_files_path.mkdir(parents=True, exist_ok=True)
+            sampler.write_csv(self.output_files_path / "container_resource_usage.csv")
+        except OSError as e:
+            self.context.logger.warning(f"Failed to save container resource usage: {e}")
+
+    def _run_container(self):
         start = time.perf_counter()
+        self.step_dir = None
+        sampler = None
+        command_finished = False
         try:
-            output = self._run_sp_command(self._build_podman_command())
+            if self.reuse_container:
+                command = self._acquire_pooled_container()
+                self.context.logger.info(f"Running command in warm container {self.container_name} of image \"{self.image}\"...")
+            else:
+                command = self._build_podman_command()
+                self.context.logger.info(f"Running podman image \"{self.image}\" in container {self.container_name}...")
+            if self.resource_sampling_interval > 0:
+                from qubership_cli_samples.podman.resource_sampler import ResourceSampler
+                sampler = ResourceSampler(self.container_name, self.resource_sampling_interval, self.operations_timeout,
+                                          logger=self.context.logger)
+                sampler.start()
+            try:
+                if self.stream_output:
+                    output = self._run_streaming_command(command)
+                else:
+                    output = self._run_sp_command(command)
+                command_finished = True
+            finally:
+                if sampler:
+                    sampler.stop()
+                    self._save_resource_usage(sampler)
             self.execution_time = time.perf_counter() - start
             self.context.logger.info(
-                f"Container finished with code: {output.returncode}"
+                f"Container {self.container_name} finished with code: {output.returncode}"
                 f"\nExecution time: {self.execution_time:0.3f}s"
             )
-            self._post_execute(output)
+            self._process_output(output)
+            return output
+
+        except ContainerPoolException as e:
+            self.context.logger.error(f"Failed to prepare warm container: {e}")
+            raise
 
         except subprocess.TimeoutExpired:
             self.context.logger.error(f"Container execution timed out after {self.timeout} seconds")
@@ -293,12 +548,114 @@ class PodmanRunImage(ExecutionCommand):
             raise
 
         finally:
-            if self.remove_container:
+            if self.step_dir:
+                self._release_pooled_container(discard=not command_finished)
+            elif self.remove_container and not self.reuse_container:
                 remove_output = subprocess.run(["podman", "rm", "-f", self.container_name], capture_output=True)
                 if remove_output.returncode != 0:
                     self.context.logger.warning(f"Failed to remove container {self.container_name}:\n{remove_output.stdout}\n{remove_output.stderr}")
+
+    def _matrix_entry_command(self, index: int, entry: dict) -> "PodmanRunImage":
+        """Returns shallow copy of this command, configured to run single matrix entry"""
+        name = str(entry.get("name", f"shard_{index}"))
+        entry_command = copy.copy(self)
+        entry_command.name = name
+        entry_command.container_name = f"podman_{name}_{uuid.uuid4()}"
+        entry_command.command = entry.get("command", self.command)
+        entry_command.env_vars_config = {**self.env_vars_config,
+                                         "explicit": {**self.env_vars_config.get("explicit", {}), **entry.get("env_vars", {})}}
+        entry_command.mounts_config = {**self.mounts_config, **entry.get("mounts", {})}
+        entry_command.output_files_path = self.output_files_path.joinpath(name).resolve()
+        entry_command.host_paths_root = entry_command.output_files_path
+        entry_command.output_params_prefix = f"params.matrix_results.{name}"
+        entry_command.env_file_name = f"{name}.env"
+        entry_command.transfers = []
+        entry_command.parsed_params_files = []
+        return entry_command
+
+    def _run_matrix_entry(self, entry_command: "PodmanRunImage") -> dict:
+        entry_command.output_files_path.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        try:
+            output = entry_command._run_container()
+            return {"name": entry_command.name, "status": "SUCCESS", "return_code": output.returncode,
+                    "time": f"{time.perf_counter() - start:0.3f}s"}
+        except subprocess.TimeoutExpired:
+            return {"name": entry_command.name, "status": "TIMEOUT", "return_code": None,
+                    "time": f"{time.perf_counter() - start:0.3f}s"}
+        except Exception as e:
+            return_code = e.returncode if isinstance(e, PodmanException) else None
+            return {"name": entry_command.name, "status": "FAILED", "return_code": return_code, "error": str(e),
+                    "time": f"{time.perf_counter() - start:0.3f}s"}
+
+    def _execute_matrix(self):
+        entry_commands = [self._matrix_entry_command(index, entry) for index, entry in enumerate(self.matrix, start=1)]
+        self.context.logger.info(f"Running {len(entry_commands)} containers of image \"{self.image}\", at most {self.max_parallel} at once...")
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(self.max_parallel, len(entry_commands))) as pool:
+            results = list(pool.map(self._run_matrix_entry, entry_commands))
+
+        summary = {
+            "total": len(results),
+            "succeeded": sum(1 for result in results if result["status"] == "SUCCESS"),
+            "failed": sum(1 for result in results if result["status"] != "SUCCESS"),
+            "return_codes": {result["name"]: result["return_code"] for result in results},
+            "execution_time": f"{time.perf_counter() - start:0.3f}s",
+        }
+        self.context.output_param_set("params.matrix_summary", summary)
+        self.output_files_path.mkdir(parents=True, exist_ok=True)
+        with open(self.output_files_path.joinpath("matrix_summary.json"), 'w', encoding='utf-8') as f:
+            json.dump({**summary, "containers": results}, f, indent=2)
+        self.context.logger.info(f"Matrix finished: {summary['succeeded']} of {summary['total']} containers succeeded"
+                                 f"\nExecution time: {summary['execution_time']}")
+        if summary["failed"]:
+            failed = [result["name"] for result in results if result["status"] != "SUCCESS"]
+            raise PodmanException(f"Containers failed: {', '.join(failed)}")
+
+    def _execute(self):
+        try:
+            if self.matrix:
+                self._execute_matrix()
+            else:
+                self._run_container()
+        finally:
             self.context.output_params_save()
 
 
+class PodmanPoolCleanup(ExecutionCommand):
+    """
+        Removes warm containers (see "reuse_container" of PodmanRunImage) that are idle for longer than their "idle_timeout".
+        Steps using the pool do this too, but idle containers are only removed by this command once no more steps come.
+
+        Input Parameters Structure (this structure is expected inside "input_params.params" block):
+        {
+            "pool_state_dir": "/tmp/qubership_podman_pool",  # OPTIONAL: Same folder as used by PodmanRunImage
+            "operations_timeout": "15",  # OPTIONAL: Timeout for single "podman" call
+        }
+
+        Output Parameters:
+            - params.evicted: Names of removed containers
+    """
+
+    def _validate(self):
+        names = [
+            "paths.input.params",
+            "paths.output.params",
+        ]
+        if not self.context.validate(names):
+            return False
+        self.pool_state_dir = self.context.input_param_get("params.pool_state_dir", DEFAULT_POOL_STATE_DIR)
+        self.operations_timeout = float(self.context.input_param_get("params.operations_timeout", 15))
+        return True
+
+    def _execute(self):
+        evicted = ContainerPool(self.pool_state_dir, self.operations_timeout, logger=self.context.logger).evict_idle()
+        self.context.logger.info(f"Removed {len(evicted)} idle pool containers")
+        self.context.output_param_set("params.evicted", evicted)
+        self.context.output_params_save()
+
+
 class PodmanException(Exception):
-    pass
+    def __init__(self, message, returncode: int = None):
+        super().__init__(message)
+        self.returncode = returncode
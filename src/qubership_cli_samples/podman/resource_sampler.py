@@ -0,0 +1,168 @@
+import csv, json, logging, re, subprocess, threading, time
+
+_SIZE_PATTERN = re.compile(r'^\s*([\d.]+)\s*([kKMGTP]?i?B)?\s*$')
+_SIZE_UNITS = {"": 1, "B": 1, "kB": 1000, "KB": 1000, "MB": 1000 ** 2, "GB": 1000 ** 3, "TB": 1000 ** 4, "PB": 1000 ** 5,
+               "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3, "TiB": 1024 ** 4, "PiB": 1024 ** 5}
+_GO_DURATION_PATTERN = re.compile(r'([\d.]+)(h|ms|m|s|us|µs|ns)')
+_GO_DURATION_UNITS = {"h": 3600, "m": 60, "s": 1, "ms": 0.001, "us": 1e-6, "µs": 1e-6, "ns": 1e-9}
+
+
+def parse_size(value: str) -> int:
+    """Converts size printed by podman (e.g. "1.606MB", "12KiB", "0B") into bytes, returns None if it's not a size"""
+    match = _SIZE_PATTERN.match(str(value))
+    if not match or (unit := match.group(2) or "") not in _SIZE_UNITS:
+        return None
+    try:
+        return round(float(match.group(1)) * _SIZE_UNITS[unit])
+    except ValueError:
+        return None
+
+
+def parse_size_pair(value: str) -> tuple:
+    """Converts "<input> / <output>" pair (e.g. net or block I/O) into bytes"""
+    parts = str(value).split("/")
+    return (parse_size(parts[0]), parse_size(parts[1])) if len(parts) == 2 else (None, None)
+
+
+def parse_go_duration(value: str) -> float:
+    """Converts Go duration string (e.g. "1m2.5s", "350ms") into seconds, returns None if it's not a duration"""
+    parts = _GO_DURATION_PATTERN.findall(str(value))
+    if not parts:
+        return None
+    return sum(float(number) * _GO_DURATION_UNITS[unit] for number, unit in parts)
+
+
+class ResourceSampler:
+    """
+    Reads stream of `podman stats --format json` for single container in background thread, while it's running.
+
+    Single long-running `podman stats` process reports every `interval` (whole seconds, podman doesn't support fractions),
+    it's restarted if it exits (e.g. container isn't created yet). CPU usage is computed from growth of container's
+    total CPU time between samples (so it's precise regardless of how podman averages "cpu_percent"), memory is sampled
+    as is, and block/network I/O are cumulative counters. Samples that fail (e.g. cgroups are disabled) are skipped.
+    """
+
+    CSV_COLUMNS = ["elapsed", "cpu_percent", "mem_bytes", "mem_percent", "net_rx_bytes", "net_tx_bytes",
+                   "block_read_bytes", "block_write_bytes", "pids"]
+
+    def __init__(self, container_name: str, interval: float, operations_timeout: float = 15, logger: logging.Logger = None):
+        self.container_name = container_name
+        self.interval = max(1, round(interval))
+        self.operations_timeout = operations_timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self.samples = []
+        self.failed_polls = 0
+        self._stop = threading.Event()
+        # guards samples and stats process: nothing is added after `stop()`, even if thread didn't finish in time
+        self._lock = threading.Lock()
+        self._process = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._start = None
+        self._last_cpu = None
+
+    def start(self):
+        self._start = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._stop.set()
+            if self._process:
+                self._process.terminate()
+        self._thread.join(self.operations_timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._read_stream()
+            except Exception as e:
+                self._add_sample(None)
+                self.logger.debug(f"Failed to get stats of container {self.container_name}: {e}")
+            self._stop.wait(self.interval)
+
+    def _read_stream(self):
+        with self._lock:
+            if self._stop.is_set():
+                return
+            self._process = subprocess.Popen(["podman", "stats", "--format", "json", "--no-reset", "--interval",
+                                              str(self.interval), self.container_name],
+                                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        decoder, report = json.JSONDecoder(), ""
+        with self._process as process:
+            # each report is (indented) JSON array, so it can be decoded only when line with its closing bracket is read
+            for line in process.stdout:
+                report += line
+                if not line.rstrip().endswith("]") or (start := report.find("[")) < 0:
+                    continue
+                try:
+                    stats, _ = decoder.raw_decode(report, start)
+                except json.JSONDecodeError:
+                    continue
+                report = ""
+                if stats:
+                    self._add_sample(self._parse_stats(stats[0], time.perf_counter() - self._start))
+        if process.returncode != 0 and not self._stop.is_set():
+            self._add_sample(None)
+
+    def _add_sample(self, sample):
+        """Adds parsed sample, or counts failed one if it's None"""
+        with self._lock:
+            if self._stop.is_set():
+                return
+            if sample is None:
+                self.failed_polls += 1
+            else:
+                self.samples.append(sample)
+
+    def _parse_stats(self, stats: dict, elapsed: float) -> dict:
+        cpu_percent = None
+        if (cpu_time := parse_go_duration(stats.get("cpu_time", ""))) is not None:
+            if self._last_cpu and elapsed > self._last_cpu[0]:
+                cpu_percent = round(max(0.0, cpu_time - self._last_cpu[1]) / (elapsed - self._last_cpu[0]) * 100, 2)
+            self._last_cpu = (elapsed, cpu_time)
+        net_rx, net_tx = parse_size_pair(stats.get("net_io", ""))
+        block_read, block_write = parse_size_pair(stats.get("block_io", ""))
+        mem_percent = str(stats.get("mem_percent", "")).rstrip("%")
+        return {
+            "elapsed": round(elapsed, 3),
+            "cpu_percent": cpu_percent,
+            "mem_bytes": parse_size_pair(stats.get("mem_usage", ""))[0],
+            "mem_percent": float(mem_percent) if mem_percent.replace(".", "", 1).isdigit() else None,
+            "net_rx_bytes": net_rx,
+            "net_tx_bytes": net_tx,
+            "block_read_bytes": block_read,
+            "block_write_bytes": block_write,
+            "pids": int(stats["pids"]) if str(stats.get("pids", "")).isdigit() else None,
+        }
+
+    def write_csv(self, path):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=ResourceSampler.CSV_COLUMNS)
+            writer.writeheader()
+            writer.writerows(self.samples)
+
+    def summary(self) -> dict:
+        def _values(column):
+            return [sample[column] for sample in self.samples if sample[column] is not None]
+
+        def _avg_peak(column):
+            values = _values(column)
+            return {"avg": round(sum(values) / len(values), 2), "peak": max(values)} if values else None
+
+        def _last(column):
+            values = _values(column)
+            return values[-1] if values else None
+
+        return {
+            "samples": len(self.samples),
+            "failed_samples": self.failed_polls,
+            "interval": self.interval,
+            "cpu_percent": _avg_peak("cpu_percent"),
+            "mem_bytes": _avg_peak("mem_bytes"),
+            "mem_percent": _avg_peak("mem_percent"),
+            "pids": _avg_peak("pids"),
+            "net_rx_bytes": _last("net_rx_bytes"),
+            "net_tx_bytes": _last("net_tx_bytes"),
+            "block_read_bytes": _last("block_read_bytes"),
+            "block_write_bytes": _last("block_write_bytes"),
+        }
@@ -0,0 +1,195 @@
+import contextvars, json, logging, os, threading, time
+
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Comma-separated list of additional captures: "cprofile", "tracemalloc"
+PROFILER_CAPTURE_ENV = "PIPELINES_DECLARATIVE_EXECUTOR_PROFILER_CAPTURE"
+
+# Wait functions are patched once for all profilers running in process (e.g. overlapping runs in threads),
+# and wrappers pass waits to profiler of current context
+_current_profiler = contextvars.ContextVar("current_profiler", default=None)
+_active_profilers = []
+_patch_lock = threading.Lock()
+_patched_originals = []
+_wait_guard = threading.local()
+
+
+class CommandProfiler:
+    """
+    Collects per-phase timings of a single command run and writes them as JSON into context logs folder.
+
+    Phases: common imports, command module import, command init (context loading), `_validate`, `_execute`,
+    `output_params_save` (phases may nest, e.g. `output_params_save` is usually called from `_execute`).
+    Time spent waiting for subprocesses and HTTP responses is collected separately under "waits".
+    """
+
+    STATS_FILE_NAME = "profiler_stats.json"
+    CPROFILE_FILE_NAME = "profiler_cprofile.prof"
+    TRACEMALLOC_TOP_COUNT = 20
+
+    def __init__(self, command_name: str, process_start_time: float = None):
+        self.command_name = command_name
+        self._lock = threading.Lock()
+        self.phases = {}
+        self.calls = {}
+        self.waits = {}
+        self.stats = {
+            "command": command_name,
+            "pid": os.getpid(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+        }
+        if process_start_time is not None:
+            self._add_phase("common_imports", time.perf_counter() - process_start_time)
+        self.captures = [c.strip().lower() for c in os.getenv(PROFILER_CAPTURE_ENV, "").split(",") if c.strip()]
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add_phase(name, time.perf_counter() - start)
+
+    def run(self, create_command, load_class=None):
+        """Creates and runs command, collecting its phases. Stats are saved even if command fails"""
+        if load_class:
+            with self.phase("command_import"):
+                load_class()
+        with self.phase("command_init"):
+            command = create_command()
+        self.stats["command_class"] = type(command).__name__
+        self._attach(command)
+
+        profile = None
+        if "cprofile" in self.captures:
+            import cProfile
+            profile = cProfile.Profile()
+        if "tracemalloc" in self.captures:
+            import tracemalloc
+            tracemalloc.start()
+
+        start = time.perf_counter()
+        try:
+            with self._capture_waits():
+                if profile:
+                    profile.enable()
+                command.run()
+        except SystemExit as e:
+            self.stats["exit_code"] = e.code
+            raise
+        finally:
+            if profile:
+                profile.disable()
+            self._add_phase("run", time.perf_counter() - start)
+            self._save(command, profile)
+
+    def _attach(self, command):
+        command._validate = self._timed("validate", command._validate)
+        command._execute = self._timed("execute", command._execute)
+        command.context.output_params_save = self._timed("output_params_save", command.context.output_params_save)
+
+    def _timed(self, name: str, func):
+        def wrapper(*args, **kwargs):
+            with self.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def _add_phase(self, name: str, seconds: float):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0) + seconds * 1_000
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def _add_wait(self, kind: str, seconds: float):
+        with self._lock:
+            wait = self.waits.setdefault(kind, {"count": 0, "total_ms": 0, "max_ms": 0})
+            wait["count"] += 1
+            wait["total_ms"] += seconds * 1_000
+            wait["max_ms"] = max(wait["max_ms"], seconds * 1_000)
+
+    @contextmanager
+    def _capture_waits(self):
+        """Collects waits of current context, and of threads without profiler in their context while it's the only active one"""
+        token = _current_profiler.set(self)
+        with _patch_lock:
+            if not _active_profilers:
+                _patch_waits()
+            _active_profilers.append(self)
+        try:
+            yield
+        finally:
+            with _patch_lock:
+                _active_profilers.remove(self)
+                if not _active_profilers:
+                    _unpatch_waits()
+            _current_profiler.reset(token)
+
+    def _save(self, command, profile):
+        path_logs = Path(command.context.path_logs)
+        self.stats["phases_ms"] = {name: round(value, 3) for name, value in self.phases.items()}
+        self.stats["calls"] = self.calls
+        self.stats["waits"] = {kind: {key: round(value, 3) for key, value in wait.items()} for kind, wait in self.waits.items()}
+
+        if profile:
+            try:
+                profile.dump_stats(path_logs.joinpath(CommandProfiler.CPROFILE_FILE_NAME))
+                self.stats["cprofile_file"] = CommandProfiler.CPROFILE_FILE_NAME
+            except Exception as e:
+                logging.warning(f"Failed to save cProfile stats: {e}")
+        if "tracemalloc" in self.captures:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.stats["tracemalloc"] = {
+                "current_kb": round(current / 1024, 1),
+                "peak_kb": round(peak / 1024, 1),
+                "top": [{"location": str(stat.traceback), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+                        for stat in snapshot.statistics("lineno")[:CommandProfiler.TRACEMALLOC_TOP_COUNT]],
+            }
+
+        try:
+            with open(path_logs.joinpath(CommandProfiler.STATS_FILE_NAME), 'w', encoding='utf-8') as fs:
+                json.dump(self.stats, fs, indent=2, default=str)
+        except Exception as e:
+            logging.warning(f"Failed to save profiler stats: {e}")
+
+        logging.info(f"Common imports: {self.phases.get('common_imports', 0)} ms")
+        logging.info(f"Cmd import: {self.phases.get('command_import', 0)} ms")
+        logging.info(f"Cmd run time: {self.phases.get('run', 0)} ms")
+
+
+def _timed_wait(kind: str, func):
+    def wrapper(*args, **kwargs):
+        profiler = _current_profiler.get()
+        if profiler is None and len(_active_profilers) == 1:
+            profiler = _active_profilers[0]
+        # Popen.communicate calls Popen.wait internally, so only the outermost call is counted
+        if profiler is None or getattr(_wait_guard, "active", False):
+            return func(*args, **kwargs)
+        _wait_guard.active = True
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _wait_guard.active = False
+            profiler._add_wait(kind, time.perf_counter() - start)
+    return wrapper
+
+
+def _patch_waits():
+    import subprocess, http.client
+    _patched_originals[:] = [
+        (subprocess.Popen, "wait", subprocess.Popen.wait, "subprocess"),
+        (subprocess.Popen, "communicate", subprocess.Popen.communicate, "subprocess"),
+        (http.client.HTTPConnection, "getresponse", http.client.HTTPConnection.getresponse, "http"),
+    ]
+    for owner, attr, func, kind in _patched_originals:
+        setattr(owner, attr, _timed_wait(kind, func))
+
+
+def _unpatch_waits():
+    for owner, attr, func, _ in _patched_originals:
+        setattr(owner, attr, func)
+    _patched_originals.clear()
@@ -0,0 +1,110 @@
+import html, re, string
+from typing import Iterable, TextIO
+
+from qubership_cli_samples.report.stage_stats import format_duration
+
+# Scheme of absolute URL, see RFC 3986
+_URL_SCHEME_PATTERN = re.compile(r'^\s*([a-zA-Z][a-zA-Z0-9+.\-]*):')
+
+
+def escape(value) -> str:
+    value = str(value)
+    # Most values don't need escaping, and these checks are several times faster than html.escape itself
+    if "&" in value or "<" in value or ">" in value or '"' in value or "'" in value:
+        return html.escape(value, quote=True)
+    return value
+
+
+def safe_href(url) -> str:
+    """Only http(s) and relative links are rendered as links, anything else (e.g. "javascript:") becomes "#" """
+    url = str(url)
+    if (match := _URL_SCHEME_PATTERN.match(url)) and match.group(1).lower() not in ("http", "https"):
+        return "#"
+    return escape(url)
+
+
+def render_stage_row(index: int, stage: dict) -> str:
+    status = escape(stage.get("status", "N/A"))
+    return f"""
+                <tr>
+                    <td>{index}</td>
+                    <td>{escape(stage.get("name", "N/A"))}</td>
+                    <td>{escape(stage.get("type", "N/A"))}</td>
+                    <td class="{status}">{status}</td>
+                    <td>{escape(stage.get("time", "N/A"))}</td>
+                    <td><a href="{safe_href(stage.get("url", "#"))}">{escape(stage.get("url", "N/A"))}</a></td>
+                </tr>
+            """
+
+
+def render_stage_rows(stages: Iterable[dict]) -> Iterable[str]:
+    for index, stage in enumerate(stages, start=1):
+        yield render_stage_row(index, stage)
+
+
+def _status_count_rows(status_counts: dict) -> list[str]:
+    return [f'<tr><td class="{escape(status)}">{escape(status)}</td><td>{count}</td></tr>' for status, count in status_counts.items()]
+
+
+def render_status_counts(status_counts: dict) -> str:
+    return f'<table class="summary">{"".join(_status_count_rows(status_counts))}</table>'
+
+
+def render_summary(summary: dict) -> str:
+    """Table with per-status stage counts and duration statistics, produced by `StageStats.summary`"""
+    rows = _status_count_rows(summary["status_counts"])
+    rows.append(f'<tr><td class="header">Total stages</td><td>{summary["stages_count"]}</td></tr>')
+    if duration := summary["duration"]:
+        rows.append(f'<tr><td class="header">Total duration</td><td>{format_duration(duration["total"])}</td></tr>')
+        rows.append('<tr><td class="header">Stage duration (mean / p50 / p95 / p99 / max)</td><td>'
+                    f'{" / ".join(format_duration(duration[key]) for key in ("mean", "p50", "p95", "p99", "max"))}</td></tr>')
+    return f'<table class="summary">{"".join(rows)}</table>'
+
+
+def render_aggregated_stage_rows(stages: Iterable[dict]) -> Iterable[str]:
+    """Rows of per-stage-name statistics, produced by `AggregateReports`"""
+    def _duration(value):
+        return "N/A" if value is None else format_duration(value)
+
+    for stage in stages:
+        failed_class = ' class="FAILED"' if stage["failures"] else ""
+        yield f"""
+                <tr>
+                    <td>{escape(stage["name"])}</td>
+                    <td>{escape(stage["type"])}</td>
+                    <td>{stage["runs"]}</td>
+                    <td{failed_class}>{stage["failures"]} ({stage["failure_rate"] * 100:0.1f}%)</td>
+                    <td>{_duration(stage["mean"])}</td>
+                    <td>{_duration(stage["p50"])}</td>
+                    <td>{_duration(stage["p95"])}</td>
+                    <td>{_duration(stage["max"])}</td>
+                </tr>
+            """
+
+
+class CompiledTemplate:
+    """
+    `str.format`-style template, parsed into literal parts and fields once.
+
+    Rendering writes parts into output stream one by one: plain fields are HTML-escaped,
+    and "stream" fields (e.g. stage rows) are written chunk by chunk from iterables, without building whole document in memory.
+    """
+
+    def __init__(self, template_str: str):
+        self._formatter = string.Formatter()
+        self.parts = list(self._formatter.parse(template_str))
+        self.fields = {field_name for _, field_name, _, _ in self.parts if field_name is not None}
+
+    def render(self, fs: TextIO, values: dict, streams: dict[str, Iterable[str]] = None):
+        streams = streams or {}
+        for literal, field_name, format_spec, conversion in self.parts:
+            if literal:
+                fs.write(literal)
+            if field_name is None:
+                continue
+            if field_name in streams:
+                fs.writelines(streams[field_name])
+                continue
+            value, _ = self._formatter.get_field(field_name, (), values)
+            value = self._formatter.convert_field(value, conversion)
+            fs.write(escape(self._formatter.format_field(value, format_spec or "")))
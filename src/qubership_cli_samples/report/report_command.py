@@ -1,39 +1,141 @@
-import json
+import gzip, json, os
 
+from array import array
 from pathlib import Path
 from qubership_pipelines_common_library.v1.execution.exec_command import ExecutionCommand
 from importlib import resources
 from qubership_cli_samples import report
+from qubership_cli_samples.report.html_renderer import (CompiledTemplate, render_aggregated_stage_rows, render_stage_rows,
+                                                        render_status_counts, render_summary, safe_href)
+from qubership_cli_samples.report.report_reader import PipelineReportReader
+from qubership_cli_samples.report.stage_stats import StageStats, parse_duration
+from qubership_cli_samples.stats_utils import percentile
+from qubership_cli_samples.report.template_cache import get_template_cache
+
+
+HEADER_KEYS = ["apiVersion", "execution"]
+INCREMENTAL_PARSING_THRESHOLD = 64 * 1024 * 1024
+
+
+def read_pipeline_report(path, parsing_mode: str = "auto"):
+    """
+    Returns (header, stages, stages_count) of pipeline report. In incremental mode (or in "auto" mode for large reports)
+    stages are a generator, and their count is None
+    """
+    if parsing_mode == "incremental" or (parsing_mode == "auto" and os.path.getsize(path) > INCREMENTAL_PARSING_THRESHOLD):
+        reader = PipelineReportReader(path)
+        return reader.read_header(HEADER_KEYS), reader.iter_stages(), None
+    with open(path, 'r', encoding='utf-8') as rd:
+        header = json.load(rd)
+    stages = header.pop("stages", None) or []
+    return header, stages, len(stages)
 
 
 class BuildReport(ExecutionCommand):
+    """
+    Generates "report.html" from "pipeline_report.json" in input files folder.
+
+    Input Parameters (all optional):
+    - params.parsing_mode: "full" loads whole report at once, "incremental" streams stages one by one (memory is bounded by
+      the largest stage, not the whole report), "auto" (default) uses incremental parsing for reports larger than 64 MiB
+    - params.report_mode: "table" renders all stages as static HTML table, "paginated" writes stages into sidecar file
+      and renders them page by page in browser (with filtering by result and sorting by duration),
+      "auto" (default) uses paginated mode for reports with more than 2000 stages (or parsed incrementally)
+    - params.sidecar_format: Format of stages sidecar in paginated mode - "js" (default, also works when report is opened
+      from local disk), "json" or "gzip" (both require report to be served over HTTP)
+    - paths.input.params.report_template: Custom template for table mode, default one is used otherwise
+    - paths.input.params.paginated_report_template: Custom template for paginated mode
+      (all values are HTML-escaped, pipeline url for href attribute is passed as "url_href" - non-http(s) urls become "#")
+
+    Output Parameters:
+    - params.report.mode: "table" or "paginated"
+    - params.report.sidecar: Name of stages sidecar file (paginated mode only)
+    - params.report.stages_count
+    - params.report.status_counts: Number of stages per status
+    - params.report.duration: Total, mean, max and p50/p90/p95/p99 stage duration in seconds (from parsable stage "time" values)
+    - params.report.template_cache: Hits and misses of compiled templates cache in current process (e.g. shared by "run-batch" items)
+    """
+
+    WRITE_BUFFER_SIZE = 1024 * 1024
+    PAGINATION_THRESHOLD = 2000
+    SIDECAR_FILE_NAMES = {"js": "report_stages.js", "json": "report_stages.json", "gzip": "report_stages.json.gz"}
+    SIDECAR_COLUMNS = ["index", "name", "type", "status", "time", "url", "duration"]
 
     def _validate(self):
+        self.parsing_mode = self.context.input_param_get("params.parsing_mode", "auto")
+        if self.parsing_mode not in ("auto", "full", "incremental"):
+            self.context.logger.error(f"Unsupported params.parsing_mode '{self.parsing_mode}', expected: auto, full or incremental")
+            return False
+        self.report_mode = self.context.input_param_get("params.report_mode", "auto")
+        if self.report_mode not in ("auto", "table", "paginated"):
+            self.context.logger.error(f"Unsupported params.report_mode '{self.report_mode}', expected: auto, table or paginated")
+            return False
+        self.sidecar_format = self.context.input_param_get("params.sidecar_format", "js")
+        if self.sidecar_format not in BuildReport.SIDECAR_FILE_NAMES:
+            self.context.logger.error(f"Unsupported params.sidecar_format '{self.sidecar_format}', expected: js, json or gzip")
+            return False
         return True
 
     def _execute(self):
         report_data_path = Path(self.context.input_param_get("paths.input.files")).joinpath("pipeline_report.json")
-        with open(report_data_path, 'r') as rd:
-            report_data = json.load(rd)
-
-        html_template_path = self.context.input_param_get("paths.input.params.report_template", None)
-        html_template_str = self._load_template(html_template_path)
+        header, stages, stages_count = read_pipeline_report(report_data_path, self.parsing_mode)
+        if stages_count is None:
+            self.context.logger.info("Parsing pipeline report incrementally")
 
-        html_content = self._generate_html(report_data, html_template_str)
-        target_path = Path(self.context.input_param_get("paths.output.files")).joinpath("report.html")
-        with open(target_path, 'w') as fs:
-            fs.write(html_content)
+        stats = StageStats()
+        output_folder = Path(self.context.input_param_get("paths.output.files"))
+        paginated = self.report_mode == "paginated" or (
+                self.report_mode == "auto" and (stages_count is None or stages_count > BuildReport.PAGINATION_THRESHOLD))
+        if paginated:
+            sidecar_name = self._write_sidecar(output_folder, stats, stages)
+            html_template_path = self.context.input_param_get("paths.input.params.paginated_report_template", None)
+            template = self._get_template(html_template_path, 'paginated_report_template.html')
+            with open(output_folder.joinpath("report.html"), 'w', encoding='utf-8', buffering=BuildReport.WRITE_BUFFER_SIZE) as fs:
+                template.render(fs, {**self._template_values(header.get("apiVersion", "N/A"), header.get("execution", {})),
+                                     "sidecar": sidecar_name},
+                                {**self._template_streams(header.get("execution", {})), "summary": [render_summary(stats.summary())]})
+        else:
+            sidecar_name = None
+            html_template_path = self.context.input_param_get("paths.input.params.report_template", None)
+            template = self._get_template(html_template_path)
+            with open(output_folder.joinpath("report.html"), 'w', encoding='utf-8', buffering=BuildReport.WRITE_BUFFER_SIZE) as fs:
+                self._write_html(fs, header, stats.collect(stages), template)
 
+        summary = stats.summary()
+        self.context.output_param_set("params.report.mode", "paginated" if paginated else "table")
+        self.context.output_param_set("params.report.sidecar", sidecar_name)
+        self.context.output_param_set("params.report.stages_count", summary["stages_count"])
+        self.context.output_param_set("params.report.status_counts", summary["status_counts"])
+        self.context.output_param_set("params.report.duration", summary["duration"])
+        self.context.output_param_set("params.report.template_cache", get_template_cache().stats())
+        self.context.output_params_save()
         self.context.logger.info("HTML report generated successfully!")
 
-    def _load_template(self, template_path):
+    def _write_sidecar(self, output_folder: Path, stats: StageStats, stages) -> str:
+        """Writes stages as compact rows into sidecar file, collecting their stats on the way"""
+        sidecar_name = BuildReport.SIDECAR_FILE_NAMES[self.sidecar_format]
+        sidecar_path = output_folder.joinpath(sidecar_name)
+        if self.sidecar_format == "gzip":
+            fs = gzip.open(sidecar_path, 'wt', encoding='utf-8', compresslevel=6)
+        else:
+            fs = open(sidecar_path, 'w', encoding='utf-8', buffering=BuildReport.WRITE_BUFFER_SIZE)
+        with fs:
+            if self.sidecar_format == "js":
+                fs.write("window.REPORT_STAGES = ")
+            fs.write(f'{{"columns": {json.dumps(BuildReport.SIDECAR_COLUMNS)}, "rows": [')
+            encode = json.JSONEncoder(ensure_ascii=False, default=str).encode
+            for index, stage in enumerate(stages, start=1):
+                duration = stats.add(stage)
+                fs.write(("\n" if index == 1 else ",\n") + encode(
+                    [index, stage.get("name", "N/A"), stage.get("type", "N/A"), stage.get("status", "N/A"),
+                     stage.get("time", "N/A"), stage.get("url"), duration]))
+            fs.write("\n]}" + (";\n" if self.sidecar_format == "js" else "\n"))
+        return sidecar_name
+
+    def _get_template(self, template_path, default_template='default_report_template.html') -> CompiledTemplate:
+        """Returns compiled template (custom one, or default one from package) from process-wide cache"""
         try:
-            if not template_path:
-                inp_file = resources.files(report) / 'default_report_template.html'
-                with inp_file.open("r", encoding="utf-8") as f:
-                    return f.read()
-            with open(template_path, "r", encoding="utf-8") as template_file:
-                return template_file.read()
+            return get_template_cache().get(template_path or resources.files(report) / default_template)
         except FileNotFoundError:
             self.context.logger.error(f"Template file not found: {template_path}")
             raise
@@ -41,35 +143,172 @@ class BuildReport(ExecutionCommand):
             self.context.logger.error(f"Error loading template file: {template_path}. Error: {str(e)}")
             raise
 
-    def _generate_html(self, report_data, template_str):
-        # Extract execution details
-        execution = report_data.get("execution", {})
-        stages = report_data.get("stages", [])
-
-        # Prepare stages HTML
-        stages_html = ""
-        for index, stage in enumerate(stages, start=1):
-            stages_html += f"""
-                <tr>
-                    <td>{index}</td>
-                    <td>{stage.get("name", "N/A")}</td>
-                    <td>{stage.get("type", "N/A")}</td>
-                    <td class="{stage.get("status", "N/A")}">{stage.get("status", "N/A")}</td>
-                    <td>{stage.get("time", "N/A")}</td>
-                    <td><a href="{stage.get("url", "#")}">{stage.get("url", "N/A")}</a></td>
-                </tr>
-            """
-
-        # Populate the template with data
-        html_report = template_str.format(
-            apiVersion=report_data.get("apiVersion", "N/A"),
-            user=execution.get("user", "Unknown User"),
-            email=execution.get("email", "unknown@example.com"),
-            startedAt=execution.get("startedAt", "N/A"),
-            time=execution.get("time", "N/A"),
-            status=execution.get("status", "N/A"),
-            url=execution.get("url", "#"),
-            stages=stages_html
-        )
-
-        return html_report
+    def _write_html(self, fs, header: dict, stages, template: CompiledTemplate):
+        """Renders report into `fs`, stage rows are streamed from `stages` iterable and all values are HTML-escaped"""
+        template.render(fs, self._template_values(header.get("apiVersion", "N/A"), header.get("execution", {})),
+                        {**self._template_streams(header.get("execution", {})), "stages": render_stage_rows(stages or [])})
+
+    @staticmethod
+    def _template_values(api_version, execution: dict) -> dict:
+        return {
+            "apiVersion": api_version,
+            "user": execution.get("user", "Unknown User"),
+            "email": execution.get("email", "unknown@example.com"),
+            "startedAt": execution.get("startedAt", "N/A"),
+            "time": execution.get("time", "N/A"),
+            "status": execution.get("status", "N/A"),
+            "url": execution.get("url", "#"),
+        }
+
+    @staticmethod
+    def _template_streams(execution: dict) -> dict:
+        """Values that are already safe HTML, written into template as is"""
+        return {"url_href": [safe_href(execution.get("url", "#"))]}
+
+
+FAILED_STATUSES = ("FAILED",)
+
+
+def summarize_report(path) -> dict:
+    """Collects runs, failures and durations per stage name of single pipeline report (executed in worker processes)"""
+    try:
+        header, stages, _ = read_pipeline_report(path)
+        execution = header.get("execution") or {}
+        summary = {"path": str(path), "status": execution.get("status", "N/A"), "startedAt": execution.get("startedAt"),
+                   "time": execution.get("time"), "stages_count": 0, "stages": {}}
+        for stage in stages:
+            summary["stages_count"] += 1
+            entry = summary["stages"].setdefault(str(stage.get("name", "N/A")), {
+                "type": str(stage.get("type", "N/A")), "runs": 0, "failures": 0, "durations": []})
+            entry["runs"] += 1
+            if stage.get("status") in FAILED_STATUSES:
+                entry["failures"] += 1
+            if (duration := parse_duration(stage.get("time"))) is not None:
+                entry["durations"].append(duration)
+        return summary
+    except Exception as e:
+        return {"path": str(path), "error": f"{type(e).__name__}: {e}"}
+
+
+class AggregateReports(BuildReport):
+    """
+    Aggregates many "pipeline_report.json" files (e.g. from hundreds of runs of the same pipeline) into one trend report.
+
+    Reports are found recursively in input files folder and parsed by several worker processes.
+    For every stage name, its number of runs, failure rate and mean/p50/p95/max duration are computed.
+    Results are saved as "aggregated_report.html" and "aggregated_report.json" into output files folder.
+
+    Input Parameters (all optional):
+    - params.report_pattern: Glob pattern of report files, default is "**/pipeline_report.json"
+    - params.workers: Number of worker processes, default is number of CPUs (up to 8)
+    - params.top: How many slowest and most failing stages to put into output params, default is 10
+    - paths.input.params.aggregated_report_template: Custom template, default one is used otherwise
+
+    Output Parameters:
+    - params.aggregate.reports_count
+    - params.aggregate.stage_names_count
+    - params.aggregate.run_status_counts: Number of pipeline runs per overall status
+    - params.aggregate.slowest_stages: Stage names with the highest p95 duration
+    - params.aggregate.most_failing_stages: Stage names with the highest failure rate
+    - params.aggregate.errors: Reports that couldn't be parsed
+    - params.aggregate.files
+    """
+
+    REPORT_FILE_NAME = "aggregated_report"
+
+    def _validate(self):
+        names = ["paths.input.files", "paths.output.files"]
+        if not self.context.validate(names):
+            return False
+        self.report_pattern = self.context.input_param_get("params.report_pattern", "**/pipeline_report.json")
+        self.workers = max(1, int(self.context.input_param_get("params.workers", min(8, os.cpu_count() or 1))))
+        self.top = int(self.context.input_param_get("params.top", 10))
+        return True
+
+    def _execute(self):
+        input_folder = Path(self.context.input_param_get("paths.input.files"))
+        paths = sorted(input_folder.glob(self.report_pattern))
+        self.context.logger.info(f"Aggregating {len(paths)} reports from {input_folder} using {self.workers} workers...")
+        if self.workers == 1 or len(paths) < 2:
+            summaries = [summarize_report(path) for path in paths]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(paths))) as pool:
+                summaries = list(pool.map(summarize_report, paths, chunksize=max(1, len(paths) // (self.workers * 4))))
+
+        errors = [{"path": summary["path"], "error": summary["error"]} for summary in summaries if "error" in summary]
+        for error in errors:
+            self.context.logger.warning(f"Failed to parse report {error['path']}: {error['error']}")
+        summaries = [summary for summary in summaries if "error" not in summary]
+        stages = self._aggregate_stages(summaries)
+        run_status_counts = {}
+        for summary in summaries:
+            run_status_counts[summary["status"]] = run_status_counts.get(summary["status"], 0) + 1
+        started = sorted(str(summary["startedAt"]) for summary in summaries if summary["startedAt"])
+
+        output_folder = Path(self.context.input_param_get("paths.output.files"))
+        output_folder.mkdir(parents=True, exist_ok=True)
+        with open(output_folder.joinpath(f"{AggregateReports.REPORT_FILE_NAME}.json"), 'w', encoding='utf-8') as fs:
+            json.dump({
+                "reports_count": len(summaries),
+                "run_status_counts": run_status_counts,
+                "reports": [{key: summary[key] for key in ("path", "status", "startedAt", "time", "stages_count")}
+                            for summary in summaries],
+                "stages": stages,
+                "errors": errors,
+            }, fs, indent=2, default=str)
+
+        html_template_path = self.context.input_param_get("paths.input.params.aggregated_report_template", None)
+        template = self._get_template(html_template_path, 'aggregated_report_template.html')
+        with open(output_folder.joinpath(f"{AggregateReports.REPORT_FILE_NAME}.html"), 'w', encoding='utf-8',
+                  buffering=BuildReport.WRITE_BUFFER_SIZE) as fs:
+            template.render(fs, {
+                "reports_count": len(summaries),
+                "stage_names_count": len(stages),
+                "first_started": started[0] if started else "N/A",
+                "last_started": started[-1] if started else "N/A",
+                "errors_count": len(errors),
+            }, {
+                "run_statuses": [render_status_counts(run_status_counts)],
+                "stages": render_aggregated_stage_rows(stages),
+            })
+
+        self.context.output_param_set("params.aggregate.reports_count", len(summaries))
+        self.context.output_param_set("params.aggregate.stage_names_count", len(stages))
+        self.context.output_param_set("params.aggregate.run_status_counts", run_status_counts)
+        self.context.output_param_set("params.aggregate.slowest_stages", [
+            {"name": stage["name"], "p95": stage["p95"]} for stage in stages[:self.top] if stage["p95"] is not None])
+        self.context.output_param_set("params.aggregate.most_failing_stages", [
+            {"name": stage["name"], "failure_rate": stage["failure_rate"]}
+            for stage in sorted(stages, key=lambda s: -s["failure_rate"])[:self.top] if stage["failure_rate"] > 0])
+        self.context.output_param_set("params.aggregate.errors", errors)
+        self.context.output_param_set("params.aggregate.files", [f"{AggregateReports.REPORT_FILE_NAME}.html",
+                                                                 f"{AggregateReports.REPORT_FILE_NAME}.json"])
+        self.context.output_params_save()
+        self.context.logger.info(f"Aggregated {len(summaries)} reports ({len(stages)} stage names)")
+
+    @staticmethod
+    def _aggregate_stages(summaries: list[dict]) -> list[dict]:
+        """Merges per-report stage data, returns stats per stage name, slowest (by p95) first"""
+        merged = {}
+        for summary in summaries:
+            for name, entry in summary["stages"].items():
+                stage = merged.setdefault(name, {"type": entry["type"], "runs": 0, "failures": 0, "durations": array('d')})
+                stage["runs"] += entry["runs"]
+                stage["failures"] += entry["failures"]
+                stage["durations"].extend(entry["durations"])
+        stages = []
+        for name, stage in merged.items():
+            ordered = sorted(stage["durations"])
+            stages.append({
+                "name": name,
+                "type": stage["type"],
+                "runs": stage["runs"],
+                "failures": stage["failures"],
+                "failure_rate": round(stage["failures"] / stage["runs"], 4),
+                "mean": round(sum(ordered) / len(ordered), 3) if ordered else None,
+                "p50": round(percentile(ordered, 50), 3) if ordered else None,
+                "p95": round(percentile(ordered, 95), 3) if ordered else None,
+                "max": round(ordered[-1], 3) if ordered else None,
+            })
+        return sorted(stages, key=lambda s: (s["p95"] is None, -(s["p95"] or 0), s["name"]))
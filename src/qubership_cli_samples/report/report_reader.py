@@ -0,0 +1,142 @@
+import codecs, json, re
+from typing import Iterator
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class _JsonStream:
+    """
+    Minimal pull parser over UTF-8 binary stream: top-level structure is walked by hand, values are decoded by `json` one by one.
+    Stream is decoded manually (not via text mode file) to know byte offset of current position, see `offset()`
+    """
+
+    def __init__(self, fs, chunk_size: int):
+        self.fs = fs
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._bytes_read = fs.tell()
+
+    def _fill(self, size: int):
+        raw = self.fs.read(size)
+        self._bytes_read += len(raw)
+        data = self._text_decoder.decode(raw, final=not raw)
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        self.eof = not raw
+
+    def offset(self) -> int:
+        """Byte offset of current position in file (suitable for `seek`)"""
+        pending_bytes = len(self._text_decoder.getstate()[0])
+        return self._bytes_read - pending_bytes - len(self.buffer[self.pos:].encode("utf-8"))
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                return ""
+            self._fill(self.chunk_size)
+
+    def expect(self, char: str):
+        if (actual := self.peek()) != char:
+            raise ValueError(f"Expected '{char}' at position {self.pos} of report, got '{actual}'")
+        self.pos += 1
+
+    def decode_value(self):
+        # Value may end right at the end of buffer (e.g. number), so it's decoded only when followed by anything, or at EOF
+        read_size = self.chunk_size
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill(read_size)
+            read_size *= 2
+
+    def iter_object_keys(self) -> Iterator[str]:
+        """Yields keys of object, caller has to consume value of each key before getting the next one"""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.decode_value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("}")
+            return
+
+    def iter_array(self) -> Iterator:
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.decode_value()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("]")
+            return
+
+
+class PipelineReportReader:
+    """
+    Reads `pipeline_report.json` incrementally: memory usage is bounded by read chunk and the largest single stage,
+    instead of the whole document.
+
+    Top-level values are decoded one by one, and elements of top-level "stages" array are streamed one at a time.
+    `read_header` remembers byte offset of "stages" array if it gets there, so `iter_stages` seeks right to it instead of
+    walking the document from the start again (stages preceding header values are still decoded once to be skipped -
+    `json` decoder is faster than scanning brackets in Python).
+    """
+
+    STAGES_KEY = "stages"
+
+    def __init__(self, path, chunk_size: int = 1024 * 1024):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._stages_offset = None
+
+    def read_header(self, keys=None) -> dict:
+        """Returns top-level values except stages. Stops as soon as all `keys` are found (stages are skipped one by one otherwise)"""
+        header = {}
+        with open(self.path, 'rb') as fs:
+            stream = _JsonStream(fs, self.chunk_size)
+            for key in stream.iter_object_keys():
+                if key == PipelineReportReader.STAGES_KEY and stream.peek() == "[":
+                    self._stages_offset = stream.offset()
+                    for _ in stream.iter_array():
+                        pass
+                else:
+                    header[key] = stream.decode_value()
+                if keys and all(k in header for k in keys):
+                    break
+        header.pop(PipelineReportReader.STAGES_KEY, None)
+        return header
+
+    def iter_stages(self) -> Iterator[dict]:
+        with open(self.path, 'rb') as fs:
+            if self._stages_offset is not None:
+                fs.seek(self._stages_offset)
+                yield from _JsonStream(fs, self.chunk_size).iter_array()
+                return
+            stream = _JsonStream(fs, self.chunk_size)
+            for key in stream.iter_object_keys():
+                if key == PipelineReportReader.STAGES_KEY and stream.peek() == "[":
+                    yield from stream.iter_array()
+                    return
+                stream.decode_value()
@@ -0,0 +1,82 @@
+import re
+from array import array
+from typing import Iterable, Iterator
+
+from qubership_cli_samples.stats_utils import PERCENTILES, percentile
+
+_DURATION_PART_PATTERN = re.compile(
+    r'(\d+(?:\.\d+)?)\s*(ms|milliseconds?|s|secs?|seconds?|m|mins?|minutes?|h|hrs?|hours?|d|days?)(?![a-z])', re.IGNORECASE)
+_DURATION_CLOCK_PATTERN = re.compile(r'^(?:(\d+):)?(\d+):(\d+(?:\.\d+)?)$')
+_UNIT_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(value):
+    """Converts stage "time" (e.g. 12, "1.5s", "350ms", "1m 5s", "1m5s", "1h 2m", "01:02:03") into seconds, returns None if it's not a duration"""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = str(value).strip()
+    if value[:-1].isdigit() and value[-1:] == "s":
+        return float(value[:-1])
+    if match := _DURATION_CLOCK_PATTERN.match(value):
+        hours, minutes, seconds = match.groups()
+        return int(hours or 0) * 3600 + int(minutes) * 60 + float(seconds)
+    parts = _DURATION_PART_PATTERN.findall(value)
+    if parts and not _DURATION_PART_PATTERN.sub("", value).strip(" ,"):
+        total = 0.0
+        for number, unit in parts:
+            unit = unit.lower()
+            total += float(number) * _UNIT_SECONDS["ms" if unit == "ms" or unit.startswith("mil") else unit[0]]
+        return total
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def format_duration(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:0.1f}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{int(minutes)}m {seconds:0.0f}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{int(hours)}h {int(minutes)}m {seconds:0.0f}s"
+
+
+class StageStats:
+    """Per-status counts and duration percentiles, collected while stages are streamed through `collect`"""
+
+    def __init__(self):
+        self.count = 0
+        self.status_counts = {}
+        self.durations = array('d')
+
+    def add(self, stage: dict):
+        """Returns parsed duration of stage (in seconds), or None"""
+        self.count += 1
+        status = str(stage.get("status", "N/A"))
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        duration = parse_duration(stage.get("time"))
+        if duration is not None:
+            self.durations.append(duration)
+        return duration
+
+    def collect(self, stages: Iterable[dict]) -> Iterator[dict]:
+        for stage in stages:
+            self.add(stage)
+            yield stage
+
+    def summary(self) -> dict:
+        duration = {}
+        if self.durations:
+            ordered = sorted(self.durations)
+            duration = {"total": sum(ordered), "mean": sum(ordered) / len(ordered), "max": ordered[-1]}
+            duration.update({f"p{pct}": percentile(ordered, pct) for pct in PERCENTILES})
+        return {
+            "stages_count": self.count,
+            "status_counts": dict(sorted(self.status_counts.items(), key=lambda item: -item[1])),
+            "duration": {key: round(value, 3) for key, value in duration.items()},
+            "durations_count": len(self.durations),
+        }
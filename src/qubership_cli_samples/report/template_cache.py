@@ -0,0 +1,80 @@
+import hashlib, os, threading
+from collections import OrderedDict
+from pathlib import Path
+
+from qubership_cli_samples.report.html_renderer import CompiledTemplate
+
+
+class TemplateCache:
+    """
+    Cache of compiled report templates, shared by all report commands running in the same process (e.g. batch items).
+
+    Compiled templates are kept in bounded in-memory LRU, keyed by SHA-256 of template content.
+    File path, mtime and size are remembered next to content hash, so unchanged templates are served without even reading them.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._templates = OrderedDict()
+        self._file_hashes = {}
+        self._lock = threading.Lock()
+
+    def get(self, source) -> CompiledTemplate:
+        """Returns compiled template from `source` - file path or `importlib.resources` Traversable"""
+        file_key = None
+        if isinstance(source, str):
+            source = Path(source)
+        if isinstance(source, Path):
+            file_stat = source.stat()
+            file_key = (os.path.abspath(source), file_stat.st_mtime_ns, file_stat.st_size)
+            with self._lock:
+                content_hash = self._file_hashes.get(file_key[0], (None, None))
+                if content_hash[0] == file_key[1:] and (template := self._lookup(content_hash[1])):
+                    return template
+
+        with source.open("r", encoding="utf-8") as f:
+            template_str = f.read()
+        content_hash = hashlib.sha256(template_str.encode("utf-8")).hexdigest()
+        with self._lock:
+            if file_key:
+                self._file_hashes[file_key[0]] = (file_key[1:], content_hash)
+            if template := self._lookup(content_hash):
+                return template
+
+        template = CompiledTemplate(template_str)
+        with self._lock:
+            self.misses += 1
+            self._templates[content_hash] = template
+            while len(self._templates) > self.max_entries:
+                self._templates.popitem(last=False)
+        return template
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._templates)}
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+            self._file_hashes.clear()
+
+    def _lookup(self, content_hash: str):
+        if content_hash and (template := self._templates.get(content_hash)):
+            self._templates.move_to_end(content_hash)
+            self.hits += 1
+            return template
+        return None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_template_cache() -> TemplateCache:
+    """Returns process-wide template cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TemplateCache()
+        return _cache
@@ -0,0 +1,6 @@
+PERCENTILES = [50, 90, 95, 99]
+
+
+def percentile(ordered: list, pct: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))]
@@ -0,0 +1,46 @@
+import json, os, socket, struct, sys
+
+# Frames sent by worker back to client: 1-byte stream id + 4-byte payload length, followed by payload
+# Exit frame carries command exit code in place of payload length
+FRAME_HEADER = struct.Struct("!BI")
+STREAM_EXIT = 0
+STREAM_STDOUT = 1
+STREAM_STDERR = 2
+
+
+def forward_to_worker(socket_path: str, argv: list[str], prog_name: str = None):
+    """
+    Forwards CLI invocation to a warm worker (started via `serve` command) listening on `socket_path`.
+
+    Only standard library is used here, so forwarding doesn't pay for importing click and common library.
+    Worker output is streamed into current stdout/stderr as it arrives.
+
+    Returns command exit code, or None if worker is not available (so caller can fall back to local execution)
+    """
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(socket_path)
+    except OSError:
+        return None
+
+    with sock:
+        request = {
+            "argv": argv,
+            "prog_name": prog_name,
+            "cwd": os.getcwd(),
+            "env": dict(os.environ),
+        }
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        reader = sock.makefile("rb")
+        streams = {STREAM_STDOUT: sys.stdout.buffer, STREAM_STDERR: sys.stderr.buffer}
+        while header := reader.read(FRAME_HEADER.size):
+            if len(header) < FRAME_HEADER.size:
+                break
+            stream_id, value = FRAME_HEADER.unpack(header)
+            if stream_id == STREAM_EXIT:
+                return value
+            stream = streams[stream_id]
+            stream.write(reader.read(value))
+            stream.flush()
+    print(f"Worker at {socket_path} closed connection without reporting exit code", file=sys.stderr)
+    return 1
@@ -0,0 +1,121 @@
+import importlib, io, json, logging, os, socketserver, sys, time, traceback
+
+from qubership_cli_samples.worker.worker_client import FRAME_HEADER, STREAM_EXIT, STREAM_STDOUT, STREAM_STDERR
+
+
+class _FrameWriter(io.RawIOBase):
+    """Raw stream that wraps everything written into it into frames of a single stream id"""
+
+    def __init__(self, sock, stream_id: int):
+        self.sock = sock
+        self.stream_id = stream_id
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if data:
+            self.sock.sendall(FRAME_HEADER.pack(self.stream_id, len(data)) + bytes(data))
+        return len(data)
+
+
+class _WorkerRequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        # we are already in forked child here, so it's safe to change global process state
+        request = json.loads(self.rfile.readline())
+        os.environ.clear()
+        os.environ.update(request.get("env", {}))
+        os.chdir(request.get("cwd", "."))
+        # nothing is imported per request, so profiler's "common imports" phase should start here, not at worker start
+        setattr(sys.modules[self.server.cli_group.callback.__module__], "start_time", time.perf_counter())
+        sys.stdout = io.TextIOWrapper(io.BufferedWriter(_FrameWriter(self.request, STREAM_STDOUT)), encoding="utf-8", line_buffering=True)
+        sys.stderr = io.TextIOWrapper(io.BufferedWriter(_FrameWriter(self.request, STREAM_STDERR)), encoding="utf-8", line_buffering=True)
+        exit_code = self._invoke_cli(request.get("argv", []), request.get("prog_name"))
+        sys.stdout.flush()
+        sys.stderr.flush()
+        self.request.sendall(FRAME_HEADER.pack(STREAM_EXIT, exit_code))
+
+    def _invoke_cli(self, argv: list[str], prog_name: str) -> int:
+        try:
+            self.server.cli_group.main(args=argv, prog_name=prog_name, standalone_mode=True)
+            return 0
+        except SystemExit as e:
+            # ExecutionCommand.run() always ends with sys.exit, so this is the expected way out
+            if e.code is None or isinstance(e.code, int):
+                # same code shell would see for `sys.exit(code)` of local process (e.g. -1 is 255), it also fits into exit frame
+                return (e.code or 0) & 0xFF
+            print(e.code, file=sys.stderr)
+            return 1
+        except Exception:
+            traceback.print_exc()
+            return 1
+
+
+class WorkerServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """
+    Warm worker that keeps interpreter and all command modules loaded, and serves CLI invocations over a Unix socket.
+
+    Each request is executed in a forked child, so commands keep their usual process-wide behavior
+    (global logging configuration, `sys.exit` in `ExecutionCommand.run()`) without affecting the worker itself.
+    """
+
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, socket_path: str, cli_group, idle_timeout: float = 0, max_children: int = 40):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _WorkerRequestHandler)
+        os.chmod(socket_path, 0o600)
+        self.socket_path = socket_path
+        self.cli_group = cli_group
+        self.idle_timeout = idle_timeout
+        self.max_children = max_children
+        self.timeout = WorkerServer.POLL_INTERVAL
+        self._last_activity = time.monotonic()
+
+    def process_request(self, request, client_address):
+        self._last_activity = time.monotonic()
+        super().process_request(request, client_address)
+
+    def is_idle_expired(self) -> bool:
+        if not self.idle_timeout or self.active_children:
+            return False
+        return time.monotonic() - self._last_activity > self.idle_timeout
+
+    def serve_until_idle(self):
+        while not self.is_idle_expired():
+            self.handle_request()
+            self.service_actions()
+            if self.active_children:
+                self._last_activity = time.monotonic()
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def preload_modules(modules: list[str] = None):
+    """Imports modules of all registered commands (or only provided ones), so forked requests don't pay for their import"""
+    if modules is None:
+        from qubership_cli_samples.command_registry import get_all_command_specs
+        modules = list(dict.fromkeys(name for spec in get_all_command_specs().values() for name in spec.module_names()))
+    start = time.perf_counter()
+    for module_name in modules:
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            logging.warning(f"Failed to preload module {module_name}: {e}")
+    logging.info(f"Preloaded modules in {(time.perf_counter() - start) * 1_000:0.1f} ms")
+
+
+def serve(cli_group, socket_path: str, idle_timeout: float = 0, max_children: int = 40):
+    preload_modules()
+    with WorkerServer(socket_path, cli_group, idle_timeout, max_children) as server:
+        logging.info(f"Worker is listening on {socket_path} (idle_timeout={idle_timeout}s, max_children={max_children})")
+        try:
+            server.serve_until_idle()
+            logging.info(f"Worker was idle for {idle_timeout}s, shutting down")
+        except KeyboardInterrupt:
+            logging.info("Worker interrupted, shutting down")
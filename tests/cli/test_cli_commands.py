@@ -1,9 +1,21 @@
+import gzip
+import hashlib
+import json
 import logging
+import mmap
 import os
 import subprocess
+import sys
 import unittest
 import yaml
 import re
+import shutil
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
 
 def strip_ansi_codes(text):
@@ -13,6 +25,84 @@ def strip_ansi_codes(text):
 
 
 QUBER_CLI = "qubership_cli_samples"
+FAKE_PODMAN = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "fake_podman.py"))
+
+
+def import_cli_module(name: str):
+    """Imports module of CLI package (unpacked or linked into QUBER_CLI folder), for tests of its internals"""
+    package_root = os.path.abspath(QUBER_CLI)
+    if package_root not in sys.path:
+        sys.path.insert(0, package_root)
+    import importlib
+    return importlib.import_module(name)
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Stand-in for artifact storages: supports single "bytes=start-end" ranges, can drop first connection mid-body,
+    reject HEAD requests, redirect paths (`redirects`: path -> location), answer GET requests with empty bodies,
+    wait `body_delay` seconds between sending headers and body, and omit ETag (making responses uncacheable)
+    """
+    drop_first_response_after = None
+    reject_head = False
+    redirects = {}
+    empty_bodies = False
+    body_delay = 0
+    omit_etag = False
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        if RangeRequestHandler.reject_head:
+            self.send_error(405)
+            return
+        super().do_HEAD()
+
+    def send_head(self):
+        if location := RangeRequestHandler.redirects.get(self.path):
+            self.send_response(302)
+            self.send_header("Location", location)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        if RangeRequestHandler.empty_bodies and self.command == "GET":
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return None
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        if match := re.match(r'bytes=(\d+)-(\d*)$', self.headers.get("Range", "")):
+            start, end = int(match.group(1)), int(match.group(2) or size - 1)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        if not RangeRequestHandler.omit_etag:
+            self.send_header("ETag", f'"{size}"')
+        self.end_headers()
+        file = open(path, 'rb')
+        file.seek(start)
+        self.range_length = end - start + 1
+        return file
+
+    def copyfile(self, source, outputfile):
+        remaining = self.range_length
+        outputfile.flush()
+        time.sleep(RangeRequestHandler.body_delay)
+        if RangeRequestHandler.drop_first_response_after is not None:
+            remaining, RangeRequestHandler.drop_first_response_after = RangeRequestHandler.drop_first_response_after, None
+            self.close_connection = True
+        while remaining > 0 and (data := source.read(min(64 * 1024, remaining))):
+            outputfile.write(data)
+            remaining -= len(data)
 
 
 class TestSampleCLICommands(unittest.TestCase):
@@ -24,6 +114,59 @@ class TestSampleCLICommands(unittest.TestCase):
         output = subprocess.run(["python", QUBER_CLI, "--help"], capture_output = True, text = True)
         self.assertTrue("Commands:" in output.stdout + output.stderr)
 
+    def test_help_does_not_import_command_modules(self):
+        output = subprocess.run(["python", "-X", "importtime", QUBER_CLI, "--help"], capture_output=True, text=True)
+        self.assertTrue("run-sample" in output.stdout)
+        self.assertFalse("qubership_cli_samples.sample_command" in output.stderr)
+        self.assertFalse("qubership_pipelines_common_library.v2.podman" in output.stderr)
+        self.assertFalse("qubership_cli_samples.podman" in output.stderr)
+
+    @staticmethod
+    def _create_plugin(execute_body: str) -> str:
+        plugin_folder = tempfile.mkdtemp()
+        with open(os.path.join(plugin_folder, "sample_plugin.py"), 'w', encoding='utf-8') as file:
+            file.write("import sys\n"
+                       "from qubership_pipelines_common_library.v1.execution.exec_command import ExecutionCommand\n\n"
+                       "class PluginCommand(ExecutionCommand):\n"
+                       "    def _execute(self):\n"
+                       f"        {execute_body}\n")
+        dist_info = os.path.join(plugin_folder, "sample_plugin-0.1.dist-info")
+        os.makedirs(dist_info)
+        with open(os.path.join(dist_info, "METADATA"), 'w', encoding='utf-8') as file:
+            file.write("Metadata-Version: 2.1\nName: sample-plugin\nVersion: 0.1\n")
+        with open(os.path.join(dist_info, "entry_points.txt"), 'w', encoding='utf-8') as file:
+            file.write("[qubership_cli_samples.commands]\nplugin-command = sample_plugin:PluginCommand\n")
+        return plugin_folder
+
+    def test_entry_point_command(self):
+        plugin_folder = self._create_plugin("self.context.logger.info('Plugin command executed')")
+        output = subprocess.run(["python", QUBER_CLI, "plugin-command", "-p", "params.some_param=1"],
+                                capture_output=True, text=True, env={**os.environ, "PYTHONPATH": plugin_folder})
+        self.assertEqual(0, output.returncode)
+        self.assertTrue("Plugin command executed" in output.stdout)
+
+    def test_entry_points_cache(self):
+        plugin_folder = self._create_plugin("pass")
+        cache_path = os.path.join(tempfile.mkdtemp(), "entry_points.json")
+        env = {**os.environ, "PYTHONPATH": plugin_folder, "QUBERSHIP_CLI_ENTRY_POINTS_CACHE": cache_path}
+        output = subprocess.run(["python", QUBER_CLI, "--help"], capture_output=True, text=True, env=env)
+        self.assertTrue("plugin-command" in output.stdout)
+        self.assertTrue(os.path.exists(cache_path))
+        output = subprocess.run(["python", "-X", "importtime", QUBER_CLI, "--help"], capture_output=True, text=True, env=env)
+        self.assertTrue("plugin-command" in output.stdout)
+        self.assertFalse("importlib.metadata" in output.stderr)
+
+        # installing another distribution changes folder's mtime, so cache is rebuilt
+        dist_info = os.path.join(plugin_folder, "other_plugin-0.1.dist-info")
+        os.makedirs(dist_info)
+        with open(os.path.join(dist_info, "METADATA"), 'w', encoding='utf-8') as file:
+            file.write("Metadata-Version: 2.1\nName: other-plugin\nVersion: 0.1\n")
+        with open(os.path.join(dist_info, "entry_points.txt"), 'w', encoding='utf-8') as file:
+            file.write("[qubership_cli_samples.commands]\nother-command = sample_plugin:PluginCommand\n")
+        os.utime(plugin_folder, ns=(time.time_ns(), time.time_ns() + 1_000_000_000))
+        output = subprocess.run(["python", QUBER_CLI, "--help"], capture_output=True, text=True, env=env)
+        self.assertTrue("other-command" in output.stdout)
+
     def test_run_sample(self):
         output = subprocess.run(["python", QUBER_CLI, "run-sample", "--context_path=./data/context.yaml"],
                                 capture_output = True, text = True)
@@ -59,6 +202,34 @@ class TestSampleCLICommands(unittest.TestCase):
             result = yaml.safe_load(file)
             self.assertEqual(90, result['params']['result_divide'])
 
+    def test_calc_with_profiler_stats(self):
+        output = subprocess.run(["python", QUBER_CLI, "calc", "--context_path=./data/context2.yaml"],
+                                capture_output=True, text=True, env={**os.environ, "PIPELINES_DECLARATIVE_EXECUTOR_ENABLE_PROFILER_STATS": "true"})
+        self.assertEqual(0, output.returncode)
+        with open('./data/logs/profiler_stats.json', 'r', encoding='utf-8') as file:
+            stats = yaml.safe_load(file)
+            self.assertEqual("CalcCommand", stats['command_class'])
+            for phase in ["common_imports", "command_import", "validate", "execute", "output_params_save"]:
+                self.assertTrue(phase in stats['phases_ms'])
+
+    def test_calc_with_profiler_stats_dump_error(self):
+        folder_path, context_path = self._create_context({"param_1": 2, "param_2": 3, "operation": "add", "result_name": "sum"})
+        hooks_path = tempfile.mkdtemp()
+        with open(os.path.join(hooks_path, "sitecustomize.py"), 'w', encoding='utf-8') as file:
+            file.write("import cProfile, errno\n"
+                       "def dump_stats(self, file):\n"
+                       "    raise OSError(errno.ENOSPC, 'No space left on device')\n"
+                       "cProfile.Profile.dump_stats = dump_stats\n")
+        output = subprocess.run(["python", QUBER_CLI, "calc", f"--context_path={context_path}"], capture_output=True, text=True,
+                                env={**os.environ, "PIPELINES_DECLARATIVE_EXECUTOR_ENABLE_PROFILER_STATS": "true",
+                                     "PIPELINES_DECLARATIVE_EXECUTOR_PROFILER_CAPTURE": "cprofile",
+                                     "PYTHONPATH": os.pathsep.join(filter(None, [hooks_path, os.getenv("PYTHONPATH")]))})
+        self.assertEqual(0, output.returncode)
+        with open(os.path.join(folder_path, "logs", "profiler_stats.json"), 'r', encoding='utf-8') as file:
+            stats = json.load(file)
+        self.assertNotIn("cprofile_file", stats)
+        self.assertIn("execute", stats['phases_ms'])
+
     def test_validate_dependencies(self):
         output = subprocess.run(["python", QUBER_CLI, "validate-dependencies", "-s params.test_param=123"], capture_output = True, text = True)
         print(output.stdout)
@@ -66,6 +237,966 @@ class TestSampleCLICommands(unittest.TestCase):
         self.assertEqual(0, output.returncode)
         self.assertTrue("Clients import time" in output.stdout + output.stderr)
 
+    def test_calc_via_worker(self):
+        socket_path = os.path.join(tempfile.mkdtemp(), "worker.sock")
+        worker = subprocess.Popen(["python", QUBER_CLI, "serve", f"--socket_path={socket_path}", "--idle_timeout=30"],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            for _ in range(100):
+                if os.path.exists(socket_path):
+                    break
+                time.sleep(0.1)
+            output = subprocess.run(["python", QUBER_CLI, "calc", "--context_path=./data/context2.yaml"],
+                                    capture_output=True, text=True, env={**os.environ, "QUBERSHIP_CLI_WORKER_SOCKET": socket_path})
+            self.assertEqual(0, output.returncode)
+            self.assertTrue("Status: SUCCESS" in output.stdout)
+            with open('./data/result_calc.yaml', 'r', encoding='utf-8') as file:
+                result = yaml.safe_load(file)
+                self.assertEqual(0.9, result['params']['result_divide'])
+        finally:
+            worker.terminate()
+            worker.wait()
+
+    def test_worker_negative_exit_code(self):
+        plugin_folder = self._create_plugin("sys.exit(-1)")
+        socket_path = os.path.join(tempfile.mkdtemp(), "worker.sock")
+        env = {**os.environ, "PYTHONPATH": plugin_folder}
+        worker = subprocess.Popen(["python", QUBER_CLI, "serve", f"--socket_path={socket_path}", "--idle_timeout=30"],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env)
+        try:
+            for _ in range(100):
+                if os.path.exists(socket_path):
+                    break
+                time.sleep(0.1)
+            output = subprocess.run(["python", QUBER_CLI, "plugin-command", "-p", "params.some_param=1"],
+                                    capture_output=True, text=True, env={**env, "QUBERSHIP_CLI_WORKER_SOCKET": socket_path})
+            self.assertEqual(255, output.returncode)
+            self.assertFalse("closed connection without reporting exit code" in output.stderr)
+        finally:
+            worker.terminate()
+            worker.wait()
+
+    def test_run_batch(self):
+        batch_folder = tempfile.mkdtemp()
+        manifest_path = os.path.join(batch_folder, "manifest.yaml")
+        with open(manifest_path, 'w', encoding='utf-8') as file:
+            yaml.safe_dump({"items": [
+                {"command": "calc", "input_params": [f"params.param_1={i}", "params.param_2=2",
+                                                     "params.operation=multiply", "params.result_name=result"]}
+                for i in range(4)
+            ]}, file)
+        output = subprocess.run(["python", QUBER_CLI, "run-batch", "-p", f"params.manifest={manifest_path}",
+                                 "-p", "params.workers=2", f"--folder_path={batch_folder}/context"],
+                                capture_output=True, text=True)
+        self.assertEqual(0, output.returncode)
+        with open(os.path.join(batch_folder, "context/output/files/batch_summary.json"), 'r', encoding='utf-8') as file:
+            summary = yaml.safe_load(file)
+            self.assertEqual(4, summary['succeeded'])
+        with open(summary['items'][3]['output_params'], 'r', encoding='utf-8') as file:
+            result = yaml.safe_load(file)
+            self.assertEqual(6, result['params']['result'])
+
+    def test_run_batch_inline_items(self):
+        item_folder, item_context_path = self._create_context({"param_1": 4, "param_2": 5, "operation": "add", "result_name": "sum"})
+        batch_folder, batch_context_path = self._create_context({"items": [{"command": "calc", "context_path": "item/context.yaml"}]})
+        shutil.copytree(item_folder, os.path.join(batch_folder, "item"))
+        # relative item context is resolved against batch context folder, not against working directory
+        output = subprocess.run(["python", os.path.abspath(QUBER_CLI), "run-batch", f"--context_path={batch_context_path}"],
+                                capture_output=True, text=True, cwd=tempfile.mkdtemp())
+        self.assertEqual(0, output.returncode)
+        with open(os.path.join(item_folder, "output_params.yaml"), 'r', encoding='utf-8') as file:
+            self.assertEqual(9, yaml.safe_load(file)['params']['sum'])
+
+        _, batch_context_path = self._create_context({"items": [{"command": "calc"}, "calc"]})
+        output = subprocess.run(["python", QUBER_CLI, "run-batch", f"--context_path={batch_context_path}"],
+                                capture_output=True, text=True)
+        self.assertNotEqual(0, output.returncode)
+        self.assertTrue("Item 1 must be a mapping" in output.stdout + output.stderr)
+
+    def test_validate_dependencies_import_report(self):
+        folder_path = tempfile.mkdtemp()
+        output = subprocess.run(["python", QUBER_CLI, "validate-dependencies", "-p params.import_threshold_ms=1000000",
+                                 f"--folder_path={folder_path}"], capture_output=True, text=True)
+        self.assertEqual(0, output.returncode)
+        with open(os.path.join(folder_path, "output/params.yaml"), 'r', encoding='utf-8') as file:
+            report = yaml.safe_load(file)['params']['import_report']
+            self.assertEqual([], report['flagged'])
+            self.assertTrue(len(report['slowest']) > 0)
+        with open(os.path.join(folder_path, "output/files/import_time_report.txt"), 'r', encoding='utf-8') as file:
+            import_report = file.read()
+        self.assertTrue("qubership_pipelines_common_library" in import_report)
+        # library command is checked along with sample command that replaced it in CLI
+        self.assertTrue("qubership_pipelines_common_library.v2.podman.podman_command" in import_report)
+        self.assertTrue("qubership_cli_samples.podman.podman_command" in import_report)
+
+    def _serve_folder(self, folder: str) -> str:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), partial(RangeRequestHandler, directory=folder))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(self._reset_handler)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    @staticmethod
+    def _reset_handler():
+        RangeRequestHandler.drop_first_response_after = None
+        RangeRequestHandler.reject_head = False
+        RangeRequestHandler.redirects = {}
+        RangeRequestHandler.empty_bodies = False
+        RangeRequestHandler.body_delay = 0
+        RangeRequestHandler.omit_etag = False
+
+    def test_download_file_parallel_ranges(self):
+        served_folder, folder_path = tempfile.mkdtemp(), tempfile.mkdtemp()
+        content = os.urandom(3 * 1024 * 1024 + 123)
+        with open(os.path.join(served_folder, "artifact.bin"), 'wb') as file:
+            file.write(content)
+        base_url = self._serve_folder(served_folder)
+        RangeRequestHandler.drop_first_response_after = 100_000
+        output = subprocess.run(["python", QUBER_CLI, "download-file", "-p", f"params.url={base_url}/artifact.bin",
+                                 "-p", "params.filename=artifact.bin", "-p", "params.chunk_size_kb=64",
+                                 "-p", "params.parallel_threshold_mb=1", "-p", "params.parallel_ranges=3",
+                                 f"--folder_path={folder_path}"], capture_output=True, text=True)
+        self.assertEqual(0, output.returncode)
+        with open(os.path.join(folder_path, "output/files/artifact.bin"), 'rb') as file:
+            self.assertEqual(content, file.read())
+        with open(os.path.join(folder_path, "output/params.yaml"), 'r', encoding='utf-8') as file:
+            result = yaml.safe_load(file)['params']
+            self.assertEqual("parallel", result['download_mode'])
+            self.assertEqual(3, len(result['chunks']))
+            self.assertEqual(4, sum(chunk['attempts'] for chunk in result['chunks']))
+            self.assertTrue(result['throughput'].endswith("B/s"))
+        self.assertFalse(os.path.exists(os.path.join(folder_path, "output/files/artifact.bin.part")))
+
+    def test_download_file_redirect_without_head(self):
+        served_folder, folder_path = tempfile.mkdtemp(), tempfile.mkdtemp()
+        content = os.urandom(100_000)
+        with open(os.path.join(served_folder, "artifact.bin"), 'wb') as file:
+            file.write(content)
+        base_url = self._serve_folder(served_folder)
+        RangeRequestHandler.reject_head = True
+        RangeRequestHandler.redirects = {"/signed/artifact.bin": f"{base_url}/artifact.bin"}
+        output = subprocess.run(["python", QUBER_CLI, "download-file", "-p", f"params.url={base_url}/signed/artifact.bin",
+                                 "-p", "params.filename=artifact.bin", f"--folder_path={folder_path}"], capture_output=True, text=True)
+        self.assertEqual(0, output.returncode)
+        with open(os.path.join(folder_path, "output/files/artifact.bin"), 'rb') as file:
+            self.assertEqual(content, file.read())
+
+    def test_download_file_empty_responses(self):
+        served_folder, folder_path = tempfile.mkdtemp(), tempfile.mkdtemp()
+        with open(os.path.join(served_folder, "artifact.bin"), 'wb') as file:
+            file.write(os.urandom(100_000))
+        base_url = self._serve_folder(served_folder)
+        RangeRequestHandler.empty_bodies = True
+        output = subprocess.run(["python", QUBER_CLI, "download-file", "-p", f"params.url={base_url}/artifact.bin",
+                                 "-p", "params.filename=artifact.bin", "-p", "params.retries=2", f"--folder_path={folder_path}"],
+                                capture_output=True, text=True, timeout=60)
+        self.assertNotEqual(0, output.returncode)
+        self.assertIn("failed after 3 attempts", output.stdout + output.stderr)
+
+    def test_download_multiple_files(self):
+        served_folder, folder_path = tempfile.mkdtemp(), tempfile.mkdtemp()
+        for i in range(5):
+            with open(os.path.join(served_folder, f"artifact_{i}.bin"), 'wb') as file:
+                file.write(os.urandom(100_000 * (i + 1)))
+        base_url = self._serve_folder(served_folder)
+        context_path = os.path.join(folder_path, "context.yaml")
+        with open(context_path, 'w', encoding='utf-8') as file:
+            yaml.safe_dump({"kind": "AtlasModuleContextDescriptor", "apiVersion": "v1", "paths": {
+                "logs": os.path.join(folder_path, "logs"),
+                "input": {"params": os.path.join(folder_path, "input_params.yaml")},
+                "output": {"params": os.path.join(folder_path, "output_params.yaml"), "files": os.path.join(folder_path, "files")},
+            }}, file)
+        with open(os.path.join(folder_path, "input_params.yaml"), 'w', encoding='utf-8') as file:
+            yaml.safe_dump({"kind": "AtlasModuleParamsInsecure", "apiVersion": "v1", "params": {"workers": 3, "files": [
+                *[{"url": f"{base_url}/artifact_{i}.bin", "filename": f"copy_{i}.bin"} for i in range(4)],
+                f"{base_url}/artifact_4.bin",
+            ]}}, file)
+        output = subprocess.run(["python", QUBER_CLI, "download-file", f"--context_path={context_path}"],
+                                capture_output=True, text=True)
+        self.assertEqual(0, output.returncode)
+        for i, filename in enumerate(["copy_0.bin", "copy_1.bin", "copy_2.bin", "copy_3.bin", "artifact_4.bin"]):
+            self.assertEqual(100_000 * (i + 1), os.path.getsize(os.path.join(folder_path, "files", filename)))
+        with open(os.path.join(folder_path, "output_params.yaml"), 'r', encoding='utf-8') as file:
+            result = yaml.safe_load(file)['params']
+            self.assertEqual(5, result['files_count'])
+            self.assertEqual(["SUCCESS"] * 5, [entry['status'] for entry in result['files']])
+            self.assertTrue(result['throughput'].endswith("B/s"))
+
+    def test_download_multiple_files_duplicate_filenames(self):
+        folder_path = tempfile.mkdtemp()
+        context_path = os.path.join(folder_path, "context.yaml")
+        with open(context_path, 'w', encoding='utf-8') as file:
+            yaml.safe_dump({"kind": "AtlasModuleContextDescriptor", "apiVersion": "v1", "paths": {
+                "logs": os.path.join(folder_path, "logs"),
+                "input": {"params": os.path.join(folder_path, "input_params.yaml")},
+                "output": {"params": os.path.join(folder_path, "output_params.yaml"), "files": os.path.join(folder_path, "files")},
+            }}, file)
+        with open(os.path.join(folder_path, "input_params.yaml"), 'w', encoding='utf-8') as file:
+            yaml.safe_dump({"kind": "AtlasModuleParamsInsecure", "apiVersion": "v1", "params": {"files": [
+                "http://127.0.0.1:1/first/artifact.bin", {"url": "http://127.0.0.1:1/other.bin", "filename": "./artifact.bin"},
+            ]}}, file)
+        output = subprocess.run(["python", QUBER_CLI, "download-file", f"--context_path={context_path}"],
+                                capture_output=True, text=True)
+        self.assertNotEqual(0, output.returncode)
+        self.assertTrue("duplicated: artifact.bin" in output.stdout + output.stderr)
+
+    def test_download_file_cache(self):
+        served_folder, cache_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+        content = os.urandom(500_000)
+        with open(os.path.join(served_folder, "artifact.bin"), 'wb') as file:
+            file.write(content)
+        base_url = self._serve_folder(served_folder)
+        results = []
+        for sha256 in [None, None, hashlib.sha256(content).hexdigest()]:
+            folder_path = tempfile.mkdtemp()
+            args = ["-p", f"params.sha256={sha256}"] if sha256 else []
+            output = subprocess.run(["python", QUBER_CLI, "download-file", "-p", f"params.url={base_url}/artifact.bin",
+                                     "-p", "params.filename=artifact.bin", "-p", f"params.cache_dir={cache_dir}", *args,
+                                     f"--folder_path={folder_path}"], capture_output=True, text=True)
+            self.assertEqual(0, output.returncode)
+            with open(os.path.join(folder_path, "output/files/artifact.bin"), 'rb') as file:
+                self.assertEqual(content, file.read())
+            with open(os.path.join(folder_path, "output/params.yaml"), 'r', encoding='utf-8') as file:
+                results.append(yaml.safe_load(file)['params'])
+        self.assertEqual([{"hits": 0, "misses": 1}, {"hits": 1, "misses": 0}, {"hits": 1, "misses": 0}],
+                         [{"hits": result['cache']['hits'], "misses": result['cache']['misses']} for result in results])
+        self.assertEqual("cache", results[1]['download_mode'])
+        self.assertEqual("488.3 KiB", results[2]['cache']['bytes_saved'])
+
+        output = subprocess.run(["python", QUBER_CLI, "download-file", "-p", f"params.url={base_url}/artifact.bin",
+                                 "-p", "params.filename=artifact.bin", "-p", f"params.sha256={'0' * 64}",
+                                 f"--folder_path={tempfile.mkdtemp()}"], capture_output=True, text=True)
+        self.assertNotEqual(0, output.returncode)
+
+    def test_download_file_uncacheable(self):
+        served_folder, cache_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+        with open(os.path.join(served_folder, "artifact.bin"), 'wb') as file:
+            file.write(os.urandom(1000))
+        base_url = self._serve_folder(served_folder)
+        RangeRequestHandler.omit_etag = True
+        for _ in range(2):
+            folder_path = tempfile.mkdtemp()
+            output = subprocess.run(["python", QUBER_CLI, "download-file", "-p", f"params.url={base_url}/artifact.bin",
+                                     "-p", "params.filename=artifact.bin", "-p", f"params.cache_dir={cache_dir}",
+                                     f"--folder_path={folder_path}"], capture_output=True, text=True)
+            self.assertEqual(0, output.returncode)
+            with open(os.path.join(folder_path, "output/params.yaml"), 'r', encoding='utf-8') as file:
+                cache_stats = yaml.safe_load(file)['params']['cache']
+            self.assertEqual({"hits": 0, "misses": 0, "uncacheable": 1}, {key: cache_stats[key] for key in ["hits", "misses", "uncacheable"]})
+
+    def test_download_files_invalid_entries(self):
+        base_url = self._serve_folder(tempfile.mkdtemp())
+        for files, error in [([5], "should be url or mapping with url: 5"),
+                             ([{"url": f"{base_url}/a.bin", "filename": "../escaped.bin"}], "outside of output files folder"),
+                             ([{"url": f"{base_url}/a.bin", "filename": "/tmp/escaped.bin"}], "outside of output files folder")]:
+            folder_path, context_path = self._create_context({"files": files})
+            output = subprocess.run(["python", QUBER_CLI, "download-file", f"--context_path={context_path}"],
+                                    capture_output=True, text=True)
+            self.assertNotEqual(0, output.returncode)
+            self.assertTrue(error in output.stdout + output.stderr, output.stdout + output.stderr)
+            self.assertFalse(os.path.exists(os.path.join(folder_path, "escaped.bin")))
+        output = subprocess.run(["python", QUBER_CLI, "download-file", "-p", f"params.url={base_url}/a.bin",
+                                 "-p", "params.filename=../escaped.bin", f"--folder_path={tempfile.mkdtemp()}"],
+                                capture_output=True, text=True)
+        self.assertNotEqual(0, output.returncode)
+        self.assertTrue("params.filename should be relative path inside output files folder" in output.stdout + output.stderr)
+
+    def test_generate_html_report_escapes_values(self):
+        folder_path = tempfile.mkdtemp()
+        with open(os.path.join(folder_path, "pipeline_report.json"), 'w', encoding='utf-8') as file:
+            json.dump({"apiVersion": "v1", "execution": {"user": "<admin>", "status": "FAILED", "url": "javascript:alert(2)"}, "stages": [
+                {"name": "Build <script>alert(1)</script>", "type": "JOB", "status": "SUCCESS", "time": "1s", "url": "https://example.com/?a=1&b=2"},
+                {"name": "Deploy", "type": "JOB", "status": "FAILED", "time": "2s", "url": "javascript:alert(1)"},
+            ]}, file)
+        output = subprocess.run(["python", QUBER_CLI, "generate-html-report", "-p", f"paths.input.files={folder_path}",
+                                 f"--folder_path={folder_path}/context"], capture_output=True, text=True)
+        self.assertEqual(0, output.returncode)
+        with open(os.path.join(folder_path, "context/output/files/report.html"), 'r', encoding='utf-8') as file:
+            report_html = file.read()
+        self.assertTrue("Build &lt;script&gt;alert(1)&lt;/script&gt;" in report_html)
+        self.assertTrue("&lt;admin&gt;" in report_html)
+        self.assertTrue('href="https://example.com/?a=1&amp;b=2"' in report_html)
+        self.assertFalse('href="javascript:' in report_html)
+        self.assertTrue('<a href="#">javascript:alert(2)</a>' in report_html)
+        self.assertEqual(2, report_html.count("<tr>\n                    <td>"))
+
+    def test_generate_html_report_incremental_parsing(self):
+        folder_path = tempfile.mkdtemp()
+        with open(os.path.join(folder_path, "pipeline_report.json"), 'w', encoding='utf-8') as file:
+            json.dump({"stages": [{"name": f"Stage {i}", "status": "SUCCESS", "stages": [{"name": "nested"}]} for i in range(3000)],
+                       "apiVersion": "v1", "execution": {"user": "incremental", "status": "SUCCESS"}}, file)
+        reports = []
+        for mode in ["full", "incremental"]:
+            output = subprocess.run(["python", QUBER_CLI, "generate-html-report", "-p", f"paths.input.files={folder_path}",
+                                     "-p", f"params.parsing_mode={mode}", "-p", "params.report_mode=table",
+                                     f"--folder_path={folder_path}/{mode}"],
+                                    capture_output=True, text=True)
+            self.assertEqual(0, output.returncode)
+            with open(os.path.join(folder_path, f"{mode}/output/files/report.html"), 'r', encoding='utf-8') as file:
+                reports.append(file.read())
+        self.assertEqual(reports[0], reports[1])
+        self.assertTrue("incremental (unknown@example.com)" in reports[1])
+        self.assertTrue("Stage 2999" in reports[1])
+
+    def test_generate_paginated_html_report(self):
+        folder_path = tempfile.mkdtemp()
+        with open(os.path.join(folder_path, "pipeline_report.json"), 'w', encoding='utf-8') as file:
+            json.dump({"apiVersion": "v1", "execution": {"user": "paginated", "url": " JavaScript:alert(1)"}, "stages": [
+                {"name": f"Stage {i}", "type": "JOB", "status": "FAILED" if i % 4 == 0 else "SUCCESS", "time": f"{i}s"}
+                for i in range(1, 2501)
+            ]}, file)
+        output = subprocess.run(["python", QUBER_CLI, "generate-html-report", "-p", f"paths.input.files={folder_path}",
+                                 "-p", "params.sidecar_format=gzip", f"--folder_path={folder_path}/context"],
+                                capture_output=True, text=True)
+        self.assertEqual(0, output.returncode)
+        with open(os.path.join(folder_path, "context/output/params.yaml"), 'r', encoding='utf-8') as file:
+            result = yaml.safe_load(file)['params']['report']
+            self.assertEqual("paginated", result['mode'])
+            self.assertEqual({"SUCCESS": 1875, "FAILED": 625}, result['status_counts'])
+            self.assertEqual(1250.5, result['duration']['mean'])
+            self.assertEqual(2375.0, result['duration']['p95'])
+        with gzip.open(os.path.join(folder_path, "context/output/files", result['sidecar']), 'rt', encoding='utf-8') as file:
+            sidecar = json.load(file)
+            self.assertEqual(2500, len(sidecar['rows']))
+            self.assertEqual([2500, "Stage 2500", "JOB", "FAILED", "2500s", None, 2500.0], sidecar['rows'][-1])
+        with open(os.path.join(folder_path, "context/output/files/report.html"), 'r', encoding='utf-8') as file:
+            report_html = file.read()
+            self.assertTrue('const SIDECAR = "report_stages.json.gz";' in report_html)
+            self.assertFalse("Stage 1<" in report_html)
+            self.assertTrue('<a href="#"> JavaScript:alert(1)</a>' in report_html)
+
+    def test_generate_html_report_template_cache(self):
+        folder_path = tempfile.mkdtemp()
+        with open(os.path.join(folder_path, "pipeline_report.json"), 'w', encoding='utf-8') as file:
+            json.dump({"apiVersion": "v1", "execution": {"user": "cached"}, "stages": [{"name": "Build"}]}, file)
+        manifest_path = os.path.join(folder_path, "manifest.yaml")
+        with open(manifest_path, 'w', encoding='utf-8') as file:
+            yaml.safe_dump({"items": [{"command": "generate-html-report", "input_params": [f"paths.input.files={folder_path}"]}
+                                      for _ in range(2)]}, file)
+        output = subprocess.run(["python", QUBER_CLI, "run-batch", "-p", f"params.manifest={manifest_path}", "-p", "params.workers=1",
+                                 "-p", "params.executor=thread", f"--folder_path={folder_path}/context"], capture_output=True, text=True)
+        self.assertEqual(0, output.returncode)
+        with open(os.path.join(folder_path, "context/output/files/batch_summary.json"), 'r', encoding='utf-8') as file:
+            summary = yaml.safe_load(file)
+        cache_stats = []
+        for item in summary['items']:
+            with open(item['output_params'], 'r', encoding='utf-8') as file:
+                cache_stats.append(yaml.safe_load(file)['params']['report']['template_cache'])
+        self.assertEqual([{"hits": 0, "misses": 1, "size": 1}, {"hits": 1, "misses": 1, "size": 1}], cache_stats)
+
+    def test_aggregate_reports(self):
+        input_folder, folder_path = tempfile.mkdtemp(), tempfile.mkdtemp()
+        for run in range(1, 5):
+            os.makedirs(os.path.join(input_folder, f"run_{run}"))
+            with open(os.path.join(input_folder, f"run_{run}", "pipeline_report.json"), 'w', encoding='utf-8') as file:
+                json.dump({"apiVersion": "v1", "execution": {"status": "FAILED" if run == 4 else "SUCCESS",
+                                                             "startedAt": f"2025-01-0{run}T10:00:00"}, "stages": [
+                    {"name": "Build", "type": "JOB", "status": "SUCCESS", "time": f"{run * 10}s"},
+                    {"name": "<Deploy>", "type": "JOB", "status": "FAILED" if run == 4 else "SUCCESS", "time": "5m"},
+                ]}, file)
+        with open(os.path.join(input_folder, "pipeline_report.json"), 'w', encoding='utf-8') as file:
+            file.write("{not json")
+        output = subprocess.run(["python", QUBER_CLI, "aggregate-reports", "-p", f"paths.input.files={input_folder}",
+                                 "-p", "params.workers=2", f"--folder_path={folder_path}"], capture_output=True, text=True)
+        self.assertEqual(0, output.returncode)
+        with open(os.path.join(folder_path, "output/params.yaml"), 'r', encoding='utf-8') as file:
+            result = yaml.safe_load(file)['params']['aggregate']
+            self.assertEqual(4, result['reports_count'])
+            self.assertEqual({"SUCCESS": 3, "FAILED": 1}, result['run_status_counts'])
+            self.assertEqual([{"name": "<Deploy>", "p95": 300.0}, {"name": "Build", "p95": 40.0}], result['slowest_stages'])
+            self.assertEqual([{"name": "<Deploy>", "failure_rate": 0.25}], result['most_failing_stages'])
+            self.assertEqual(1, len(result['errors']))
+        with open(os.path.join(folder_path, "output/files/aggregated_report.json"), 'r', encoding='utf-8') as file:
+            build = next(stage for stage in json.load(file)['stages'] if stage['name'] == "Build")
+            self.assertEqual({"runs": 4, "failures": 0, "mean": 25.0, "max": 40.0},
+                             {key: build[key] for key in ("runs", "failures", "mean", "max")})
+        with open(os.path.join(folder_path, "output/files/aggregated_report.html"), 'r', encoding='utf-8') as file:
+            report_html = file.read()
+            self.assertTrue("&lt;Deploy&gt;" in report_html)
+            self.assertFalse("<Deploy>" in report_html)
+
+    def test_system_load_test(self):
+        folder_path = tempfile.mkdtemp()
+        output = subprocess.run(["python", QUBER_CLI, "system-load-test", "-p", "params.sleep_between_tests=0",
+                                 "-p", "params.cpu.run_test=true", "-p", "params.cpu.duration=1", "-p", "params.cpu.load=0.5",
+                                 "-p", "params.cpu.workers=2", "-p", "params.ram.run_test=true", "-p", "params.ram.size_mb=64",
+                                 "-p", "params.ram.chunks=2", "-p", "params.ram.duration=0", "-p", "params.ram.bandwidth_mb=8",
+                                 "-p", "params.disk.run_test=true", "-p", "params.disk.size_mb=8", "-p", "params.disk.random_ops=50",
+                                 "-p", "params.disk.fsync_ops=5", "-p", "params.network.run_test=true", "-p", "params.network.local_server=true",
+                                 "-p", "params.network.local_size_mb=4", "-p", "params.network.streams=3", f"--folder_path={folder_path}"], capture_output=True, text=True)
+        self.assertEqual(0, output.returncode)
+        with open(os.path.join(folder_path, "output/params.yaml"), 'r', encoding='utf-8') as file:
+            result = yaml.safe_load(file)['params']['test_results']
+            self.assertEqual(2, result['cpu']['workers'])
+            self.assertEqual(2, len(result['cpu']['per_worker']))
+            self.assertTrue(result['cpu']['iterations_per_sec'] > 0)
+            self.assertNotIn('error', result['ram'])
+            self.assertEqual('8.0', result['ram']['bandwidth_mb_s']['size_mb'])
+            self.assertTrue(all(float(result['ram']['bandwidth_mb_s'][op]) > 0 for op in ["write", "read", "copy"]))
+            self.assertNotIn('error', result['disk'])
+            self.assertEqual('8.0', result['disk']['size_mb'])
+            self.assertTrue(result['disk']['random_read']['iops'] > 0)
+            self.assertEqual({'p50', 'p90', 'p95', 'p99', 'max'}, set(result['disk']['fsync_latency_ms']))
+            self.assertEqual([], os.listdir(os.path.join(folder_path, "output/files")))
+            self.assertNotIn('error', result['network'])
+            self.assertEqual('12.00', result['network']['total_mb'])
+            self.assertEqual(3, len(result['network']['per_stream']))
+            self.assertTrue(float(result['network']['ttfb_ms']['p50']) > 0)
+
+    def test_system_load_test_disk_error(self):
+        folder_path, hooks_path = tempfile.mkdtemp(), tempfile.mkdtemp()
+        # fsync fails starting from random writes (4th call), while slice of the test buffer is in use
+        with open(os.path.join(hooks_path, "sitecustomize.py"), 'w', encoding='utf-8') as file:
+            file.write("import errno, os\n"
+                       "_fsync, _calls = os.fsync, []\n"
+                       "def fsync(fd):\n"
+                       "    _calls.append(fd)\n"
+                       "    if len(_calls) >= 4:\n"
+                       "        raise OSError(errno.EIO, 'Input/output error')\n"
+                       "    return _fsync(fd)\n"
+                       "os.fsync = fsync\n")
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [hooks_path, os.getenv("PYTHONPATH")]))}
+        output = subprocess.run(["python", QUBER_CLI, "system-load-test", "-p", "params.sleep_between_tests=0",
+                                 "-p", "params.disk.run_test=true", "-p", "params.disk.size_mb=1", "-p", "params.disk.random_ops=10",
+                                 f"--folder_path={folder_path}"], capture_output=True, text=True, env=env)
+        self.assertEqual(0, output.returncode)
+        with open(os.path.join(folder_path, "output/params.yaml"), 'r', encoding='utf-8') as file:
+            result = yaml.safe_load(file)['params']['test_results']
+        self.assertIn("Input/output error", result['disk']['error'])
+        self.assertEqual([], os.listdir(os.path.join(folder_path, "output/files")))
+
+    def test_system_load_test_network_ttfb(self):
+        served_folder, folder_path = tempfile.mkdtemp(), tempfile.mkdtemp()
+        with open(os.path.join(served_folder, "payload.bin"), 'wb') as file:
+            file.write(os.urandom(1024 * 1024))
+        base_url = self._serve_folder(served_folder)
+        RangeRequestHandler.body_delay = 0.5
+        output = subprocess.run(["python", QUBER_CLI, "system-load-test", "-p", "params.sleep_between_tests=0",
+                                 "-p", "params.network.run_test=true", "-p", f"params.network.url={base_url}/payload.bin",
+                                 "-p", "params.network.streams=2", f"--folder_path={folder_path}"], capture_output=True, text=True)
+        self.assertEqual(0, output.returncode)
+        with open(os.path.join(folder_path, "output/params.yaml"), 'r', encoding='utf-8') as file:
+            result = yaml.safe_load(file)['params']['test_results']['network']
+        # headers come right away, body only after delay
+        self.assertTrue(float(result['avg_time']) >= 0.5)
+        self.assertTrue(float(result['ttfb_ms']['max']) < 400)
+
+    def test_system_load_test_network_no_downloads(self):
+        folder_path = tempfile.mkdtemp()
+        output = subprocess.run(["python", QUBER_CLI, "system-load-test", "-p", "params.sleep_between_tests=0",
+                                 "-p", "params.network.run_test=true", "-p", "params.network.local_server=true",
+                                 "-p", "params.network.download_times=0", f"--folder_path={folder_path}"], capture_output=True, text=True)
+        self.assertEqual(0, output.returncode)
+        with open(os.path.join(folder_path, "output/params.yaml"), 'r', encoding='utf-8') as file:
+            result = yaml.safe_load(file)['params'].get('test_results') or {}
+        self.assertNotIn('error', result.get('network') or {})
+
+    @staticmethod
+    def _create_context(params: dict) -> tuple[str, str]:
+        """Returns folder and path of context with given input params, output files go to "<folder>/files" """
+        folder_path = tempfile.mkdtemp()
+        os.makedirs(os.path.join(folder_path, "files"))
+        context_path = os.path.join(folder_path, "context.yaml")
+        with open(context_path, 'w', encoding='utf-8') as file:
+            yaml.safe_dump({"kind": "AtlasModuleContextDescriptor", "apiVersion": "v1", "paths": {
+                "logs": os.path.join(folder_path, "logs"),
+                "input": {"params": os.path.join(folder_path, "input_params.yaml")},
+                "output": {"params": os.path.join(folder_path, "output_params.yaml"), "files": os.path.join(folder_path, "files")},
+            }}, file)
+        with open(os.path.join(folder_path, "input_params.yaml"), 'w', encoding='utf-8') as file:
+            yaml.safe_dump({"kind": "AtlasModuleParamsInsecure", "apiVersion": "v1", "params": params}, file)
+        return folder_path, context_path
+
+    @staticmethod
+    def _fake_podman(**env_vars) -> tuple[dict, str]:
+        """Returns env with fake "podman" on PATH, and its root folder (FAKE_PODMAN_ROOT/fs is filesystem of its containers)"""
+        root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(root, "bin"))
+        os.makedirs(os.path.join(root, "fs"))
+        launcher = os.path.join(root, "bin", "podman")
+        with open(launcher, 'w', encoding='utf-8') as file:
+            file.write(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_PODMAN}" "$@"\n')
+        os.chmod(launcher, 0o755)
+        return {**os.environ, **env_vars, "FAKE_PODMAN_ROOT": root,
+                "PATH": os.path.join(root, "bin") + os.pathsep + os.environ["PATH"]}, root
+
+    @staticmethod
+    def _podman_calls(root: str, command: str) -> list[dict]:
+        with open(os.path.join(root, "calls.jsonl"), 'r', encoding='utf-8') as file:
+            calls = [json.loads(line) for line in file]
+        return [call for call in calls if call["args"][:1] == [command]]
+
+    def test_podman_run_image_concurrent_transfers(self):
+        env, root = self._fake_podman(FAKE_PODMAN_CP_DELAY="0.5")
+        for name in ("report.json", "data/result.txt"):
+            os.makedirs(os.path.join(root, "fs/out", os.path.dirname(name)), exist_ok=True)
+            with open(os.path.join(root, "fs/out", name), 'w', encoding='utf-8') as file:
+                file.write(name)
+        folder_path, context_path = self._create_context({
+            "image": "fake-image", "command": f"{sys.executable} -c pass",
+            "execution_config": {"operations_timeout": 2, "transfer_workers": 4},
+            "after_script": {"copy_files_to_host": {
+                "files/report.json": "/out/report.json", "files/result.txt": "/out/data/result.txt",
+                "files/missing.txt": "/out/missing.txt", "files/slow.txt": "/out/slow.txt",
+            }},
+        })
+        output = subprocess.run(["python", QUBER_CLI, "podman-run-image", f"--context_path={context_path}"],
+                                capture_output=True, text=True, env=env)
+        self.assertEqual(0, output.returncode)
+        with open(os.path.join(folder_path, "files/result.txt"), 'r', encoding='utf-8') as file:
+            self.assertEqual("data/result.txt", file.read())
+        with open(os.path.join(folder_path, "output_params.yaml"), 'r', encoding='utf-8') as file:
+            result = yaml.safe_load(file)['params']
+        self.assertEqual({"/out/report.json": "SUCCESS", "/out/data/result.txt": "SUCCESS", "/out/missing.txt": "FAILED",
+                          "/out/slow.txt": "TIMEOUT"}, {transfer['source']: transfer['status'] for transfer in result['transfers']})
+        self.assertTrue("could not be found" in next(t['error'] for t in result['transfers'] if t['status'] == "FAILED"))
+        # 4 transfers of at least 0.5s each (one of them times out after 2s) run at once
+        self.assertTrue(float(result['transfers_time'].rstrip("s")) < 3)
+        copies = [call for call in self._podman_calls(root, "cp") if call["exit_code"] == 0]
+        self.assertEqual(2, len(copies))
+        self.assertTrue(max(call["start"] for call in copies) < min(call["end"] for call in copies))
+
+    def test_podman_run_image_streaming_output(self):
+        env, root = self._fake_podman()
+        script = "import sys\nfor i in range(50000): print(f'line {i}')\nprint('error line', file=sys.stderr)"
+        folder_path, context_path = self._create_context({
+            "image": "fake-image", "command": f"{sys.executable} -c \"{script}\"",
+            "execution_config": {"timeout": 60, "stream_output": True, "stdout_tail_lines": 50, "save_stdout_to_params": True},
+        })
+        output = subprocess.run(["python", QUBER_CLI, "podman-run-image", f"--context_path={context_path}"],
+                                capture_output=True, text=True, env=env)
+        self.assertEqual(0, output.returncode)
+        with open(os.path.join(folder_path, "output_params.yaml"), 'r', encoding='utf-8') as file:
+            result = yaml.safe_load(file)['params']
+        self.assertEqual([f"line {i}" for i in range(49950, 50000)], result['stdout'].splitlines())
+        self.assertEqual("error line\n", result['stderr'])
+        with open(os.path.join(folder_path, "files/container_stdout.txt"), 'r', encoding='utf-8') as file:
+            lines = file.read().splitlines()
+        self.assertEqual(50000, len(lines))
+        self.assertEqual(["line 0", "line 49999"], [lines[0], lines[-1]])
+
+    def test_podman_run_image_streaming_output_file_error(self):
+        env, root = self._fake_podman()
+        folder_path, context_path = self._create_context({
+            "image": "fake-image", "command": f"{sys.executable} -c \"import sys; sys.stderr.write('x' * 10_000_000)\"",
+            "execution_config": {"timeout": 30, "stream_output": True},
+        })
+        os.makedirs(os.path.join(folder_path, "files/container_stderr.txt"))
+        start = time.perf_counter()
+        output = subprocess.run(["python", QUBER_CLI, "podman-run-image", f"--context_path={context_path}"],
+                                capture_output=True, text=True, env=env)
+        self.assertNotEqual(0, output.returncode)
+        self.assertTrue(time.perf_counter() - start < 20)
+        self.assertEqual([], self._podman_calls(root, "run"))
+
+    def test_podman_run_image_matrix(self):
+        env, root = self._fake_podman()
+        with open(os.path.join(root, "fs/result.txt"), 'w', encoding='utf-8') as file:
+            file.write("result")
+        # context with paths relative to cwd, which is not the context folder
+        folder_path = tempfile.mkdtemp()
+        os.makedirs(os.path.join(folder_path, "ctx"))
+        with open(os.path.join(folder_path, "ctx/context.yaml"), 'w', encoding='utf-8') as file:
+            yaml.safe_dump({"kind": "AtlasModuleContextDescriptor", "apiVersion": "v1", "paths": {
+                "logs": "ctx/logs", "input": {"params": "ctx/input_params.yaml"},
+                "output": {"params": "ctx/output_params.yaml", "files": "ctx/files"},
+            }}, file)
+        sleep_command = f"{sys.executable} -c \"import time; time.sleep(1)\""
+        with open(os.path.join(folder_path, "ctx/input_params.yaml"), 'w', encoding='utf-8') as file:
+            yaml.safe_dump({"kind": "AtlasModuleParamsInsecure", "apiVersion": "v1", "params": {
+                "image": "fake-image", "command": sleep_command,
+                "execution_config": {"max_parallel": 2},
+                "after_script": {"copy_files_to_host": {"copied/result.txt": "/result.txt"}},
+                "matrix": [{"name": "shard_1"}, {"name": "shard_2"}, {"name": "shard_3"},
+                           {"name": "broken", "command": f"{sys.executable} -c \"raise SystemExit(3)\""}],
+            }}, file)
+        output = subprocess.run(["python", os.path.abspath(QUBER_CLI), "podman-run-image", "--context_path=ctx/context.yaml"],
+                                capture_output=True, text=True, env=env, cwd=folder_path)
+        self.assertNotEqual(0, output.returncode)
+        files_path = os.path.join(folder_path, "ctx/files")
+        for name in ("shard_1", "shard_2", "shard_3", "broken"):
+            self.assertTrue(os.path.exists(os.path.join(files_path, name, "container_stdout.txt")))
+            with open(os.path.join(files_path, name, "copied/result.txt"), 'r', encoding='utf-8') as file:
+                self.assertEqual("result", file.read())
+        with open(os.path.join(files_path, "matrix_summary.json"), 'r', encoding='utf-8') as file:
+            summary = json.load(file)
+        self.assertEqual((4, 3, 1), (summary['total'], summary['succeeded'], summary['failed']))
+        self.assertEqual({"shard_1": 0, "shard_2": 0, "shard_3": 0, "broken": 3}, summary['return_codes'])
+        with open(os.path.join(folder_path, "ctx/output_params.yaml"), 'r', encoding='utf-8') as file:
+            result = yaml.safe_load(file)['params']
+        self.assertEqual(3, result['matrix_results']['broken']['return_code'])
+        self.assertEqual("SUCCESS", result['matrix_results']['shard_2']['transfers'][0]['status'])
+        # no more than "max_parallel" containers were running at any moment
+        runs = self._podman_calls(root, "run")
+        self.assertEqual(4, len(runs))
+        self.assertEqual(2, max(sum(1 for other in runs if other["start"] <= run["start"] < other["end"]) for run in runs))
+
+    def test_podman_run_image_reuse_container(self):
+        env, root = self._fake_podman()
+        pool_state_dir = tempfile.mkdtemp()
+        folder_path, context_path = self._create_context({
+            "image": "fake-image", "command": f"{sys.executable} -c pass",
+            "execution_config": {"reuse_container": True, "idle_timeout": 0, "pool_state_dir": pool_state_dir},
+        })
+        for expected_reused in (False, True):
+            output = subprocess.run(["python", QUBER_CLI, "podman-run-image", f"--context_path={context_path}"],
+                                    capture_output=True, text=True, env=env)
+            self.assertEqual(0, output.returncode)
+            with open(os.path.join(folder_path, "output_params.yaml"), 'r', encoding='utf-8') as file:
+                self.assertEqual(expected_reused, yaml.safe_load(file)['params']['container_reused'])
+        self.assertEqual(1, len(self._podman_calls(root, "run")))
+
+        cleanup_folder, cleanup_context_path = self._create_context({"pool_state_dir": pool_state_dir})
+        output = subprocess.run(["python", QUBER_CLI, "podman-pool-cleanup", f"--context_path={cleanup_context_path}"],
+                                capture_output=True, text=True, env=env)
+        self.assertEqual(0, output.returncode)
+        with open(os.path.join(cleanup_folder, "output_params.yaml"), 'r', encoding='utf-8') as file:
+            self.assertEqual(1, len(yaml.safe_load(file)['params']['evicted']))
+        self.assertEqual([], os.listdir(os.path.join(root, "containers")))
+        self.assertEqual([], [name for name in os.listdir(pool_state_dir) if name.endswith(".json")])
+
+    def test_podman_run_image_reuse_container_invalid_matrix(self):
+        env, root = self._fake_podman()
+        folder_path, context_path = self._create_context({
+            "image": "fake-image", "matrix": ["not an object"],
+            "execution_config": {"reuse_container": True, "pool_state_dir": tempfile.mkdtemp()},
+        })
+        output = subprocess.run(["python", QUBER_CLI, "podman-run-image", f"--context_path={context_path}"],
+                                capture_output=True, text=True, env=env)
+        self.assertNotEqual(0, output.returncode)
+        self.assertIn("params.matrix should be a list of objects", output.stdout + output.stderr)
+        self.assertNotIn("AttributeError", output.stdout + output.stderr)
+
+    def test_podman_run_image_reuse_container_timeout(self):
+        env, root = self._fake_podman()
+        pool_state_dir = tempfile.mkdtemp()
+        folder_path, context_path = self._create_context({
+            "image": "fake-image", "command": f"{sys.executable} -c \"import time; time.sleep(60)\"",
+            "execution_config": {"reuse_container": True, "timeout": 1, "pool_state_dir": pool_state_dir},
+        })
+        output = subprocess.run(["python", QUBER_CLI, "podman-run-image", f"--context_path={context_path}"],
+                                capture_output=True, text=True, env=env, timeout=30)
+        self.assertNotEqual(0, output.returncode)
+        # container is removed (killing the step's process) instead of being returned to the pool
+        self.assertEqual([], os.listdir(os.path.join(root, "containers")))
+        self.assertEqual([], [name for name in os.listdir(pool_state_dir) if name.endswith(".json")])
+
+    def test_podman_run_image_extract_params(self):
+        env, root = self._fake_podman()
+        files = {
+            "result.json": '{"a": 1}',
+            "wrong.json": "name: yaml content\n",  # falls back from JSON to YAML
+            "broken.yaml": "{not closed\n",  # neither JSON, YAML nor ENV
+            "env_no_ext": "# comment\nKEY=value\nURL=http://host/?a=b\n",
+            "yaml_no_ext": "url: http://host/?a=b\nitems:\n  - 1\n",  # "=" after ":" in first line is still YAML
+            "large.env": "A=" + "x" * 200,
+        }
+        os.makedirs(os.path.join(root, "fs/params"))
+        for name, content in files.items():
+            with open(os.path.join(root, "fs/params", name), 'w', encoding='utf-8') as file:
+                file.write(content)
+        folder_path, context_path = self._create_context({
+            "image": "fake-image", "command": f"{sys.executable} -c pass",
+            "execution_config": {"max_params_file_size_mb": 0.0001},
+            "after_script": {"extract_params_from_files": {f"/params/{name}": name.replace(".", "_") for name in files}},
+        })
+        output = subprocess.run(["python", QUBER_CLI, "podman-run-image", f"--context_path={context_path}"],
+                                capture_output=True, text=True, env=env)
+        self.assertEqual(0, output.returncode)
+        with open(os.path.join(folder_path, "output_params.yaml"), 'r', encoding='utf-8') as file:
+            result = yaml.safe_load(file)['params']
+        self.assertEqual({
+            "result_json": {"a": 1},
+            "wrong_json": {"name": "yaml content"},
+            "broken_yaml": "{not closed",
+            "env_no_ext": {"KEY": "value", "URL": "http://host/?a=b"},
+            "yaml_no_ext": {"url": "http://host/?a=b", "items": [1]},
+        }, result['extracted_output'])
+        extracted_files = {os.path.basename(stats["file"]): stats for stats in result['extracted_files']}
+        self.assertEqual({"result.json": "json", "wrong.json": "yaml", "broken.yaml": "text", "env_no_ext": "env",
+                          "yaml_no_ext": "yaml", "large.env": None},
+                         {name: stats['format'] for name, stats in extracted_files.items()})
+        self.assertEqual(202, extracted_files["large.env"]["size"])
+        self.assertEqual("too large", extracted_files["large.env"]["skipped"])
+        self.assertTrue(all(stats['time'].endswith("s") for stats in extracted_files.values()))
+
+    def test_analyze_files_folder(self):
+        input_folder, folder_path = tempfile.mkdtemp(), tempfile.mkdtemp()
+        os.makedirs(os.path.join(input_folder, "nested"))
+        with open(os.path.join(input_folder, "report.json"), 'w', encoding='utf-8') as file:
+            file.write('{"stages": []}\n')
+        with open(os.path.join(input_folder, "nested", "notes.txt"), 'w', encoding='utf-8') as file:
+            file.write("first line\nsecond line\nthird line")
+        with open(os.path.join(input_folder, "random.bin"), 'wb') as file:
+            file.write(os.urandom(1024 * 1024))
+        output = subprocess.run(["python", QUBER_CLI, "analyze-file", "-p", f"paths.input.files={input_folder}",
+                                 "-p", "params.workers=2", f"--folder_path={folder_path}"], capture_output=True, text=True)
+        self.assertEqual(0, output.returncode)
+        with open(os.path.join(folder_path, "output/params.yaml"), 'r', encoding='utf-8') as file:
+            result = yaml.safe_load(file)['params']
+            self.assertEqual(3, result['files_count'])
+            self.assertEqual("json", result['files']['report.json']['file_type'])
+            self.assertEqual("text", result['files']['nested/notes.txt']['file_type'])
+            self.assertEqual(3, result['files']['nested/notes.txt']['lines'])
+            self.assertEqual("binary", result['files']['random.bin']['file_type'])
+            with open(os.path.join(input_folder, "random.bin"), 'rb') as data:
+                self.assertEqual(hashlib.sha256(data.read()).hexdigest(), result['files']['random.bin']['checksums']['sha256'])
+        self.assertTrue(os.path.exists(os.path.join(folder_path, "output/files/file_analysis.json")))
+
+
+class TestStageStats(unittest.TestCase):
+
+    def test_parse_duration(self):
+        parse_duration = import_cli_module("qubership_cli_samples.report.stage_stats").parse_duration
+        for value, expected in [(12, 12.0), ("1.5s", 1.5), ("350ms", 0.35), ("1m 5s", 65.0), ("1m5s", 65.0), ("1h2m3s", 3723.0),
+                                ("2 mins 10 seconds", 130.0), ("1d", 86400.0), ("01:02:03", 3723.0), ("1:05", 65.0), ("0.5", 0.5)]:
+            self.assertAlmostEqual(expected, parse_duration(value), msg=value)
+        for value in [None, True, "", "5x", "1m5sx", "5 apples", "msec"]:
+            self.assertIsNone(parse_duration(value), value)
+
+
+class TestSystemLoad(unittest.TestCase):
+
+    def setUp(self):
+        self.system_load = import_cli_module("qubership_cli_samples.debug.system_load_commands")
+
+    def test_cpu_load_worker(self):
+        for load in (0.3, 1.0):
+            result = self.system_load.cpu_load_worker(1, load)
+            self.assertAlmostEqual(1, result["elapsed"], delta=0.2)
+            # busy share of each period follows requested load, instead of being busy all the time
+            self.assertAlmostEqual(load, result["cpu_time"] / result["elapsed"], delta=0.15)
+            self.assertTrue(result["iterations"] > 0)
+
+    def test_touch_pages(self):
+        page_size = self.system_load.RAM_PAGE_SIZE
+        mapping = mmap.mmap(-1, 3 * page_size + 10)
+        self.addCleanup(mapping.close)
+        with memoryview(mapping) as chunk:
+            with mock.patch.object(self.system_load.os, "urandom", side_effect=lambda size: b"\x01" * size):
+                self.assertEqual(4, self.system_load.touch_pages(chunk))
+            # only first byte of every page (including partial last one) is written
+            self.assertEqual([0, page_size, 2 * page_size, 3 * page_size], [offset for offset, value in enumerate(chunk) if value])
+
+
+class TestPipelineReportReader(unittest.TestCase):
+
+    def test_stages_before_header(self):
+        reader_module = import_cli_module("qubership_cli_samples.report.report_reader")
+        stages = [{"name": f"Этап {i} ✓", "status": "SUCCESS"} for i in range(50)]
+        path = os.path.join(tempfile.mkdtemp(), "pipeline_report.json")
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({"kind": "Ж", "stages": stages, "apiVersion": "v1", "execution": {"user": "юзер"}}, file, ensure_ascii=False)
+        # small odd chunks split multibyte characters between reads
+        reader = reader_module.PipelineReportReader(path, chunk_size=7)
+        self.assertEqual({"kind": "Ж", "apiVersion": "v1", "execution": {"user": "юзер"}},
+                         reader.read_header(["apiVersion", "execution"]))
+        with open(path, 'rb') as file:
+            file.seek(reader._stages_offset)
+            self.assertEqual(b"[", file.read(1))
+        # stages are read from remembered offset, without walking the header again
+        with mock.patch.object(reader_module._JsonStream, "iter_object_keys", side_effect=AssertionError):
+            self.assertEqual(stages, list(reader.iter_stages()))
+        self.assertEqual(stages, list(reader_module.PipelineReportReader(path, chunk_size=7).iter_stages()))
+
+
+class TestCommandProfiler(unittest.TestCase):
+
+    def test_overlapping_wait_capture(self):
+        profiling = import_cli_module("qubership_cli_samples.profiling")
+        original_wait = subprocess.Popen.wait
+        first, second = profiling.CommandProfiler("first"), profiling.CommandProfiler("second")
+        first_started, first_finished = threading.Event(), threading.Event()
+
+        def run_second():
+            first_started.wait()
+            with second._capture_waits():
+                first_finished.wait()
+                subprocess.Popen([sys.executable, "-c", "pass"]).wait()
+
+        thread = threading.Thread(target=run_second)
+        thread.start()
+        # runs overlap without nesting: second one starts after first one, and finishes after it
+        with first._capture_waits():
+            first_started.set()
+            subprocess.Popen([sys.executable, "-c", "pass"]).wait()
+        first_finished.set()
+        thread.join()
+
+        self.assertIs(original_wait, subprocess.Popen.wait)
+        self.assertEqual(1, first.waits["subprocess"]["count"])
+        self.assertEqual(1, second.waits["subprocess"]["count"])
+
+
+class TestContainerPool(unittest.TestCase):
+
+    def setUp(self):
+        env, self.podman_root = TestSampleCLICommands._fake_podman()
+        patcher = mock.patch.dict(os.environ, env)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool_module = import_cli_module("qubership_cli_samples.podman.container_pool")
+        self.pool = self.pool_module.ContainerPool(tempfile.mkdtemp(), operations_timeout=10)
+
+    def _acquire(self, key: str, step_id: str, idle_timeout: float = 600, cwd: str = None) -> tuple[str, bool]:
+        return self.pool.acquire(key, step_id, ["fake-image", "sleep", "infinity"], idle_timeout, busy_timeout=60, cwd=cwd)
+
+    def _running_containers(self) -> list[str]:
+        return sorted(name.removesuffix(".json") for name in os.listdir(os.path.join(self.podman_root, "containers")))
+
+    def test_key(self):
+        make_key = self.pool_module.ContainerPool.make_key
+        self.assertEqual(make_key("image", ["--mount", "a"]), make_key("image", ["--mount", "a"]))
+        self.assertNotEqual(make_key("image", ["--mount", "a"]), make_key("image", ["--mount", "b"]))
+        self.assertNotEqual(make_key("image", ["--mount", "a"]), make_key("other-image", ["--mount", "a"]))
+
+    def test_reuse_and_release(self):
+        context_folder = tempfile.mkdtemp()
+        name, reused = self._acquire("key1", "step1", cwd=context_folder)
+        self.assertFalse(reused)
+        self.assertEqual((name, True), self._acquire("key1", "step2"))
+        self.assertEqual(1, len(TestSampleCLICommands._podman_calls(self.podman_root, "run")))
+        self.assertEqual({"step1", "step2"}, set(self.pool._read_state(name)["steps"]))
+        self.pool.release(name, "step1")
+        self.assertEqual(["step2"], list(self.pool._read_state(name)["steps"]))
+        self.assertEqual([name], self._running_containers())
+        # started from given folder, where relative mount sources are resolved from
+        with open(os.path.join(self.podman_root, "containers", f"{name}.json"), 'r', encoding='utf-8') as file:
+            self.assertEqual(os.path.realpath(context_folder), os.path.realpath(json.load(file)["cwd"]))
+
+    def test_evict_idle(self):
+        idle_name, _ = self._acquire("idle", "step1", idle_timeout=0)
+        self.pool.release(idle_name, "step1")
+        busy_name, _ = self._acquire("busy", "step2", idle_timeout=0)
+        # containers locked by other steps are skipped
+        with self.pool._lock("idle"):
+            self.assertEqual([], self.pool.evict_idle())
+        # acquiring any container evicts idle ones, but not those still used by steps
+        active_name, _ = self._acquire("active", "step3")
+        self.assertEqual(sorted([busy_name, active_name]), self._running_containers())
+        self.assertIsNone(self.pool._read_state(idle_name))
+        self.pool.release(busy_name, "step2")
+        self.assertEqual([busy_name], self.pool.evict_idle())
+        self.assertEqual([active_name], self._running_containers())
+
+    def test_release_discard(self):
+        name, _ = self._acquire("key1", "step1")
+        self._acquire("key1", "step2")
+        self.pool.release(name, "step1", discard=True)
+        # container is still used by another step, but is not reused anymore
+        self.assertEqual([name], self._running_containers())
+        self.assertTrue(self.pool._read_state(name)["draining"])
+        new_name, reused = self._acquire("key1", "step3")
+        self.assertNotEqual(name, new_name)
+        self.assertFalse(reused)
+        self.pool.release(name, "step2")
+        self.assertEqual([new_name], self._running_containers())
+        self.assertIsNone(self.pool._read_state(name))
+
+    def test_start_timeout(self):
+        os.environ["FAKE_PODMAN_RUN_DELAY"] = "5"
+        self.pool.operations_timeout = 0.5
+        with self.assertRaisesRegex(self.pool_module.ContainerPoolException, "timed out"):
+            self._acquire("key1", "step1")
+        self.assertEqual([], list(self.pool.state_dir.glob("*.json")))
+        self.assertEqual(1, len(TestSampleCLICommands._podman_calls(self.podman_root, "rm")))
+
+
+class TestResourceSampler(unittest.TestCase):
+
+    def setUp(self):
+        self.sampler_module = import_cli_module("qubership_cli_samples.podman.resource_sampler")
+
+    def test_parse_size(self):
+        parse_size = self.sampler_module.parse_size
+        self.assertEqual(1_606_000, parse_size("1.606MB"))
+        self.assertEqual(8_200_000_000, parse_size("8.2GB"))
+        self.assertEqual(12 * 1024, parse_size("12KiB"))
+        self.assertEqual(1006, parse_size("1.006kB"))
+        self.assertEqual(2_621_440, parse_size(" 2.5MiB "))
+        self.assertEqual(0, parse_size("0B"))
+        self.assertEqual(796, parse_size("796"))
+        for value in ("--", "", "12XB", "1.2.3MB", None):
+            self.assertIsNone(parse_size(value))
+        self.assertEqual((1_606_000, 8_200_000_000), self.sampler_module.parse_size_pair("1.606MB / 8.2GB"))
+        self.assertEqual((1006, 796), self.sampler_module.parse_size_pair("1.006kB / 796B"))
+        self.assertEqual((None, None), self.sampler_module.parse_size_pair("--"))
+
+    def test_parse_go_duration(self):
+        parse_go_duration = self.sampler_module.parse_go_duration
+        self.assertEqual(62.5, parse_go_duration("1m2.5s"))
+        self.assertAlmostEqual(0.35, parse_go_duration("350ms"))
+        self.assertAlmostEqual(0.009473, parse_go_duration("9.473ms"))
+        self.assertAlmostEqual(3600.5, parse_go_duration("1h0m0.5s"))
+        self.assertAlmostEqual(12e-6, parse_go_duration("12µs"))
+        self.assertIsNone(parse_go_duration(""))
+        self.assertIsNone(parse_go_duration("n/a"))
+
+    def _poll_samples(self, outputs: list):
+        """Feeds sampler with (elapsed seconds, stats) items, None stats stand for failed "podman stats" call"""
+        sampler = self.sampler_module.ResourceSampler("container", interval=1)
+        for elapsed, stats in outputs:
+            if stats is None:
+                sampler._add_sample(None)
+            elif stats:
+                sampler._add_sample(sampler._parse_stats(stats[0], elapsed))
+        return sampler
+
+    @staticmethod
+    def _stats(cpu_time: str = None, mem_usage: str = "1.606MB / 8.2GB", mem_percent: str = "0.02%",
+               net_io: str = "1.006kB / 796B", block_io: str = "12KiB / 0B", pids: str = "1") -> list[dict]:
+        """Single report of "podman stats --format json" """
+        stats = {"id": "e9b3e24e5f4b", "name": "container", "cpu_percent": "0.52%", "avg_cpu": "0.52%", "mem_usage": mem_usage,
+                 "mem_percent": mem_percent, "net_io": net_io, "block_io": block_io, "pids": pids}
+        return [{**stats, "cpu_time": cpu_time}] if cpu_time is not None else [stats]
+
+    def test_cpu_delta(self):
+        sampler = self._poll_samples([
+            (1, self._stats("1s")),
+            (2, self._stats("1.5s")),
+            (3, self._stats()),  # no "cpu_time" (e.g. cgroups v1): sample is kept, CPU usage is unknown
+            (5, self._stats("4.5s")),  # delta is taken from the last sample with "cpu_time"
+        ])
+        self.assertEqual([None, 50.0, None, 100.0], [sample["cpu_percent"] for sample in sampler.samples])
+        self.assertEqual((1_606_000, 0.02, 1006, 796, 12 * 1024, 0, 1),
+                         tuple(sampler.samples[0][column] for column in ("mem_bytes", "mem_percent", "net_rx_bytes", "net_tx_bytes",
+                                                                         "block_read_bytes", "block_write_bytes", "pids")))
+
+    def test_summary(self):
+        sampler = self._poll_samples([
+            (1, self._stats("1s", mem_usage="1MB / 8.2GB", net_io="1kB / 0B", pids="2")),
+            (2, None),
+            (3, []),
+            (4, self._stats("2.5s", mem_usage="3MB / 8.2GB", mem_percent="--", net_io="5kB / 2kB", pids="4")),
+        ])
+        summary = sampler.summary()
+        self.assertEqual((2, 1, 1), (summary["samples"], summary["failed_samples"], summary["interval"]))
+        self.assertEqual({"avg": 50.0, "peak": 50.0}, summary["cpu_percent"])
+        self.assertEqual({"avg": 2_000_000, "peak": 3_000_000}, summary["mem_bytes"])
+        self.assertEqual({"avg": 0.02, "peak": 0.02}, summary["mem_percent"])
+        self.assertEqual({"avg": 3, "peak": 4}, summary["pids"])
+        self.assertEqual((5000, 2000), (summary["net_rx_bytes"], summary["net_tx_bytes"]))
+        self.assertIsNone(self.sampler_module.ResourceSampler("container", 1).summary()["cpu_percent"])
+
+
+    def test_stats_stream(self):
+        env, podman_root = TestSampleCLICommands._fake_podman()
+        with mock.patch.dict(os.environ, env):
+            subprocess.run(["podman", "run", "--detach", "--name", "container", "fake-image"], check=True)
+            sampler = self.sampler_module.ResourceSampler("container", interval=0.6)
+            sampler.start()
+            time.sleep(2.5)
+            sampler.stop()
+            samples = len(sampler.samples)
+            time.sleep(1.2)
+        self.assertEqual(1, sampler.interval)
+        self.assertTrue(samples >= 2, samples)
+        # stats are read from single "podman stats" stream, and no samples are added after stop
+        self.assertEqual(1, len(TestSampleCLICommands._podman_calls(podman_root, "stats")))
+        self.assertEqual(samples, len(sampler.samples))
+        self.assertEqual(0, sampler.failed_polls)
+        self.assertAlmostEqual(100.0, sampler.samples[-1]["cpu_percent"], delta=20)
 
 if __name__ == '__main__':
     unittest.main()
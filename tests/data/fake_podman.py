@@ -0,0 +1,163 @@
+"""
+Stand-in for "podman" CLI in tests, tests put it on PATH via small "podman" launcher script.
+
+"Containers" are plain host processes started from FAKE_PODMAN_ROOT/fs folder, which also plays role of container filesystem
+("podman cp container:/a/b host_path" copies FAKE_PODMAN_ROOT/fs/a/b). Container state is kept in FAKE_PODMAN_ROOT/containers.
+Every invocation is logged into FAKE_PODMAN_ROOT/calls.jsonl with its start and end time.
+
+Special behavior for tests:
+- "cp" sleeps FAKE_PODMAN_CP_DELAY seconds, and sleeps for a minute if source path contains "slow"
+- "run --detach" sleeps FAKE_PODMAN_RUN_DELAY seconds, and records folder it was called from as "cwd" of container
+- "mkdir" and "rm" are not executed by "exec" (they target container filesystem)
+- "stats" streams JSON reports of container busy with one CPU every "--interval" seconds, until it's removed
+"""
+import json, os, shutil, signal, subprocess, sys, time
+
+ROOT = os.environ["FAKE_PODMAN_ROOT"]
+FS_ROOT = os.path.join(ROOT, "fs")
+CONTAINERS_ROOT = os.path.join(ROOT, "containers")
+FLAGS_WITH_VALUES = {"--name", "--entrypoint", "--workdir", "--env", "--env-file", "--mount", "--label", "--format", "--interval"}
+
+
+def parse_args(args: list[str]) -> tuple[dict, list[str]]:
+    """Splits args into flags (name -> list of values) and positional args, starting from first positional one"""
+    flags, index = {}, 0
+    while index < len(args) and args[index].startswith("-"):
+        name, _, value = args[index].partition("=")
+        if name in FLAGS_WITH_VALUES and not value:
+            index += 1
+            value = args[index]
+        flags.setdefault(name, []).append(value)
+        index += 1
+    return flags, args[index:]
+
+
+def container_path(name: str) -> str:
+    return os.path.join(CONTAINERS_ROOT, f"{name}.json")
+
+
+def read_container(name: str):
+    try:
+        with open(container_path(name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_container(name: str, state: dict):
+    os.makedirs(CONTAINERS_ROOT, exist_ok=True)
+    with open(container_path(name), 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+
+
+def run_process(command: list[str], flags: dict) -> subprocess.Popen:
+    env = dict(os.environ)
+    for value in flags.get("--env", []):
+        key, _, value = value.partition("=")
+        env[key] = value
+    return subprocess.Popen(command, cwd=FS_ROOT, env=env)
+
+
+def run(args: list[str]) -> int:
+    flags, positional = parse_args(args)
+    name, command = flags["--name"][0], positional[1:]
+    if read_container(name):
+        print(f"Error: the container name \"{name}\" is already in use", file=sys.stderr)
+        return 125
+    if "--detach" in flags or "-d" in flags:
+        time.sleep(float(os.getenv("FAKE_PODMAN_RUN_DELAY", 0)))
+        write_container(name, {"running": True, "detached": True, "command": command, "processes": [], "cwd": os.getcwd()})
+        print(f"{name}_id")
+        return 0
+    process = run_process(command, flags)
+    write_container(name, {"running": True, "detached": False, "command": command, "processes": [process.pid]})
+    return_code = process.wait()
+    if state := read_container(name):
+        write_container(name, {**state, "running": False})
+    return return_code
+
+
+def exec_(args: list[str]) -> int:
+    flags, positional = parse_args(args)
+    name, command = positional[0], positional[1:]
+    state = read_container(name)
+    if not state or not state["running"]:
+        print(f"Error: no container with name or ID \"{name}\" found", file=sys.stderr)
+        return 125
+    if command[0] in ("mkdir", "rm"):
+        return 0
+    process = run_process(command, flags)
+    write_container(name, {**state, "processes": [*state["processes"], process.pid]})
+    return process.wait()
+
+
+def cp(args: list[str]) -> int:
+    source, target = args[0].split(":", 1)[1], args[1]
+    time.sleep(float(os.getenv("FAKE_PODMAN_CP_DELAY", 0)))
+    if "slow" in source:
+        time.sleep(60)
+    source_path = os.path.join(FS_ROOT, source.lstrip("/"))
+    if not os.path.exists(source_path):
+        print(f"Error: \"{source}\" could not be found on container: no such file or directory", file=sys.stderr)
+        return 125
+    if os.path.isdir(source_path):
+        shutil.copytree(source_path, os.path.join(target, os.path.basename(source_path)) if os.path.isdir(target) else target)
+    else:
+        shutil.copy(source_path, target)
+    return 0
+
+
+def rm(args: list[str]) -> int:
+    _, positional = parse_args(args)
+    for name in positional:
+        if state := read_container(name):
+            for pid in state["processes"]:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except OSError:
+                    pass
+            os.unlink(container_path(name))
+    return 0
+
+
+def inspect(args: list[str]) -> int:
+    _, positional = parse_args(args)
+    if not (state := read_container(positional[0])):
+        print(f"Error: no such container {positional[0]}", file=sys.stderr)
+        return 125
+    print("true" if state["running"] else "false")
+    return 0
+
+
+def stats(args: list[str]) -> int:
+    flags, positional = parse_args(args)
+    interval, cpu_time = float(flags.get("--interval", ["5"])[0]), 0.0
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    while read_container(positional[0]):
+        print(json.dumps([{"name": positional[0], "cpu_time": f"{cpu_time}s", "mem_usage": "1MB / 8GB", "mem_percent": "0.01%",
+                           "net_io": "0B / 0B", "block_io": "0B / 0B", "pids": "1"}], indent=1), flush=True)
+        time.sleep(interval)
+        cpu_time += interval
+    print(f"Error: no container with name or ID \"{positional[0]}\" found", file=sys.stderr)
+    return 125
+
+
+def main(args: list[str]) -> int:
+    if args[:1] == ["--version"]:
+        print("podman version 5.0.0")
+        return 0
+    handlers = {"run": run, "exec": exec_, "cp": cp, "rm": rm, "inspect": inspect, "stats": stats}
+    if args[:1] == ["container"]:
+        args = args[1:]
+    return handlers[args[0]](args[1:]) if args and args[0] in handlers else 0
+
+
+if __name__ == '__main__':
+    start = time.time()
+    exit_code = 1
+    try:
+        exit_code = main(sys.argv[1:])
+    finally:
+        with open(os.path.join(ROOT, "calls.jsonl"), 'a', encoding='utf-8') as log:
+            log.write(json.dumps({"args": sys.argv[1:], "start": start, "end": time.time(), "exit_code": exit_code}) + "\n")
+    sys.exit(exit_code)
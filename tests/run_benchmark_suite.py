@@ -0,0 +1,181 @@
+import argparse
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+PYZ_TARGET_PATH = "qubership_cli_samples"
+SOURCE_PATH = "../src"
+BENCHMARK_RESULTS_PATH = "../benchmark_results.json"
+DEFAULT_RUNS = 10
+DEFAULT_TOLERANCE = 0.25
+
+# Benchmarked CLI invocations, "{data}" is replaced with temp folder containing generated input data
+BENCHMARKS = {
+    "help": ["--help"],
+    "run-sample": ["run-sample", "--context_path=./data/context.yaml"],
+    "calc": ["calc", "--context_path=./data/context2.yaml"],
+    "spam": ["spam", "-p", "params.param_count=5000", "--folder_path={data}/context"],
+    "spam-files": ["spam-files", "-p", "params.files_count=200", "--folder_path={data}/context"],
+    "spam-module-report": ["spam-module-report", "-p", "params.params_count=5000", "--folder_path={data}/context"],
+    "generate-html-report": ["generate-html-report", "-p", "paths.input.files={data}", "--folder_path={data}/context"],
+    "generate-html-report-100k": ["generate-html-report", "-p", "paths.input.files={data}/large", "--folder_path={data}/context"],
+}
+
+_IMPORTTIME_ROOT_PATTERN = re.compile(r'^import time:\s+\d+ \|\s+(\d+) \| \S')
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def prepare_input_data(folder: str, stages_count: int = 2000, large_stages_count: int = 100_000):
+    write_pipeline_report(folder, stages_count)
+    write_pipeline_report(os.path.join(folder, "large"), large_stages_count)
+
+
+def write_pipeline_report(folder: str, stages_count: int):
+    os.makedirs(folder, exist_ok=True)
+    stages = [{"name": f"Stage {i}", "type": "JOB", "status": "SUCCESS" if i % 10 else "FAILED",
+               "time": f"{i % 60}s", "url": f"https://example.com/stages/{i}"} for i in range(stages_count)]
+    with open(os.path.join(folder, "pipeline_report.json"), 'w', encoding='utf-8') as file:
+        json.dump({"apiVersion": "v1", "execution": {"user": "benchmark", "status": "SUCCESS"}, "stages": stages}, file)
+
+
+def create_source_launcher(folder: str) -> str:
+    """Same entrypoint zipapp generates, but importing package from source tree"""
+    launcher = os.path.join(folder, "qubership_cli_samples_source")
+    os.makedirs(launcher, exist_ok=True)
+    with open(os.path.join(launcher, "__main__.py"), 'w', encoding='utf-8') as file:
+        file.write("import qubership_cli_samples.__main__\nqubership_cli_samples.__main__.cli()\n")
+    return launcher
+
+
+# Measured process is started from this small stub, since forked child inherits peak RSS of its parent (e.g. pytest process)
+_MEASURE_STUB = """
+import os, sys, time
+start = time.perf_counter()
+pid = os.fork()
+if pid == 0:
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    os.execv(sys.argv[1], sys.argv[1:])
+_, status, rusage = os.wait4(pid, 0)
+print((time.perf_counter() - start) * 1_000, rusage.ru_maxrss, os.waitstatus_to_exitcode(status))
+"""
+
+
+def run_once(cmd: list[str], env: dict) -> tuple[float, int, int]:
+    """Returns wall time (ms), peak RSS (KiB) and return code of a single run"""
+    output = subprocess.run([sys.executable, "-c", _MEASURE_STUB, *cmd], capture_output=True, text=True, env=env)
+    wall_ms, rss_kb, return_code = output.stdout.split()
+    return float(wall_ms), int(rss_kb), int(return_code)
+
+
+def measure_import_time(cmd: list[str], env: dict) -> float:
+    """Sum of cumulative times of top-level imports, reported by `-X importtime` (ms)"""
+    output = subprocess.run([cmd[0], "-X", "importtime", *cmd[1:]], capture_output=True, text=True, env=env)
+    total_us = 0
+    for line in output.stderr.splitlines():
+        if match := _IMPORTTIME_ROOT_PATTERN.match(line):
+            total_us += int(match.group(1))
+    return total_us / 1_000
+
+
+def run_benchmarks(targets: list[str], runs: int) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        prepare_input_data(temp_dir)
+        for target in targets:
+            env = dict(os.environ)
+            if target == "source":
+                cli_path = create_source_launcher(temp_dir)
+                env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.abspath(SOURCE_PATH), env.get("PYTHONPATH")]))
+            else:
+                cli_path = PYZ_TARGET_PATH
+            for name, args in BENCHMARKS.items():
+                cmd = [sys.executable, cli_path, *[arg.replace("{data}", temp_dir) for arg in args]]
+                wall_times, peak_rss, failures = [], [], 0
+                for _ in range(runs):
+                    wall_ms, rss_kb, return_code = run_once(cmd, env)
+                    wall_times.append(wall_ms)
+                    peak_rss.append(rss_kb)
+                    failures += 1 if return_code != 0 else 0
+                results[f"{target}:{name}"] = {
+                    "runs": runs,
+                    "failures": failures,
+                    "p50_ms": round(percentile(wall_times, 50), 1),
+                    "p95_ms": round(percentile(wall_times, 95), 1),
+                    "peak_rss_kb": max(peak_rss),
+                    "import_ms": round(measure_import_time(cmd, env), 1),
+                }
+                logging.info(f"{target}:{name} - {results[f'{target}:{name}']}")
+    return results
+
+
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for key, result in results.items():
+        if result["failures"]:
+            regressions.append(f"{key}: {result['failures']}/{result['runs']} runs failed")
+        if not (base := baseline.get(key)):
+            continue
+        for metric in ["p50_ms", "p95_ms", "peak_rss_kb"]:
+            if base.get(metric) and result[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{key}: {metric} {base[metric]} -> {result[metric]} (+{(result[metric] / base[metric] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def format_report(results: dict, baseline: dict, regressions: list[str], tolerance: float) -> str:
+    lines = ["### Benchmark results:",
+             "| Benchmark | p50, ms | p95, ms | Peak RSS, MiB | Imports, ms | Baseline p50, ms |",
+             "|-----------|---------|---------|---------------|-------------|------------------|"]
+    for key, result in results.items():
+        base_p50 = baseline.get(key, {}).get("p50_ms", "-")
+        lines.append(f"| {key} | {result['p50_ms']} | {result['p95_ms']} | {result['peak_rss_kb'] / 1024:.1f} | {result['import_ms']} | {base_p50} |")
+    if regressions:
+        lines.append(f"\nRegressions (tolerance is {tolerance * 100:.0f}%) :x:")
+        lines.extend(f"- {regression}" for regression in regressions)
+    else:
+        lines.append(f"\nNo regressions (tolerance is {tolerance * 100:.0f}%) :white_check_mark:")
+    return "\n".join(lines)
+
+
+def run_benchmark_suite(targets: list[str], runs: int = DEFAULT_RUNS, baseline_path: str = None,
+                        tolerance: float = DEFAULT_TOLERANCE, output_path: str = BENCHMARK_RESULTS_PATH) -> tuple[bool, str]:
+    """Runs benchmarks, saves results to `output_path` and compares them with baseline. Returns (no regressions, markdown report)"""
+    baseline = {}
+    if baseline_path and os.path.exists(baseline_path):
+        with open(baseline_path, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+    results = run_benchmarks(targets, runs)
+    with open(output_path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+    regressions = compare_with_baseline(results, baseline, tolerance)
+    return not regressions, format_report(results, baseline, regressions, tolerance)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO,
+                        format=u'[%(asctime)s] [%(levelname)-s] [%(filename)s]: %(message)s')
+    parser = argparse.ArgumentParser(description="CLI cold start and per-command latency benchmarks")
+    parser.add_argument("--target", choices=["pyz", "source", "both"], default="both")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--baseline", help="JSON with results of previous build to compare with")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed relative slowdown, e.g. 0.25")
+    parser.add_argument("--output", help="Where to save results (can be used as next baseline)")
+    args = parser.parse_args()
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    output_path = os.path.abspath(args.output) if args.output else BENCHMARK_RESULTS_PATH
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    success, report = run_benchmark_suite(["pyz", "source"] if args.target == "both" else [args.target],
+                                          args.runs, baseline_path, args.tolerance, output_path)
+    print(report)
+    if not success:
+        exit(1)
@@ -46,7 +46,7 @@ def write_step_summary(text: str):
         summary_file.write(text)
 
 
-def report_execution_result(is_success: bool, error: Exception = None, test_report: str = None):
+def report_execution_result(is_success: bool, error: Exception = None, test_report: str = None, benchmark_report: str = None):
     zipapp_size = sizeof_fmt(os.path.getsize(ZIPAPP_PATH))
     message = f"""### Validate test results report:
 - Result is {"SUCCESS :white_check_mark:" if is_success else "FAILURE :x:"}
@@ -57,6 +57,8 @@ def report_execution_result(is_success: bool, error: Exception = None, test_repo
         message += f"\n\nError message:\n```{type(error)} - {error}```"
     if test_report:
         message += f"\n```\n{test_report}\n```"
+    if benchmark_report:
+        message += f"\n\n{benchmark_report}"
     write_step_summary(message)
 
 
@@ -64,12 +66,20 @@ if __name__ == '__main__':
     logging.basicConfig(stream=sys.stdout, level=logging.INFO,
                         format=u'[%(asctime)s] [%(levelname)-s] [%(filename)s]: %(message)s')
     pytest_report_collector = ResultsCollector()
+    benchmark_report = None
     try:
         os.chdir("./tests")
         res = pytest.main(args=["./cli", "-s"], plugins=[pytest_report_collector])
         if res != 0:
             raise Exception("Tests failed!")
-        report_execution_result(True, test_report=pytest_report_collector.get_short_summary())
+        if os.getenv('RUN_BENCHMARKS', '').lower() in ('true', '1', 'yes'):
+            from run_benchmark_suite import run_benchmark_suite
+            benchmarks_success, benchmark_report = run_benchmark_suite(
+                targets=os.getenv('BENCHMARK_TARGETS', "pyz").split(","),
+                baseline_path=os.getenv('BENCHMARK_BASELINE_PATH'))
+            if not benchmarks_success:
+                raise Exception("Benchmarks regressed!")
+        report_execution_result(True, test_report=pytest_report_collector.get_short_summary(), benchmark_report=benchmark_report)
     except Exception as e:
-        report_execution_result(False, e, test_report=pytest_report_collector.get_short_summary())
+        report_execution_result(False, e, test_report=pytest_report_collector.get_short_summary(), benchmark_report=benchmark_report)
         exit(1984)